@@ -0,0 +1,366 @@
+"""
+HTTP load benchmark.
+
+Seeds a fresh database, starts the API under uvicorn and drives
+``/token``, ``/transactions/``, ``/analytics/summary``, ``/budgets/`` and
+``/budgets/progress`` with concurrent clients, one endpoint at a time.
+The JSON report holds req/s and latency percentiles per endpoint together
+with the commit and settings, so runs on different commits can be
+compared directly.
+
+Usage::
+
+    python -m benchmarks.load --users 50 --concurrency 16 -o run.json
+
+Pass ``--base-url`` to load an already running server instead; it must
+then serve a database seeded with the same ``--users`` and ``--password``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+from finance_tracker.database import setup_database
+from finance_tracker.seed import seed
+
+
+ENDPOINTS = ("token", "transactions", "summary", "budgets", "progress")
+PERCENTILES = (50, 90, 99)
+YEAR_START = datetime(2024, 1, 1)
+YEAR_END = date(2024, 12, 31)
+
+
+def seed_database(path, users, transactions, password, seed_value):
+    """
+    Create a database holding a synthetic dataset for the load.
+
+    Args:
+        path: database file to create.
+        users: number of users, named user1, user2, ...
+        transactions: mean transactions per user.
+        password: password of every user.
+        seed_value: seed of the data generator.
+
+    Returns:
+        None
+    """
+    conn = sqlite3.connect(path)
+    try:
+        setup_database(conn)
+        seed(conn, users=users, transactions=transactions,
+             password=password, seed_value=seed_value, end=YEAR_END)
+    finally:
+        conn.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(path, port):
+    """
+    Start uvicorn serving the API on a seeded database.
+
+    Args:
+        path: database file.
+        port: local TCP port.
+
+    Returns:
+        subprocess.Popen: running server
+    """
+    env = dict(os.environ, FINANCE_DB_PATH=path, SENTRY_ENABLED="0")
+    return subprocess.Popen(  # nosec
+        [sys.executable, "-m", "uvicorn", "finance_tracker.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level",
+         "warning"],
+        cwd=Path(__file__).resolve().parent.parent, env=env)
+
+
+def wait_until_ready(base_url, timeout=30.0):
+    """
+    Poll the server until it answers.
+
+    Args:
+        base_url: server root URL.
+        timeout: seconds to wait.
+
+    Returns:
+        None
+
+    Raises:
+        RuntimeError: if the server does not come up in time.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(base_url + "/", timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def percentile(sorted_values, pct):
+    """
+    Return a nearest-rank percentile.
+
+    Args:
+        sorted_values: ascending sample.
+        pct: percentile between 0 and 100.
+
+    Returns:
+        float: value at the percentile, 0 for an empty sample
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize_latencies(latencies, errors, elapsed):
+    """
+    Build the report entry of one endpoint.
+
+    Args:
+        latencies: seconds of each successful request.
+        errors: number of failed requests.
+        elapsed: wall-clock seconds of the phase.
+
+    Returns:
+        dict: throughput and latency percentiles in milliseconds
+    """
+    values = sorted(latencies)
+    result = {
+        "requests": len(values),
+        "errors": errors,
+        "requests_per_second": round(len(values) / elapsed, 2),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3)
+        if values else 0.0,
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 3)
+    return result
+
+
+def build_request(endpoint, username, password, rng):
+    """
+    Return (method, path, kwargs) of one request to an endpoint.
+
+    Query parameters are randomized so reads are not all answered by the
+    response cache.
+
+    Args:
+        endpoint: one of ENDPOINTS.
+        username: authenticated user.
+        password: its password.
+        rng: random.Random.
+
+    Returns:
+        tuple: httpx request arguments
+    """
+    if endpoint == "token":
+        return "POST", "/token", {"data": {"username": username,
+                                           "password": password}}
+    if endpoint == "transactions":
+        month = rng.randint(1, 12)
+        params = {"limit": rng.choice((50, 100)),
+                  "start_date": f"2024-{month:02d}-01T00:00:00"}
+        return "GET", "/transactions/", {"params": params}
+    if endpoint == "summary":
+        start = YEAR_START + timedelta(days=rng.randrange(300))
+        end = start + timedelta(days=rng.randint(1, 60),
+                                seconds=rng.randrange(86400))
+        return "GET", "/analytics/summary", {"params": {
+            "start_date": start.isoformat(), "end_date": end.isoformat()}}
+    if endpoint == "progress":
+        return "GET", "/budgets/progress", {
+            "params": {"active_only": "false"}}
+    return "GET", "/budgets/", {"params": {"active_only": "false"}}
+
+
+async def run_phase(base_url, endpoint, tokens, password, concurrency,
+                    duration, rng):
+    """
+    Load one endpoint with ``concurrency`` clients for ``duration`` s.
+
+    Args:
+        base_url: server root URL.
+        endpoint: one of ENDPOINTS.
+        tokens: dict of bearer token by username.
+        password: password of every user.
+        concurrency: number of concurrent clients.
+        duration: seconds to run.
+        rng: random.Random.
+
+    Returns:
+        dict: report entry of the endpoint
+    """
+    latencies = []
+    errors = 0
+    usernames = list(tokens)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                 timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                username = rng.choice(usernames)
+                method, path, kwargs = build_request(endpoint, username,
+                                                     password, rng)
+                headers = {"Authorization": f"Bearer {tokens[username]}"}
+                begin = time.perf_counter()
+                try:
+                    response = await client.request(method, path,
+                                                    headers=headers,
+                                                    **kwargs)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                if response.status_code >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - begin)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize_latencies(latencies, errors, elapsed)
+
+
+def login_all(base_url, users, password):
+    """
+    Obtain a bearer token for every user.
+
+    Args:
+        base_url: server root URL.
+        users: number of seeded users.
+        password: their password.
+
+    Returns:
+        dict: token by username
+    """
+    tokens = {}
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        for i in range(1, users + 1):
+            response = client.post("/token", data={"username": f"user{i}",
+                                                   "password": password})
+            response.raise_for_status()
+            tokens[f"user{i}"] = response.json()["access_token"]
+    return tokens
+
+
+def git_revision():
+    """
+    Describe the checked out commit.
+
+    Args:
+
+    Returns:
+        dict: commit hash and whether the tree has local changes
+    """
+    def git(*args):
+        return subprocess.run(  # nosec
+            ["git", *args], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None,
+                "dirty": bool(git("status", "--porcelain"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def main(argv=None):
+    """Seed, start the server, run every phase and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=1000,
+                        help="transactions per user")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="seconds per endpoint")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help="comma-separated subset of " +
+                        ", ".join(ENDPOINTS))
+    parser.add_argument("--password", default="benchmark")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url",
+                        help="load this server instead of starting one")
+    parser.add_argument("-o", "--output", help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    endpoints = [name.strip() for name in args.endpoints.split(",")]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    rng = random.Random(args.seed)
+    server = None
+    with tempfile.TemporaryDirectory() as tmp:
+        base_url = args.base_url
+        seed_seconds = None
+        if base_url is None:
+            path = str(Path(tmp) / "finance.db")
+            started = time.perf_counter()
+            seed_database(path, args.users, args.transactions,
+                          args.password, args.seed)
+            seed_seconds = round(time.perf_counter() - started, 3)
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(path, port)
+        try:
+            wait_until_ready(base_url)
+            tokens = login_all(base_url, args.users, args.password)
+            results = {}
+            for endpoint in endpoints:
+                results[endpoint] = asyncio.run(run_phase(
+                    base_url, endpoint, tokens, args.password,
+                    args.concurrency, args.duration, rng))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+    report = {
+        "benchmark": "load",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": {
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+            "seed_seconds": seed_seconds,
+            "base_url": args.base_url,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+RETURNING benchmark.
+
+Replays the single-row writes of the API endpoints twice, through an
+``AsyncConnection`` on a one-thread executor like the server uses: once
+the way the endpoints used to, with the write followed by a SELECT of the
+row by key in a second executor call, and once through
+``finance_tracker.repository``, whose writes hand the row back with
+``RETURNING``. For each kind of write it reports the executor round trips
+and statements per write and the time per write.
+
+Usage::
+
+    python -m benchmarks.returning --writes 5000
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.statement_cache import RecordingConnection
+from finance_tracker import repository
+from finance_tracker.async_db import AsyncConnection
+from finance_tracker.database import PROFILE, setup_database
+from finance_tracker.models import BudgetCreate, CategoryCreate, \
+    TransactionCreate, to_minor_units, to_timestamp
+
+
+def reselect_user(conn, username, password, email):
+    """Insert a user and return its id."""
+    return conn.execute(repository.INSERT_USER,
+                        (username, password, email)).lastrowid
+
+
+def reselect_category(conn, user_id, category):
+    """Insert a category and return its id."""
+    return conn.execute(repository.INSERT_CATEGORY,
+                        (category.name, category.is_predefined,
+                         category.type, user_id)).lastrowid
+
+
+def reselect_transaction(conn, user_id, transaction):
+    """Insert a transaction and return its id."""
+    return conn.execute(
+        repository.INSERT_TRANSACTION,
+        repository.transaction_values(user_id, transaction)).lastrowid
+
+
+def reselect_update(conn, transaction_id, user_id, fields):
+    """Update a transaction and return its id."""
+    conn.execute(repository.update_statement(tuple(fields)),
+                 {**fields, "id": transaction_id, "user_id": user_id})
+    return transaction_id
+
+
+def reselect_budget(conn, user_id, budget):
+    """Insert a budget and return its id."""
+    return conn.execute(repository.INSERT_BUDGET,
+                        (user_id, budget.category_id,
+                         to_minor_units(budget.target_amount),
+                         to_timestamp(budget.start_date),
+                         to_timestamp(budget.end_date),
+                         budget.name)).lastrowid
+
+
+# Kind of write: (repository write, former write, former read by key).
+WRITES = {
+    "user": (repository.insert_user, reselect_user,
+             lambda conn, key, args: repository.get_user(conn, key)),
+    "category": (repository.insert_category, reselect_category,
+                 lambda conn, key, args: repository.get_category(conn, key)),
+    "transaction": (repository.insert_transaction, reselect_transaction,
+                    lambda conn, key, args: repository.get_transaction(
+                        conn, key, args[0])),
+    "update": (repository.update_transaction, reselect_update,
+               lambda conn, key, args: repository.get_transaction(
+                   conn, key, args[1])),
+    "budget": (repository.insert_budget, reselect_budget,
+               lambda conn, key, args: repository.get_budget(conn, key)),
+}
+
+
+def workload(count):
+    """
+    Build the arguments of every write.
+
+    Args:
+        count: writes of each kind.
+
+    Returns:
+        dict: list of argument tuples per kind of write
+    """
+    base = datetime(2024, 1, 1)
+    return {
+        "user": [(f"user{i}", "hash", f"user{i}@example.com")
+                 for i in range(count)],
+        "category": [(1, CategoryCreate(name=f"Category {i}",
+                                        type="expense"))
+                     for i in range(count)],
+        "transaction": [(1, TransactionCreate(
+            category_id=1, amount=i % 500 + 1,
+            date=base + timedelta(minutes=i), type="expense"))
+            for i in range(count)],
+        "update": [(i + 1, 1, {"amount": i + 100}) for i in range(count)],
+        "budget": [(1, BudgetCreate(target_amount=100,
+                                    start_date=base + timedelta(days=i),
+                                    end_date=base + timedelta(days=i + 30)))
+                   for i in range(count)],
+    }
+
+
+async def replay(db, kind, calls, implementation):
+    """Run the writes of one kind and return the executor calls made."""
+    write, reselect_write, reselect_read = WRITES[kind]
+    round_trips = 0
+    for args in calls:
+        if implementation == "returning":
+            await db.run(write, *args)
+            round_trips += 1
+        else:
+            key = await db.run(reselect_write, *args)
+            await db.run(reselect_read, key, args)
+            round_trips += 2
+    await db.commit()
+    return round_trips
+
+
+def run(path, ops, implementation):
+    """Replay ``ops`` and return the measurements of one implementation."""
+    conn = sqlite3.connect(path, factory=RecordingConnection,
+                           check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    PROFILE.apply(conn)
+    conn.execute(repository.INSERT_USER, ("owner", "x", "owner@example.com"))
+    conn.commit()
+    results = {}
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        db = AsyncConnection(conn, executor)
+        for kind, calls in ops.items():
+            conn.statements.clear()
+            started = time.perf_counter()
+            round_trips = asyncio.run(
+                replay(db, kind, calls, implementation))
+            elapsed = time.perf_counter() - started
+            results[kind] = {
+                "round_trips_per_write": round_trips / len(calls),
+                "statements_per_write": len(conn.statements) / len(calls),
+                "us_per_write": round(elapsed / len(calls) * 1e6, 2),
+            }
+    conn.close()
+    return {"implementation": implementation, "writes": results}
+
+
+def main(argv=None):
+    """Run the benchmark and print a JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writes", type=int, default=5000,
+                        help="writes of each kind")
+    args = parser.parse_args(argv)
+    if not repository.SUPPORTS_RETURNING:
+        parser.error(f"SQLite {sqlite3.sqlite_version} lacks RETURNING")
+
+    ops = workload(args.writes)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for implementation in ("reselect", "returning"):
+            path = str(Path(tmp) / f"{implementation}.db")
+            conn = sqlite3.connect(path)
+            setup_database(conn)
+            conn.close()
+            results.append(run(path, ops, implementation))
+    print(json.dumps({"benchmark": "returning",
+                      "sqlite_version": sqlite3.sqlite_version,
+                      "writes": args.writes,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Statement cache benchmark.
+
+Replays a mix of transaction listings and partial updates twice: once
+with SQL built per request the way the endpoints used to, and once
+through ``finance_tracker.repository``. For each run it reports how many
+distinct statement texts were executed, the hit rate of an LRU statement
+cache of the configured size over that stream, and the time per call.
+
+Usage::
+
+    python -m benchmarks.statement_cache --operations 20000
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from finance_tracker.models import to_timestamp
+from finance_tracker import repository
+from finance_tracker.database import PROFILE, STATEMENT_CACHE_SIZE, \
+    setup_database
+from finance_tracker.repository import TRANSACTION_FIELDS, UPDATABLE_FIELDS
+
+
+class RecordingConnection(sqlite3.Connection):
+    """Connection remembering the text of every executed statement."""
+
+    def __init__(self, *args, **kwargs):
+        """Open the connection with an empty statement log."""
+        super().__init__(*args, **kwargs)
+        self.statements = []
+
+    def execute(self, sql, parameters=()):
+        """Record and execute a statement."""
+        self.statements.append(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        """Record and execute a statement for every parameter set."""
+        self.statements.append(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+def lru_hit_rate(statements, size):
+    """
+    Return the hit rate of an LRU cache of ``size`` statements.
+
+    Args:
+        statements: executed statement texts, in order.
+        size: number of prepared statements kept.
+
+    Returns:
+        float: share of executions finding a prepared statement
+    """
+    cache = OrderedDict()
+    hits = 0
+    for sql in statements:
+        if sql in cache:
+            hits += 1
+            cache.move_to_end(sql)
+            continue
+        cache[sql] = None
+        if len(cache) > size:
+            cache.popitem(last=False)
+    return hits / len(statements) if statements else 0.0
+
+
+def adhoc_list(conn, user_id, start=None, end=None, category_ids=None,
+               type_=None, after=None, limit=-1, fields=TRANSACTION_FIELDS):
+    """List transactions with SQL assembled from the requested filters."""
+    where = "user_id = ?"
+    params = [user_id]
+    if start:
+        where += " AND date >= ?"
+        params.append(start)
+    if end:
+        where += " AND date <= ?"
+        params.append(end)
+    if category_ids:
+        where += f" AND category_id IN ({','.join('?' * len(category_ids))})"
+        params.extend(category_ids)
+    if type_:
+        where += " AND type = ?"
+        params.append(type_)
+    if after:
+        where += " AND (date, id) < (?, ?)"
+        params.extend(after)
+    params.append(limit)
+    rows = conn.execute(
+        f"SELECT {', '.join(fields)} FROM transactions "  # nosec
+        f"WHERE {where} ORDER BY date DESC, id DESC LIMIT ?", params
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def adhoc_update(conn, transaction_id, user_id, fields):
+    """Update transactions with a SET clause built from the fields."""
+    set_clause = ", ".join(f"{field} = ?" for field in fields)
+    return conn.execute(
+        f"UPDATE transactions SET {set_clause} "  # nosec
+        f"WHERE id = ? AND user_id = ?",
+        [*fields.values(), transaction_id, user_id]
+    ).rowcount
+
+
+def repository_list(conn, user_id, fields=TRANSACTION_FIELDS, **filters):
+    """List transactions with the fixed repository statement."""
+    rows = repository.list_transactions(conn, user_id, **filters)
+    if fields == TRANSACTION_FIELDS:
+        return [dict(row) for row in rows]
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+def seed(path, users, transactions):
+    """Create a database holding ``transactions`` rows per user."""
+    conn = sqlite3.connect(path)
+    setup_database(conn)
+    rng = random.Random(7)
+    conn.executemany(
+        "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+        [(f"user{i}", "x", f"user{i}@example.com") for i in range(users)])
+    categories = [row[0] for row in conn.execute("SELECT id FROM categories")]
+    base = datetime(2024, 1, 1)
+    conn.executemany(
+        repository.INSERT_TRANSACTION,
+        [(user_id, rng.choice(categories), rng.randint(100, 50000), None,
+          to_timestamp(base + timedelta(minutes=rng.randrange(525600))),
+          rng.choice(("income", "expense")), 0, None)
+         for user_id in range(1, users + 1)
+         for _ in range(transactions)])
+    conn.commit()
+    conn.close()
+
+
+def workload(operations, users, transactions, seed_value=11):
+    """Build a reproducible list of (kind, kwargs) operations."""
+    rng = random.Random(seed_value)
+    ops = []
+    for _ in range(operations):
+        user_id = rng.randint(1, users)
+        if rng.random() < 0.8:
+            filters = {"limit": rng.choice((20, 50, 100)) + 1}
+            if rng.random() < 0.5:
+                month = rng.randint(1, 12)
+                filters["start"] = to_timestamp(datetime(2024, month, 1))
+                filters["end"] = to_timestamp(
+                    datetime(2024, month, 28, 23, 59, 59))
+            if rng.random() < 0.3:
+                filters["category_ids"] = rng.sample(range(1, 14),
+                                                     rng.randint(1, 4))
+            if rng.random() < 0.3:
+                filters["type_"] = rng.choice(("income", "expense"))
+            if rng.random() < 0.3:
+                filters["after"] = (to_timestamp(datetime(2024, 7, 1)),
+                                    10 ** 9)
+            if rng.random() < 0.2:
+                filters["fields"] = tuple(rng.sample(TRANSACTION_FIELDS, 3))
+            ops.append(("list", user_id, filters))
+        else:
+            transaction_id = (user_id - 1) * transactions + \
+                rng.randint(1, transactions)
+            names = rng.sample(UPDATABLE_FIELDS[:2], rng.randint(1, 2))
+            fields = {name: (rng.randint(100, 50000)
+                             if name == "amount" else "edited")
+                      for name in names}
+            ops.append(("update", user_id, (transaction_id, fields)))
+    return ops
+
+
+def run(path, ops, implementation, cache_size):
+    """Replay ``ops`` and return the measurements of one implementation."""
+    conn = sqlite3.connect(path, factory=RecordingConnection,
+                           cached_statements=cache_size)
+    conn.row_factory = sqlite3.Row
+    PROFILE.apply(conn)
+    list_, update = {
+        "adhoc": (adhoc_list, adhoc_update),
+        "repository": (repository_list, repository.update_transaction),
+    }[implementation]
+    started = time.perf_counter()
+    for kind, user_id, args in ops:
+        if kind == "list":
+            list_(conn, user_id, **args)
+        else:
+            transaction_id, fields = args
+            update(conn, transaction_id, user_id, fields)
+    conn.rollback()
+    elapsed = time.perf_counter() - started
+    statements = conn.statements
+    conn.close()
+    return {
+        "implementation": implementation,
+        "statements": len(statements),
+        "distinct_statements": len(set(statements)),
+        "cache_hit_rate": round(lru_hit_rate(statements, cache_size), 4),
+        "us_per_operation": round(elapsed / len(ops) * 1e6, 2),
+    }
+
+
+def main(argv=None):
+    """Run the benchmark and print a JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=2000,
+                        help="transactions per user")
+    parser.add_argument("--cache-size", type=int,
+                        default=STATEMENT_CACHE_SIZE,
+                        help="sqlite3 cached_statements per connection")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        seed(path, args.users, args.transactions)
+        ops = workload(args.operations, args.users, args.transactions)
+        results = [run(path, ops, name, args.cache_size)
+                   for name in ("adhoc", "repository")]
+    print(json.dumps({"benchmark": "statement_cache",
+                      "operations": args.operations,
+                      "cache_size": args.cache_size,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
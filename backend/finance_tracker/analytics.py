@@ -0,0 +1,135 @@
+"""
+Module analytics.
+
+Income and expense summaries answered from the rollup tables.
+
+A period is split into its two partial edge days, read from the raw
+transactions, and the whole days in between, read from monthly rollups
+where full months fit and from daily rollups elsewhere. The cost grows
+with the number of days in the period, not the number of transactions.
+Days and months are UTC, and totals are summed exactly in integer cents.
+"""
+
+from collections import defaultdict
+
+from finance_tracker.models import MICROSECONDS_PER_DAY, day_number, \
+    from_minor_units, month_first_day, month_number, to_timestamp
+from finance_tracker.repository import category_names
+
+
+RAW_TOTALS_INCLUSIVE = (
+    "SELECT type, category_id, SUM(amount) AS total "
+    "FROM transactions WHERE user_id = ? AND date >= ? AND date <= ? "
+    "GROUP BY type, category_id"
+)
+RAW_TOTALS_EXCLUSIVE = (
+    "SELECT type, category_id, SUM(amount) AS total "
+    "FROM transactions WHERE user_id = ? AND date >= ? AND date < ? "
+    "GROUP BY type, category_id"
+)
+DAILY_TOTALS = (
+    "SELECT type, category_id, SUM(total) AS total FROM daily_rollups "
+    "WHERE user_id = ? AND day >= ? AND day < ? "
+    "GROUP BY type, category_id"
+)
+MONTHLY_TOTALS = (
+    "SELECT type, category_id, SUM(total) AS total FROM monthly_rollups "
+    "WHERE user_id = ? AND month >= ? AND month < ? "
+    "GROUP BY type, category_id"
+)
+
+
+def _raw_totals(conn, user_id, low, high, high_inclusive):
+    sql = RAW_TOTALS_INCLUSIVE if high_inclusive else RAW_TOTALS_EXCLUSIVE
+    return conn.execute(sql, (user_id, low, high)).fetchall()
+
+
+def _daily_totals(conn, user_id, first_day, end_day):
+    return conn.execute(DAILY_TOTALS,
+                        (user_id, first_day, end_day)).fetchall()
+
+
+def _monthly_totals(conn, user_id, first_month, end_month):
+    return conn.execute(MONTHLY_TOTALS,
+                        (user_id, first_month, end_month)).fetchall()
+
+
+def _period_rows(conn, user_id, start, end):
+    """
+    Collect (type, category_id, total) rows covering ``start..end``.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transactions.
+        start: timestamp lower bound, inclusive.
+        end: timestamp upper bound, inclusive.
+
+    Returns:
+        list: partial aggregates of every segment of the period
+    """
+    start_day, end_day = day_number(start), day_number(end)
+    if start_day >= end_day:
+        if start > end:
+            return []
+        return _raw_totals(conn, user_id, start, end, True)
+
+    first_day = start_day + 1
+    rows = _raw_totals(conn, user_id, start,
+                       first_day * MICROSECONDS_PER_DAY, False)
+    rows += _raw_totals(conn, user_id, end_day * MICROSECONDS_PER_DAY,
+                        end, True)
+
+    month_start = month_number(first_day)
+    if month_first_day(month_start) != first_day:
+        month_start += 1
+    month_end = month_number(end_day)
+    if month_start < month_end:
+        rows += _daily_totals(conn, user_id, first_day,
+                              month_first_day(month_start))
+        rows += _monthly_totals(conn, user_id, month_start, month_end)
+        rows += _daily_totals(conn, user_id, month_first_day(month_end),
+                              end_day)
+    else:
+        rows += _daily_totals(conn, user_id, first_day, end_day)
+    return rows
+
+
+def summarize(conn, user_id, start, end):
+    """
+    Compute income, expenses and expenses by category for a period.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transactions.
+        start: datetime, inclusive lower bound.
+        end: datetime, inclusive upper bound.
+
+    Returns:
+        dict: totals and expenses grouped by category name
+    """
+    totals = {"income": 0, "expense": 0}
+    by_category = defaultdict(int)
+    for row in _period_rows(conn, user_id, to_timestamp(start),
+                            to_timestamp(end)):
+        if row["total"] is None:
+            continue
+        totals[row["type"]] += row["total"]
+        if row["type"] == "expense":
+            by_category[row["category_id"]] += row["total"]
+
+    by_name = defaultdict(int)
+    if by_category:
+        for id_, name in category_names(conn, by_category).items():
+            by_name[name] += by_category[id_]
+
+    return {
+        "total_income": from_minor_units(totals["income"]),
+        "total_expenses": from_minor_units(totals["expense"]),
+        "net_balance": from_minor_units(totals["income"] - totals["expense"]),
+        "expenses_by_category": [
+            {"name": name, "total": from_minor_units(total)}
+            for name, total in sorted(by_name.items(),
+                                      key=lambda item: item[1],
+                                      reverse=True)
+        ],
+    }
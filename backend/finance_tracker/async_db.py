@@ -0,0 +1,194 @@
+"""
+Module async_db.
+
+Awaitable access to pooled SQLite connections.
+
+sqlite3 calls block, so every statement issued by an async endpoint runs
+on a dedicated database thread pool instead of the event loop. Waiting
+for a free pooled connection happens on the regular worker threads, which
+keeps the database threads available for connections already checked out.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from starlette.concurrency import run_in_threadpool
+
+from finance_tracker.database import POOL_SIZE, get_pool
+
+
+DB_EXECUTOR_WORKERS = int(
+    os.getenv("FINANCE_DB_EXECUTOR_WORKERS", str(POOL_SIZE)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor():
+    """
+    Return the thread pool running database calls, creating it lazily.
+
+    Args:
+
+    Returns:
+        ThreadPoolExecutor: shared database executor
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db")
+    return _executor
+
+
+def shutdown_db_executor():
+    """
+    Stop the database executor after running calls finish.
+
+    Args:
+
+    Returns:
+        None
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class AsyncConnection:
+    """
+    Awaitable facade over a sqlite3 connection.
+
+    Mirrors the subset of the sqlite3 API used by the endpoints; every
+    call is executed on the database executor.
+    """
+
+    def __init__(self, conn, executor=None):
+        """
+        Wrap a connection.
+
+        Args:
+            conn: sqlite3 connection owned by the caller.
+            executor: executor running the calls.
+        """
+        self.conn = conn
+        self._executor = executor or get_db_executor()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run ``func(conn, *args, **kwargs)`` on the database executor.
+
+        Use it to run several statements in a single thread hop.
+
+        Args:
+            func: callable taking the sqlite3 connection first.
+
+        Returns:
+            result of ``func``
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, self.conn, *args, **kwargs))
+
+    async def execute(self, sql, parameters=()):
+        """
+        Execute a statement.
+
+        Args:
+            sql: statement text.
+            parameters: bound values.
+
+        Returns:
+            sqlite3.Cursor: cursor with lastrowid and rowcount set
+        """
+        return await self.run(lambda conn: conn.execute(sql, parameters))
+
+    async def executemany(self, sql, seq_of_parameters):
+        """
+        Execute a statement for every parameter set.
+
+        Args:
+            sql: statement text.
+            seq_of_parameters: sequence of bound values.
+
+        Returns:
+            sqlite3.Cursor: cursor with rowcount set
+        """
+        return await self.run(
+            lambda conn: conn.executemany(sql, seq_of_parameters))
+
+    async def fetchone(self, sql, parameters=()):
+        """
+        Execute a query and return its first row.
+
+        Args:
+            sql: statement text.
+            parameters: bound values.
+
+        Returns:
+            sqlite3.Row or None: first row
+        """
+        return await self.run(
+            lambda conn: conn.execute(sql, parameters).fetchone())
+
+    async def fetchall(self, sql, parameters=()):
+        """
+        Execute a query and return every row.
+
+        Args:
+            sql: statement text.
+            parameters: bound values.
+
+        Returns:
+            list[sqlite3.Row]: result rows
+        """
+        return await self.run(
+            lambda conn: conn.execute(sql, parameters).fetchall())
+
+    async def commit(self):
+        """Commit the current transaction."""
+        await self.run(lambda conn: conn.commit())
+
+    async def rollback(self):
+        """Roll the current transaction back."""
+        await self.run(lambda conn: conn.rollback())
+
+
+@asynccontextmanager
+async def async_connection():
+    """
+    Borrow a pooled connection wrapped in an AsyncConnection.
+
+    Args:
+
+    Returns:
+        AsyncConnection: released to the pool when the block exits
+    """
+    pool = get_pool()
+    conn = await run_in_threadpool(pool.acquire)
+    db = AsyncConnection(conn)
+    try:
+        yield db
+    finally:
+        await db.run(pool.release)
+
+
+async def get_async_db():
+    """
+    Yield an AsyncConnection for one request, as a FastAPI dependency.
+
+    Args:
+
+    Returns:
+        AsyncConnection: connection returned to the pool afterwards
+    """
+    async with async_connection() as db:
+        yield db
@@ -0,0 +1,276 @@
+"""
+Module audit.
+
+Asynchronous, batched writer of the ``audit_log`` table.
+
+Endpoints record the events of a request with one non-blocking put on a
+bounded in-memory queue and return, so recording never holds up the event
+loop. A background thread writes the queued events with one
+``executemany`` per batch, flushing when a batch is full or when its
+oldest event has waited ``FINANCE_AUDIT_FLUSH_INTERVAL`` seconds. When
+writes fall behind and the queue is full, new events are lost: each is
+logged as a warning with its fields and counted, but never reaches
+``audit_log``. Stopping the writer flushes everything still queued.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from prometheus_client import Counter, Gauge
+
+from finance_tracker.database import connect
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_QUEUE_SIZE = int(os.getenv("FINANCE_AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("FINANCE_AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("FINANCE_AUDIT_FLUSH_INTERVAL", "1"))
+
+AUDIT_QUEUE_DEPTH = Gauge(
+    "finance_audit_queue_depth",
+    "Audit events waiting to be written"
+)
+AUDIT_WRITTEN = Counter(
+    "finance_audit_events_written_total",
+    "Audit events written to audit_log"
+)
+AUDIT_DROPPED = Counter(
+    "finance_audit_events_dropped_total",
+    "Audit events lost because the queue was full or a write failed",
+    ["reason"]
+)
+
+INSERT_AUDIT = """
+    INSERT INTO audit_log (user_id, action, table_name, record_id, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+"""
+# Same layout as CURRENT_TIMESTAMP, the column default.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Wakes the writer thread without carrying an event.
+_WAKE = object()
+
+
+class AuditWriter:
+    """Queue audit events and write them in batches on a thread."""
+
+    def __init__(self, database=None, queue_size=AUDIT_QUEUE_SIZE,
+                 batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL):
+        """
+        Configure the writer without starting it.
+
+        Args:
+            database: path of the database file.
+            queue_size: events allowed to wait to be written.
+            batch_size: events written per transaction.
+            flush_interval: seconds an event may wait for a fuller batch.
+        """
+        self.database = database
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Holds one list of events per record call; _depth counts events.
+        self._queue = queue.SimpleQueue()
+        self._depth = 0
+        self._depth_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def depth(self):
+        """Return the number of queued events."""
+        return self._depth
+
+    def record(self, user_id, action, table_name, record_id=None):
+        """
+        Queue an audit event without waiting.
+
+        Args:
+            user_id: user performing the action.
+            action: "create", "update" or "delete".
+            table_name: table of the changed row.
+            record_id: primary key of the changed row.
+
+        Returns:
+            bool: False if the event was dropped because the queue was full
+        """
+        return self.record_many(user_id, action, table_name, [record_id])
+
+    def record_many(self, user_id, action, table_name, record_ids):
+        """
+        Queue the events of one action on many rows with a single put.
+
+        The events are kept or dropped together.
+
+        Args:
+            user_id: user performing the action.
+            action: "create", "update" or "delete".
+            table_name: table of the changed rows.
+            record_ids: primary keys of the changed rows.
+
+        Returns:
+            bool: False if the events were dropped because the queue was
+            full
+        """
+        if not record_ids:
+            return True
+        timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+        events = [(user_id, action, table_name, record_id, timestamp)
+                  for record_id in record_ids]
+        with self._depth_lock:
+            full = self._depth + len(events) > self.queue_size
+            if not full:
+                self._depth += len(events)
+        if full:
+            for event in events:
+                logger.warning("Audit queue full, dropped event: user_id=%s "
+                               "action=%s table=%s record_id=%s at %s",
+                               *event)
+            AUDIT_DROPPED.labels("queue_full").inc(len(events))
+            return False
+        self._queue.put_nowait(events)
+        AUDIT_QUEUE_DEPTH.inc(len(events))
+        return True
+
+    def _take(self, block, timeout=None):
+        events = self._queue.get(block, timeout)
+        if events is not _WAKE:
+            with self._depth_lock:
+                self._depth -= len(events)
+            AUDIT_QUEUE_DEPTH.dec(len(events))
+        return events
+
+    def _collect(self):
+        # Wait for a first event, then gather more until the batch is full
+        # or the first one has waited flush_interval.
+        try:
+            first = self._take(True, self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [] if first is _WAKE else list(first)
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if self._stop.is_set() or remaining <= 0 or not batch:
+                    events = self._take(False)
+                else:
+                    events = self._take(True, remaining)
+            except queue.Empty:
+                break
+            if events is not _WAKE:
+                batch.extend(events)
+        return batch
+
+    def _write(self, batch):
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = connect(self.database)
+                with self._conn:
+                    self._conn.executemany(INSERT_AUDIT, batch)
+            except sqlite3.Error:
+                logger.exception("Writing %d audit events failed",
+                                 len(batch))
+                AUDIT_DROPPED.labels("write_error").inc(len(batch))
+                return
+        AUDIT_WRITTEN.inc(len(batch))
+
+    def _close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def flush(self):
+        """
+        Write every queued event from the calling thread.
+
+        Args:
+
+        Returns:
+            int: number of events taken from the queue
+        """
+        taken = 0
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    events = self._take(False)
+                    if events is not _WAKE:
+                        batch.extend(events)
+            except queue.Empty:
+                pass
+            if not batch:
+                return taken
+            self._write(batch)
+            taken += len(batch)
+
+    def clear(self):
+        """
+        Drop every queued event and close the connection.
+
+        Args:
+
+        Returns:
+            None
+        """
+        try:
+            while True:
+                self._take(False)
+        except queue.Empty:
+            pass
+        self._close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+        self.flush()
+
+    def start(self):
+        """
+        Start the writer thread.
+
+        Args:
+
+        Returns:
+            None
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the writer thread after it wrote every queued event.
+
+        Args:
+
+        Returns:
+            None
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._queue.put_nowait(_WAKE)
+            self._thread.join()
+            self._thread = None
+        else:
+            self.flush()
+        self._close()
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,373 @@
+"""
+Module cache.
+
+Small in-process caches shared by the request handlers of one worker.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+from finance_tracker import repository
+
+
+USER_CACHE_SIZE = int(os.getenv("FINANCE_USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("FINANCE_USER_CACHE_TTL", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("FINANCE_RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("FINANCE_RESPONSE_CACHE_TTL", "30"))
+CATEGORY_CACHE_SIZE = int(os.getenv("FINANCE_CATEGORY_CACHE_SIZE", "1024"))
+CATEGORY_CACHE_TTL = float(os.getenv("FINANCE_CATEGORY_CACHE_TTL", "300"))
+
+CACHE_HITS = Counter("finance_cache_hits_total",
+                     "Lookups answered from an in-process cache", ["cache"])
+CACHE_MISSES = Counter("finance_cache_misses_total",
+                       "Lookups not found in an in-process cache", ["cache"])
+CACHE_EVICTIONS = Counter("finance_cache_evictions_total",
+                          "Entries dropped to respect the cache size",
+                          ["cache"])
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    The TTL bounds how stale an entry can get when another worker changes
+    the underlying row; writers in this worker call ``invalidate``.
+    """
+
+    def __init__(self, name, maxsize, ttl, clock=time.monotonic):
+        """
+        Create an empty cache.
+
+        Args:
+            name: label used for the Prometheus counters.
+            maxsize: maximum number of entries kept.
+            ttl: seconds an entry stays valid.
+            clock: monotonic time source.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of stored entries, expired ones included."""
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Return a fresh cached value.
+
+        Args:
+            key: cache key.
+            default: value returned on a miss.
+
+        Returns:
+            cached value or ``default``
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    CACHE_HITS.labels(self.name).inc()
+                    return value
+                del self._data[key]
+            self.misses += 1
+        CACHE_MISSES.labels(self.name).inc()
+        return default
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entries.
+
+        Args:
+            key: cache key.
+            value: value to store.
+
+        Returns:
+            None
+        """
+        evicted = 0
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            CACHE_EVICTIONS.labels(self.name).inc(evicted)
+
+    def invalidate(self, key):
+        """
+        Drop one entry.
+
+        Args:
+            key: cache key.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters.
+
+        Args:
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class ResponseCache:
+    """
+    Cache of rendered responses invalidated by per-user generations.
+
+    Every write by a user bumps that user's generation, which is part of
+    each key, so entries cached before the write are never served again
+    and simply age out. The TTL bounds staleness caused by writes handled
+    by other workers. ETags digest the rendered body rather than the key,
+    so a revalidation only matches a response that is current.
+    """
+
+    def __init__(self, name, maxsize, ttl):
+        """
+        Create an empty cache.
+
+        Args:
+            name: label used for the Prometheus counters.
+            maxsize: maximum number of responses kept.
+            ttl: seconds a response stays valid.
+        """
+        self._entries = TTLCache(name, maxsize, ttl)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hits(self):
+        """Return the number of responses served from the cache."""
+        return self._entries.hits
+
+    def generation(self, user_id):
+        """
+        Return the current data generation of a user.
+
+        Args:
+            user_id: owner of the data.
+
+        Returns:
+            int: generation number
+        """
+        return self._generations.get(user_id, 0)
+
+    def bump(self, user_id):
+        """
+        Invalidate every cached response of a user.
+
+        Args:
+            user_id: owner of the changed data.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def key(self, user_id, endpoint, params):
+        """
+        Build the cache key of a request.
+
+        Args:
+            user_id: authenticated user.
+            endpoint: name of the endpoint.
+            params: iterable of (name, value) query parameters.
+
+        Returns:
+            tuple: hashable key including the user's generation
+        """
+        return (user_id, endpoint, tuple(sorted(params)),
+                self.generation(user_id))
+
+    @staticmethod
+    def etag(body):
+        """
+        Return the weak ETag of a rendered response body.
+
+        Args:
+            body: encoded response body.
+
+        Returns:
+            str: quoted weak entity tag
+        """
+        return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def get(self, key):
+        """
+        Return a cached response body, headers and ETag.
+
+        Args:
+            key: key built by ``key``.
+
+        Returns:
+            tuple or None: (content, headers, etag) if cached
+        """
+        return self._entries.get(key)
+
+    def set(self, key, content, headers, etag):
+        """
+        Store a response body, its headers and its ETag.
+
+        Args:
+            key: key built by ``key``.
+            content: JSON-compatible body.
+            headers: extra response headers.
+            etag: ETag of the rendered body.
+
+        Returns:
+            None
+        """
+        self._entries.set(key, (content, headers, etag))
+
+    def clear(self):
+        """
+        Drop every response and generation.
+
+        Args:
+
+        Returns:
+            None
+        """
+        self._entries.clear()
+        with self._lock:
+            self._generations.clear()
+
+
+class CategoryCache:
+    """
+    Categories visible to each user, keyed by category id.
+
+    Predefined categories are read once and shared by every user's entry;
+    a user's entry is dropped when that user creates a category. Categories
+    are never deleted, so a cached category is always valid. An id missing
+    from an entry may have been created by another worker, so callers
+    reload the entry before treating the id as unknown.
+    """
+
+    _PREDEFINED = "predefined"
+
+    def __init__(self, name, maxsize, ttl):
+        """
+        Create an empty cache.
+
+        Args:
+            name: label used for the Prometheus counters.
+            maxsize: maximum number of users kept.
+            ttl: seconds an entry stays valid.
+        """
+        self._entries = TTLCache(name, maxsize, ttl)
+
+    @property
+    def hits(self):
+        """Return the number of lookups served from the cache."""
+        return self._entries.hits
+
+    def get(self, user_id):
+        """
+        Return the cached categories of a user.
+
+        Args:
+            user_id: user primary key.
+
+        Returns:
+            dict or None: category dict by id, predefined ones included
+        """
+        return self._entries.get(user_id)
+
+    def load(self, conn, user_id):
+        """
+        Read the categories of a user and cache them.
+
+        Args:
+            conn: active connection with database.
+            user_id: user primary key.
+
+        Returns:
+            dict: category dict by id, predefined ones included
+        """
+        predefined = self._entries.get(self._PREDEFINED)
+        if predefined is None:
+            predefined = [dict(row)
+                          for row in repository.predefined_categories(conn)]
+            self._entries.set(self._PREDEFINED, predefined)
+        rows = predefined + [dict(row) for row in
+                             repository.user_categories(conn, user_id)]
+        categories = {row["id"]: row
+                      for row in sorted(rows, key=lambda row: row["id"])}
+        self._entries.set(user_id, categories)
+        return categories
+
+    def invalidate(self, user_id, predefined=False):
+        """
+        Drop the entry of a user after it created a category.
+
+        Args:
+            user_id: owner of the new category.
+            predefined: the new category is visible to every user.
+
+        Returns:
+            None
+        """
+        if predefined:
+            self._entries.clear()
+        else:
+            self._entries.invalidate(user_id)
+
+    def clear(self):
+        """
+        Drop every entry.
+
+        Args:
+
+        Returns:
+            None
+        """
+        self._entries.clear()
+
+
+user_cache = TTLCache("users", USER_CACHE_SIZE, USER_CACHE_TTL)
+response_cache = ResponseCache("responses", RESPONSE_CACHE_SIZE,
+                               RESPONSE_CACHE_TTL)
+category_cache = CategoryCache("categories", CATEGORY_CACHE_SIZE,
+                               CATEGORY_CACHE_TTL)
+
+
+def invalidate_user(username):
+    """
+    Forget the cached row of a user after it changed.
+
+    Args:
+        username: token subject of the user.
+
+    Returns:
+        None
+    """
+    user_cache.invalidate(username)
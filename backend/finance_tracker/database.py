@@ -1,7 +1,21 @@
 """Module database."""
 
+import logging
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+
+from prometheus_client import Counter, Histogram
+
+from finance_tracker.migrations import migrate
+
+logger = logging.getLogger(__name__)
 
 
 def adapt_datetime(dt):
@@ -20,7 +34,274 @@ def adapt_datetime(dt):
 sqlite3.register_adapter(datetime, adapt_datetime)
 
 
-DATABASE_NAME = "finance.db"
+DATABASE_NAME = os.getenv("FINANCE_DB_PATH", "finance.db")
+
+POOL_SIZE = int(os.getenv("FINANCE_DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("FINANCE_DB_POOL_TIMEOUT", "5.0"))
+POOL_PRE_PING = os.getenv("FINANCE_DB_POOL_PRE_PING", "1") == "1"
+STATEMENT_CACHE_SIZE = int(os.getenv("FINANCE_DB_STATEMENT_CACHE", "256"))
+INSTRUMENT_QUERIES = os.getenv("FINANCE_DB_INSTRUMENT", "1") == "1"
+SLOW_QUERY_MS = float(os.getenv("FINANCE_DB_SLOW_QUERY_MS", "100"))
+
+CHECKPOINT_INTERVAL = float(
+    os.getenv("FINANCE_DB_CHECKPOINT_INTERVAL", "30"))
+CHECKPOINT_MODE = os.getenv("FINANCE_DB_CHECKPOINT_MODE", "PASSIVE")
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+
+def _choice(value, allowed, name):
+    value = str(value).upper()
+    if value not in allowed:
+        raise ValueError(f"{name} must be one of {', '.join(allowed)}")
+    return value
+
+
+class StorageProfile:
+    """
+    PRAGMA settings applied to every SQLite connection.
+
+    Defaults come from ``FINANCE_DB_*`` environment variables and favour
+    concurrent readers: WAL journal, NORMAL sync, memory-mapped I/O.
+    """
+
+    def __init__(self,
+                 journal_mode=None,
+                 synchronous=None,
+                 mmap_size=None,
+                 cache_size=None,
+                 temp_store=None,
+                 busy_timeout=None,
+                 wal_autocheckpoint=None):
+        """
+        Validate and store the profile.
+
+        Args:
+            journal_mode: SQLite journal mode, WAL by default.
+            synchronous: fsync level, NORMAL by default.
+            mmap_size: bytes of the file mapped into memory.
+            cache_size: page cache, negative values are KiB.
+            temp_store: where temporary tables and indexes live.
+            busy_timeout: milliseconds to wait on a locked database.
+            wal_autocheckpoint: WAL pages that trigger a checkpoint.
+
+        Raises:
+            ValueError: if a value is not accepted by SQLite.
+        """
+        env = os.getenv
+        self.journal_mode = _choice(
+            journal_mode or env("FINANCE_DB_JOURNAL_MODE", "WAL"),
+            JOURNAL_MODES, "journal_mode")
+        self.synchronous = _choice(
+            synchronous or env("FINANCE_DB_SYNCHRONOUS", "NORMAL"),
+            SYNCHRONOUS_LEVELS, "synchronous")
+        self.temp_store = _choice(
+            temp_store or env("FINANCE_DB_TEMP_STORE", "MEMORY"),
+            TEMP_STORES, "temp_store")
+        self.mmap_size = int(
+            mmap_size if mmap_size is not None
+            else env("FINANCE_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+        self.cache_size = int(
+            cache_size if cache_size is not None
+            else env("FINANCE_DB_CACHE_SIZE", "-16000"))
+        self.busy_timeout = int(
+            busy_timeout if busy_timeout is not None
+            else env("FINANCE_DB_BUSY_TIMEOUT", "5000"))
+        self.wal_autocheckpoint = int(
+            wal_autocheckpoint if wal_autocheckpoint is not None
+            else env("FINANCE_DB_WAL_AUTOCHECKPOINT", "1000"))
+
+    def pragmas(self):
+        """
+        Return the PRAGMA statements of the profile.
+
+        Args:
+
+        Returns:
+            list[str]: statements in the order they must run
+        """
+        # busy_timeout goes first so the journal switch can wait for locks.
+        # Values are validated in __init__, PRAGMAs take no parameters.
+        return [
+            f"PRAGMA busy_timeout = {self.busy_timeout}",
+            f"PRAGMA journal_mode = {self.journal_mode}",
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA mmap_size = {self.mmap_size}",
+            f"PRAGMA cache_size = {self.cache_size}",
+            f"PRAGMA temp_store = {self.temp_store}",
+            f"PRAGMA wal_autocheckpoint = {self.wal_autocheckpoint}",
+            "PRAGMA foreign_keys = ON",
+        ]
+
+    def apply(self, conn):
+        """
+        Run the profile PRAGMAs on a connection.
+
+        Args:
+            conn: open connection with database.
+
+        Returns:
+            None
+        """
+        for pragma in self.pragmas():
+            conn.execute(pragma)
+
+
+PROFILE = StorageProfile()
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes free in time."""
+
+
+DB_QUERY_SECONDS = Histogram(
+    "finance_db_query_duration_seconds",
+    "Time spent executing a SQL statement",
+    ["statement"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+             0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+DB_ROWS_RETURNED = Counter(
+    "finance_db_rows_returned_total",
+    "Rows fetched from a SQL statement",
+    ["statement"]
+)
+DB_SLOW_QUERIES = Counter(
+    "finance_db_slow_queries_total",
+    "SQL statements slower than FINANCE_DB_SLOW_QUERY_MS",
+    ["statement"]
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+@lru_cache(maxsize=1024)
+def statement_template(sql):
+    """
+    Normalize a SQL statement into a low-cardinality metric label.
+
+    Whitespace is collapsed and placeholder lists such as ``IN (?, ?, ?)``
+    become ``IN (?+)``.
+
+    Args:
+        sql: statement text.
+
+    Returns:
+        str: normalized statement
+    """
+    template = _WHITESPACE.sub(" ", sql).strip()
+    return _PLACEHOLDER_LIST.sub("?+", template)
+
+
+def _log_slow_query(conn, sql, parameters, elapsed, template):
+    DB_SLOW_QUERIES.labels(template).inc()
+    plan = ""
+    if parameters is not None and template.upper().startswith(_EXPLAINABLE):
+        try:
+            # A plain cursor keeps the plan lookup out of the metrics.
+            rows = sqlite3.Cursor(conn).execute(
+                "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+            plan = "\n".join(f"  {row[3]}" for row in rows)
+        except sqlite3.Error:
+            plan = "  (plan unavailable)"
+    logger.warning("Slow query (%.1f ms): %s\n%s",
+                   elapsed * 1000, template, plan)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor recording latency and fetched rows per statement template."""
+
+    _template = None
+
+    def _observe(self, sql, parameters, start):
+        elapsed = time.perf_counter() - start
+        self._template = statement_template(sql)
+        DB_QUERY_SECONDS.labels(self._template).observe(elapsed)
+        if 0 <= SLOW_QUERY_MS <= elapsed * 1000:
+            _log_slow_query(self.connection, sql, parameters, elapsed,
+                            self._template)
+
+    def _count(self, rows):
+        if self._template is not None and rows:
+            DB_ROWS_RETURNED.labels(self._template).inc(rows)
+
+    def execute(self, sql, parameters=()):
+        """Execute a statement and record its latency."""
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._observe(sql, parameters, start)
+
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for every parameter set and record it."""
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._observe(sql, None, start)
+
+    def fetchone(self):
+        """Fetch one row and count it."""
+        row = super().fetchone()
+        self._count(0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        """Fetch a batch of rows and count them."""
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        """Fetch the remaining rows and count them."""
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are InstrumentedCursor instances."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        """Return a new instrumented cursor."""
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        """Execute a statement on a new instrumented cursor."""
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        """Execute a statement for every parameter set."""
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(database=None, profile=None):
+    """
+    Open a configured connection with database.
+
+    Args:
+        database: path of the database file, DATABASE_NAME by default.
+        profile: StorageProfile to apply, PROFILE by default.
+
+    Returns:
+        sqlite3.Connection: connection with row factory and PRAGMAs applied
+    """
+    conn = sqlite3.connect(
+        database or DATABASE_NAME,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=(InstrumentedConnection if INSTRUMENT_QUERIES
+                 else sqlite3.Connection),
+    )
+    conn.row_factory = sqlite3.Row
+    (profile or PROFILE).apply(conn)
+    return conn
 
 
 def get_db_connection():
@@ -32,14 +313,290 @@ def get_db_connection():
     Returns:
         sqlite3.Connection: open connection of the database
     """
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return connect()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections.
+
+    Connections are opened lazily up to ``size`` and handed out with
+    checkout/return semantics, so PRAGMAs and the per-connection
+    statement cache survive between requests.
+    """
+
+    def __init__(self, database=None, size=POOL_SIZE,
+                 timeout=POOL_TIMEOUT, pre_ping=POOL_PRE_PING):
+        """
+        Create an empty pool.
+
+        Args:
+            database: path of the database file.
+            size: maximum number of open connections.
+            timeout: seconds to wait for a free connection.
+            pre_ping: check connection health on every checkout.
+        """
+        self.database = database or DATABASE_NAME
+        self.size = size
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    @property
+    def opened(self):
+        """Return the number of connections currently owned by the pool."""
+        return self._opened
+
+    def _open(self):
+        with self._lock:
+            if self._opened >= self.size:
+                return None
+            self._opened += 1
+        try:
+            return connect(self.database)
+        except sqlite3.Error:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """
+        Check out a connection from the pool.
+
+        Args:
+
+        Returns:
+            sqlite3.Connection: healthy pooled connection
+
+        Raises:
+            PoolTimeoutError: if the pool stays exhausted for ``timeout``.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+                if conn is None:
+                    try:
+                        conn = self._idle.get(timeout=self.timeout)
+                    except queue.Empty:
+                        raise PoolTimeoutError(
+                            f"No database connection available "
+                            f"within {self.timeout}s"
+                        )
+                else:
+                    return conn
+            if not self.pre_ping or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn):
+        """
+        Return a connection to the pool.
+
+        Uncommitted work is rolled back so the next borrower starts clean.
+
+        Args:
+            conn: connection obtained from ``acquire``.
+
+        Returns:
+            None
+        """
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """
+        Close every idle connection and refuse further checkouts.
+
+        Args:
+
+        Returns:
+            None
+        """
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the process-wide connection pool, creating it on first use.
+
+    Args:
+
+    Returns:
+        ConnectionPool: shared pool bound to DATABASE_NAME
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_NAME)
+    return _pool
+
+
+def close_pool():
+    """
+    Close the process-wide connection pool.
+
+    Args:
+
+    Returns:
+        None
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_db():
+    """
+    Yield a pooled connection for one request, as a FastAPI dependency.
+
+    Args:
+
+    Returns:
+        sqlite3.Connection: connection returned to the pool afterwards
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+class WalCheckpointer:
+    """
+    Background thread checkpointing the WAL on a fixed interval.
+
+    Keeps the write-ahead log short so readers do not have to scan a long
+    WAL and the file does not grow between automatic checkpoints.
+    """
+
+    def __init__(self, database=None, interval=CHECKPOINT_INTERVAL,
+                 mode=CHECKPOINT_MODE):
+        """
+        Configure the checkpointer without starting it.
+
+        Args:
+            database: path of the database file.
+            interval: seconds between checkpoints.
+            mode: PASSIVE, FULL, RESTART or TRUNCATE.
+        """
+        self.database = database or DATABASE_NAME
+        self.interval = interval
+        self.mode = _choice(mode, CHECKPOINT_MODES, "checkpoint mode")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def checkpoint(self):
+        """
+        Run one checkpoint on a dedicated connection.
+
+        Args:
+
+        Returns:
+            tuple: (busy, wal pages, checkpointed pages) reported by SQLite
+        """
+        conn = connect(self.database)
+        try:
+            row = conn.execute(
+                f"PRAGMA wal_checkpoint({self.mode})"
+            ).fetchone()
+            return tuple(row)
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except sqlite3.Error:
+                logger.exception("WAL checkpoint failed")
+
+    def start(self):
+        """
+        Start the checkpoint thread.
+
+        Args:
+
+        Returns:
+            None
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="wal-checkpointer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the checkpoint thread and wait for it to exit.
+
+        Args:
+
+        Returns:
+            None
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
 
 
 def setup_database(conn=None):
     """
-    Create the necessary tables in the database.
+    Bring the database schema up to the latest version.
+
+    Pending migrations are applied in order; existing data is kept and an
+    up-to-date database costs a single query.
 
     Args:
         conn: active connection with database.
@@ -48,125 +605,14 @@ def setup_database(conn=None):
         None
     """
     if conn is None:
-        conn = sqlite3.connect(DATABASE_NAME)
+        conn = connect()
         close_conn = True
     else:
         close_conn = False
 
-    cursor = conn.cursor()
-
     try:
-        cursor.execute("PRAGMA foreign_keys = ON")
-
-        cursor.execute("DROP TABLE IF EXISTS audit_log")
-        cursor.execute("DROP TABLE IF EXISTS budgets")
-        cursor.execute("DROP TABLE IF EXISTS transactions")
-        cursor.execute("DROP TABLE IF EXISTS categories")
-        cursor.execute("DROP TABLE IF EXISTS users")
-
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL,
-                email TEXT NOT NULL UNIQUE,
-                is_locked BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        cursor.execute("""
-            CREATE TABLE categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL CHECK(type IN ('income', 'expense')),
-                is_predefined BOOLEAN DEFAULT FALSE,
-                user_id INTEGER,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                UNIQUE(name, user_id)
-            )
-        """)
-
-        # Create transactions table
-        cursor.execute("""
-            CREATE TABLE transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                category_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT,
-                date TIMESTAMP NOT NULL,
-                type TEXT NOT NULL CHECK(type IN ('income', 'expense')),
-                is_recurring BOOLEAN DEFAULT FALSE,
-                recurrence_pattern TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (category_id) REFERENCES categories(id)
-            )
-        """)
-
-        # Create budgets table
-        cursor.execute("""
-            CREATE TABLE budgets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                category_id INTEGER,
-                target_amount REAL NOT NULL,
-                current_amount REAL DEFAULT 0.0,
-                start_date TIMESTAMP NOT NULL,
-                end_date TIMESTAMP NOT NULL,
-                name TEXT,
-                is_active BOOLEAN DEFAULT TRUE,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (category_id) REFERENCES categories(id)
-            )
-        """)
-
-        # Create audit_log table
-        cursor.execute("""
-            CREATE TABLE audit_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT NOT NULL,
-                table_name TEXT NOT NULL,
-                record_id INTEGER,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        """)
-
-        # Create indexes
-        cursor.execute("CREATE INDEX idx_transactions_user_date "
-                       "ON transactions(user_id, date)")
-        cursor.execute("CREATE INDEX idx_transactions_category_type "
-                       "ON transactions(category_id, type)")
-        cursor.execute("CREATE INDEX idx_budgets_user_active "
-                       "ON budgets(user_id, is_active)")
-
-        # Insert predefined categories
-        predefined_categories = [
-            ("Salary", "income", True),
-            ("Freelance", "income", True),
-            ("Investments", "income", True),
-            ("Other Income", "income", True),
-            ("Food", "expense", True),
-            ("Housing", "expense", True),
-            ("Transportation", "expense", True),
-            ("Entertainment", "expense", True),
-            ("Healthcare", "expense", True),
-            ("Other Expenses", "expense", True),
-        ]
-        cursor.executemany(
-            "INSERT INTO categories (name, type, is_predefined) "
-            "VALUES (?, ?, ?)",
-            predefined_categories
-        )
-
-        conn.commit()
-    except sqlite3.Error as e:
-        conn.rollback()
-        raise e
+        conn.execute("PRAGMA foreign_keys = ON")
+        migrate(conn)
     finally:
         if close_conn:
             conn.close()
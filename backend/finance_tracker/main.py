@@ -3,18 +3,27 @@
 FastAPI REST endpoints for managing user transactions.
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import timedelta, datetime, timezone
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 from fastapi import Query
 import sqlite3
-import bcrypt
 import secrets
+import base64
+import csv
+import io
+import json
+import math
 from jose import JWTError, jwt
 from finance_tracker.models import Transaction
 from finance_tracker.models import Budget
 from finance_tracker.models import BudgetCreate
+from finance_tracker.models import BudgetProgress
 from finance_tracker.models import TransactionUpdate
 from finance_tracker.models import TransactionCreate
 from finance_tracker.models import CategoryCreate
@@ -23,86 +32,174 @@ from finance_tracker.models import User
 from finance_tracker.models import Category
 from finance_tracker.models import Token
 from finance_tracker.models import TokenData
-from finance_tracker.database import setup_database, get_db_connection
+from finance_tracker.models import BulkImportResult
+from finance_tracker.models import TransactionBatch, TransactionBatchUpdate
+from finance_tracker.models import BatchDeleteResult
+from finance_tracker.models import to_timestamp, transaction_from_storage
+from finance_tracker.models import transaction_to_storage
+from finance_tracker.models import budget_from_storage, from_minor_units
+from pydantic import TypeAdapter, ValidationError
+from finance_tracker.database import setup_database, close_pool
+from finance_tracker.database import get_pool
+from finance_tracker.async_db import AsyncConnection, get_async_db
+from finance_tracker.async_db import async_connection, shutdown_db_executor
+from finance_tracker.database import PoolTimeoutError, WalCheckpointer
+from finance_tracker.database import PROFILE, CHECKPOINT_INTERVAL
+from finance_tracker.security import password_hasher, PasswordQueueFullError
+from finance_tracker.cache import user_cache, invalidate_user
+from finance_tracker.cache import response_cache, category_cache
+from finance_tracker.analytics import summarize
+from finance_tracker.audit import audit_writer
+from finance_tracker.recurrence import RecurrenceScheduler, parse_pattern
+from finance_tracker.recurrence import RECURRENCE_INTERVAL
+from finance_tracker import repository
+from finance_tracker.repository import TRANSACTION_FIELDS
+from finance_tracker.metrics import PrometheusMiddleware
 from prometheus_client import make_asgi_app, Counter
-import sentry_sdk
-from sentry_sdk.integrations.fastapi import FastApiIntegration
-from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+from finance_tracker.observability import init_sentry
 
 
-sentry_sdk.init(
-    dsn="https://examplePublicKey@o0.ingest.sentry.io/0",
-    integrations=[
-        FastApiIntegration(),
-        SqlalchemyIntegration(),
-    ],
-    traces_sample_rate=1.0,
-    environment="development"
-)
+init_sentry()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manage resources shared by every request of the worker.
+
+    Args:
+        app: FastAPI application
+
+    Returns:
+        None
+    """
+    setup_database()
+    checkpointer = None
+    if PROFILE.journal_mode == "WAL" and CHECKPOINT_INTERVAL > 0:
+        checkpointer = WalCheckpointer()
+        checkpointer.start()
+    scheduler = None
+    if RECURRENCE_INTERVAL > 0:
+        scheduler = RecurrenceScheduler()
+        scheduler.start()
+    audit_writer.start()
+    yield
+    if scheduler is not None:
+        scheduler.stop()
+    audit_writer.stop()
+    if checkpointer is not None:
+        checkpointer.stop()
+    password_hasher.shutdown()
+    shutdown_db_executor()
+    close_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware)
 metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
 
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP Requests')
 
+DbConnection = Annotated[AsyncConnection, Depends(get_async_db)]
 
-@app.get("/trigger-error")
-async def trigger_error():
-    1 / 0
-    return {"message": "This code never execute"}
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """
+    Answer 503 when every pooled database connection is busy.
 
-@app.get("/")
-async def root():
+    Args:
+        request: incoming request
+        exc: raised pool timeout
+
+    Returns:
+        JSONResponse: service unavailable response
     """
-    Root settings.
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"detail": "Database is busy, retry later"})
+
+
+@app.exception_handler(PasswordQueueFullError)
+async def password_queue_full_handler(request: Request,
+                                      exc: PasswordQueueFullError):
+    """
+    Answer 503 when the password worker pool is saturated.
 
     Args:
-        None
+        request: incoming request
+        exc: raised queue overflow
 
     Returns:
-        {"message": "Hello World"}
+        JSONResponse: service unavailable response
     """
-    REQUEST_COUNT.inc()
-    return {"message": "Hello World"}
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"detail": "Too many login attempts, "
+                                           "retry later"},
+                        headers={"Retry-After": "1"})
 
-setup_database()
 
+def _json_float(value):
+    """
+    Encode a float for JSON, spelling out infinities and NaN.
 
-SECRET_KEY = secrets.token_hex(32)
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    Args:
+        value: float
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+    Returns:
+        float or str: the value, or its name when it is not finite
+    """
+    return value if math.isfinite(value) else str(value)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+@app.exception_handler(RequestValidationError)
+async def request_validation_handler(request: Request,
+                                     exc: RequestValidationError):
     """
-    Check whether a simple password matches the specified hash.
+    Answer 422 with the validation errors of a request.
+
+    The errors echo the rejected input, which may be a non-finite float
+    that strict JSON cannot carry.
 
     Args:
-        plain_password (str): the password is in clear text.
-        hashed_password (str): hash of the password (BCrypt).
+        request: incoming request
+        exc: raised validation error
 
     Returns:
-        bool: True if the password is correct, otherwise False
+        JSONResponse: unprocessable entity response
     """
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": jsonable_encoder(
+            exc.errors(), custom_encoder={float: _json_float})})
+
 
+@app.get("/trigger-error")
+async def trigger_error():
+    1 / 0
+    return {"message": "This code never execute"}
 
-def get_password_hash(password: str) -> str:
+
+@app.get("/")
+async def root():
     """
-    Generate hash with the use of bcrypt library.
+    Root settings.
 
     Args:
-        password (str): simple password text.
+        None
 
     Returns:
-        str: encrypted value
+        {"message": "Hello World"}
     """
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    REQUEST_COUNT.inc()
+    return {"message": "Hello World"}
+
+
+SECRET_KEY = secrets.token_hex(32)
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -130,11 +227,14 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     """
     Find the current user using token.
 
+    Users are served from the in-process user cache; the database is only
+    queried on a miss.
+
     Args:
         token: encrypted value
 
     Returns:
-        str: current user
+        dict: current user
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -150,35 +250,37 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     except JWTError:
         raise credentials_exception
 
-    conn = get_db_connection()
-    user = conn.execute("SELECT * FROM users WHERE username = ?",
-                        (token_data.username,)).fetchone()
-    conn.close()
-
+    user = user_cache.get(token_data.username)
     if user is None:
-        raise credentials_exception
+        async with async_connection() as db:
+            row = await db.run(repository.get_user_by_username,
+                               token_data.username)
+        if row is None:
+            raise credentials_exception
+        user = dict(row)
+        user_cache.set(token_data.username, user)
     return user
 
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(
-        form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+        form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+        db: DbConnection):
     """
     Give access token for the user.
 
     Args:
         form_data
+        db: pooled database connection
 
     Returns:
         access_token
         token_type: bearer
     """
-    conn = get_db_connection()
-    user = conn.execute("SELECT * FROM users WHERE username = ?",
-                        (form_data.username,)).fetchone()
-    conn.close()
+    user = await db.run(repository.get_user_by_username, form_data.username)
 
-    if not user or not verify_password(form_data.password, user["password"]):
+    if not user or not await password_hasher.verify(form_data.password,
+                                                    user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -193,46 +295,75 @@ async def login_for_access_token(
 
 
 @app.post("/register", response_model=User)
-async def register_user(user: UserCreate):
+async def register_user(user: UserCreate, db: DbConnection):
     """
     User's registration process.
 
     Args:
         user
+        db: pooled database connection
 
     Returns:
         None
     """
-    conn = get_db_connection()
     try:
-        hashed_password = get_password_hash(user.password)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
-            (user.username, hashed_password, user.email)
-        )
-        user_id = cursor.lastrowid
-        conn.commit()
-
-        new_user = conn.execute(
-            "SELECT id, username, email, is_locked,"
-            "created_at FROM users WHERE id = ?",
-            (user_id,)
-        ).fetchone()
-
-        user_dict = dict(new_user)
-        return user_dict
+        hashed_password = await password_hasher.hash(user.password)
+        new_user = await db.run(repository.insert_user, user.username,
+                                hashed_password, user.email)
+        await db.commit()
+        invalidate_user(user.username)
+        audit_writer.record(new_user["id"], "create", "users",
+                            new_user["id"])
+        return dict(new_user)
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400,
                             detail="Username or email already exists")
-    finally:
-        conn.close()
+
+
+async def _categories(db, user_id, required=()):
+    """
+    Return the categories a user may see and assign.
+
+    Served from the category cache; an entry lacking one of ``required``
+    is reloaded once, since another worker may have just created it.
+
+    Args:
+        db: pooled database connection
+        user_id: user primary key
+        required: category ids the caller is about to check
+
+    Returns:
+        dict: category dict by id
+    """
+    categories = category_cache.get(user_id)
+    if categories is None or not categories.keys() >= set(required):
+        categories = await db.run(category_cache.load, user_id)
+    return categories
+
+
+def _check_pattern(pattern):
+    """
+    Reject a recurrence pattern the scheduler could not expand.
+
+    Args:
+        pattern: recurrence_pattern of a request or None
+
+    Returns:
+        None
+    """
+    if pattern is None:
+        return
+    try:
+        parse_pattern(pattern)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @app.post("/transactions/", response_model=Transaction)
 async def create_transaction(
         transaction: TransactionCreate,
-        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
 ):
     """
     Create transaction process.
@@ -249,54 +380,232 @@ async def create_transaction(
             status_code=400,
             detail="Transaction type must be either 'income' or 'expense'"
         )
+    _check_pattern(transaction.recurrence_pattern)
+    categories = await _categories(db, current_user["id"],
+                                   [transaction.category_id])
+    if transaction.category_id not in categories:
+        raise HTTPException(status_code=400, detail="Invalid category_id")
 
-    conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO transactions
-            (user_id, category_id, amount, description, date,
-            type, is_recurring, recurrence_pattern)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                current_user["id"],
-                transaction.category_id,
-                transaction.amount,
-                transaction.description,
-                transaction.date,
-                transaction.type.lower(),
-                transaction.is_recurring,
-                transaction.recurrence_pattern
-            )
-        )
-        transaction_id = cursor.lastrowid
-        conn.commit()
-
-        new_transaction = conn.execute(
-            """SELECT id, user_id, category_id, amount,
-            description, date, type,
-                  is_recurring, recurrence_pattern, created_at
-               FROM transactions WHERE id = ?""",
-            (transaction_id,)
-        ).fetchone()
-
-        if not new_transaction:
-            raise HTTPException(status_code=400,
-                                detail="Transaction not found after creation")
-
-        return dict(new_transaction)
+        new_transaction = await db.run(repository.insert_transaction,
+                                       current_user["id"], transaction)
+        await db.commit()
+        response_cache.bump(current_user["id"])
+        audit_writer.record(current_user["id"], "create", "transactions",
+                            new_transaction["id"])
+        return transaction_from_storage(new_transaction)
 
     except sqlite3.IntegrityError as e:
         if "FOREIGN KEY constraint failed" in str(e):
             raise HTTPException(status_code=400, detail="Invalid category_id")
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        conn.close()
 
 
-@app.get("/transactions/", response_model=list[Transaction])
-async def get_transactions(
+def _not_modified(request, etag):
+    """
+    Answer 304 when the client already holds the body of an ETag.
+
+    Args:
+        request: incoming request
+        etag: ETag of the current body
+
+    Returns:
+        Response or None: 304 response if If-None-Match lists the ETag
+    """
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={"ETag": etag})
+    return None
+
+
+def _cache_lookup(request, user_id, endpoint):
+    """
+    Look a read request up in the response cache.
+
+    Only a fresh entry can answer 304, so a revalidation never confirms a
+    body that has expired or been invalidated.
+
+    Args:
+        request: incoming request
+        user_id: authenticated user
+        endpoint: name of the cached endpoint
+
+    Returns:
+        tuple: cache key and a ready response or None
+    """
+    key = response_cache.key(user_id, endpoint,
+                             request.query_params.multi_items())
+    cached = response_cache.get(key)
+    if cached is None:
+        return key, None
+    content, headers, etag = cached
+    return key, _not_modified(request, etag) or JSONResponse(
+        content=content, headers={**headers, "ETag": etag})
+
+
+def _cache_store(request, key, content, headers=None):
+    """
+    Remember a rendered body and build its response.
+
+    Args:
+        request: incoming request
+        key: key from _cache_lookup
+        content: JSON-compatible body
+        headers: extra response headers
+
+    Returns:
+        Response: 304 response or JSONResponse carrying the ETag
+    """
+    headers = headers or {}
+    response = JSONResponse(content=content, headers=headers)
+    etag = response_cache.etag(response.body)
+    response_cache.set(key, content, headers, etag)
+    response.headers["ETag"] = etag
+    return _not_modified(request, etag) or response
+
+
+TRANSACTION_LIST = TypeAdapter(list[Transaction])
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _transaction_filters(start_date, end_date, category_id, type_):
+    """
+    Build the filters shared by the transaction listing endpoints.
+
+    Args:
+        start_date: Optional[datetime]
+        end_date: Optional[datetime]
+        category_id: comma-separated category IDs or None
+        type_: Optional[str]
+
+    Returns:
+        dict: keyword arguments of repository.query_transactions
+    """
+    filters = {
+        "start": to_timestamp(start_date) if start_date else None,
+        "end": to_timestamp(end_date) if end_date else None,
+        "type_": type_.lower() if type_ else None,
+    }
+    if category_id:
+        try:
+            filters["category_ids"] = [int(id.strip())
+                                       for id in category_id.split(",")]
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="category_id must be comma-separated integers"
+            )
+    return filters
+
+
+def _encode_cursor(row):
+    """
+    Build the opaque cursor pointing after a transaction row.
+
+    Args:
+        row: last transaction of a page
+
+    Returns:
+        str: urlsafe base64 cursor
+    """
+    raw = json.dumps([row["date"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor):
+    """
+    Read the (date, id) position stored in a cursor.
+
+    Args:
+        cursor: value of a previous X-Next-Cursor header
+
+    Returns:
+        tuple: date and id of the last row already returned
+    """
+    try:
+        date, id_ = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        date, id_ = int(date), int(id_)
+    except (ValueError, TypeError, OverflowError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Out-of-range values would only fail later, when SQLite binds them.
+    if not (repository.MIN_DATE <= date <= repository.MAX_DATE
+            and 0 <= id_ <= repository.MAX_ID):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return date, id_
+
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _export_record(row):
+    """
+    Convert a stored transaction row to exported values.
+
+    Args:
+        row: transaction row
+
+    Returns:
+        dict: API values with the date in ISO 8601
+    """
+    record = transaction_from_storage(row)
+    record["date"] = record["date"].isoformat()
+    return record
+
+
+def _stream_transactions(user_id, filters, format_):
+    """
+    Yield exported transactions in keyset-paginated batches.
+
+    A pooled connection is borrowed only while a batch is read and is
+    returned before the batch is sent, so slow downloads neither hold pool
+    connections nor keep a read transaction open against checkpoints.
+    Batches are read from successive snapshots; the (date, id) keyset
+    still yields every row at most once.
+
+    Args:
+        user_id: owner of the transactions
+        filters: keyword arguments from _transaction_filters
+        format_: "csv" or "ndjson"
+
+    Returns:
+        Iterator[str]: chunks of the export body
+    """
+    if format_ == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(TRANSACTION_FIELDS)
+        yield buffer.getvalue()
+    after = None
+    while True:
+        with get_pool().connection() as conn:
+            rows = repository.list_transactions(
+                conn, user_id, after=after, limit=EXPORT_BATCH_SIZE,
+                **filters)
+        if not rows:
+            break
+        after = (rows[-1]["date"], rows[-1]["id"])
+        records = [_export_record(row) for row in rows]
+        if format_ == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                [record[field] for field in TRANSACTION_FIELDS]
+                for record in records)
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(record) + "\n" for record in records)
+        if len(rows) < EXPORT_BATCH_SIZE:
+            break
+
+
+@app.get("/transactions/export")
+async def export_transactions(
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        format: Literal["csv", "ndjson"] = "csv",
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         category_id: str =
@@ -304,65 +613,230 @@ async def get_transactions(
         type_: Optional[str] = None
 ):
     """
-    Get transaction process.
+    Stream every matching transaction as CSV or NDJSON.
+
+    Rows are read in keyset pages of EXPORT_BATCH_SIZE, so memory use and
+    pool occupancy do not depend on the number of exported transactions
+    or on the speed of the client.
 
     Args:
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        format: Literal["csv", "ndjson"] = "csv"
         start_date: Optional[datetime] = None
         end_date: Optional[datetime] = None
         category_id: str = Query
         type_: Optional[str] = None
 
     Returns:
-        None
+        StreamingResponse: export body
+    """
+    filters = _transaction_filters(start_date, end_date, category_id, type_)
+    return StreamingResponse(
+        _stream_transactions(current_user["id"], filters, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition":
+                 f'attachment; filename="transactions.{format}"'}
+    )
+
+
+BULK_CHUNK_SIZE = 1000
+
+
+def _parse_bulk_rows(body, content_type):
+    """
+    Decode a bulk import payload into raw row dicts.
+
+    Args:
+        body: raw payload bytes
+        content_type: media type of the payload
+
+    Returns:
+        list[dict]: rows in payload order
     """
-    conn = get_db_connection()
     try:
-        query = """
-        SELECT
-            id, user_id, category_id, amount, description,
-            date, type, is_recurring, recurrence_pattern, created_at
-        FROM transactions
-        WHERE user_id = ?
-        """
-        params = [current_user["id"]]
-
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date.isoformat())
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date.isoformat())
-
-        if category_id:
-            try:
-                category_ids = [int(id.strip())
-                                for id in category_id.split(",")]
-                placeholders = ','.join(['?'] * len(category_ids))
-                query += f" AND category_id IN ({placeholders})"
-                params.extend(category_ids)
-            except ValueError:
-                raise HTTPException(
-                    status_code=400,
-                    detail="category_id must be comma-separated integers"
-                )
-
-        if type_:
-            query += " AND type = ?"
-            params.append(type_.lower())
-
-        query += " ORDER BY date DESC"
-
-        transactions = conn.execute(query, params).fetchall()
-        return [dict(txn) for txn in transactions]
-    finally:
-        conn.close()
+        text = body.decode("utf-8-sig")
+        if content_type == "text/csv":
+            # Empty CSV cells mean "not provided", as in the JSON formats.
+            return [{key: value for key, value in row.items() if value != ""}
+                    for row in csv.DictReader(io.StringIO(text))]
+        if content_type == "application/x-ndjson":
+            rows = [json.loads(line) for line in text.splitlines()
+                    if line.strip()]
+        else:
+            rows = json.loads(text)
+    except (ValueError, csv.Error):
+        raise HTTPException(status_code=400, detail="Malformed payload")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400,
+                            detail="Expected a list of transactions")
+    return rows
+
+
+@app.post("/transactions/bulk", response_model=BulkImportResult)
+async def import_transactions(
+        request: Request,
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
+):
+    """
+    Import many transactions in one database transaction.
+
+    Accepts a JSON array, NDJSON or CSV body, or a multipart upload with a
+    ``file`` field. Valid rows are written with batched executemany calls;
+    invalid rows are skipped and reported by position.
+
+    Args:
+        request: Request
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
+
+    Returns:
+        dict: number of inserted rows and per-row errors
+    """
+    content_type = request.headers.get("content-type", "application/json")
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400,
+                                detail="Missing file upload")
+        body = await upload.read()
+        if upload.filename and upload.filename.endswith(".csv"):
+            content_type = "text/csv"
+        elif upload.filename and upload.filename.endswith(".ndjson"):
+            content_type = "application/x-ndjson"
+        else:
+            content_type = "application/json"
+    elif content_type in ("application/json", "application/x-ndjson",
+                          "text/csv"):
+        body = await request.body()
+    else:
+        raise HTTPException(status_code=415,
+                            detail="Unsupported content type")
+
+    rows = _parse_bulk_rows(body, content_type)
+
+    parsed = []
+    errors = []
+    for index, raw in enumerate(rows):
+        try:
+            parsed.append((index, TransactionCreate.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"row": index, "error": "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                for err in e.errors())})
+
+    allowed_categories = await _categories(
+        db, current_user["id"],
+        {transaction.category_id for _, transaction in parsed})
+    values = []
+    for index, transaction in parsed:
+        if transaction.category_id not in allowed_categories:
+            errors.append({"row": index, "error": "Invalid category_id"})
+            continue
+        try:
+            _check_pattern(transaction.recurrence_pattern)
+        except HTTPException as e:
+            errors.append({"row": index, "error": e.detail})
+            continue
+        values.append(repository.transaction_values(current_user["id"],
+                                                    transaction))
+    errors.sort(key=lambda error: error["row"])
+
+    try:
+        await db.run(repository.insert_transactions, values, BULK_CHUNK_SIZE)
+        await db.commit()
+        response_cache.bump(current_user["id"])
+    except sqlite3.Error as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"inserted": len(values), "errors": errors}
+
+
+@app.get("/transactions/", response_model=list[Transaction])
+async def get_transactions(
+        request: Request,
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        category_id: str =
+        Query(None, description="Comma-separated category IDs"),
+        type_: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] =
+        Query(None, description="X-Next-Cursor of the previous page"),
+        fields: Optional[str] =
+        Query(None, description="Comma-separated fields to return")
+):
+    """
+    Get one page of transactions, newest first.
+
+    Pages are keyed on (date, id), so each page costs one index range
+    scan no matter how deep it is. The cursor of the next page is sent in
+    the X-Next-Cursor header and is absent on the last page. Pages are
+    served from the response cache until the user writes a transaction.
+
+    Args:
+        request: Request
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        start_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None
+        category_id: str = Query
+        type_: Optional[str] = None
+        limit: int = Query
+        cursor: Optional[str] = Query
+        fields: Optional[str] = Query
+
+    Returns:
+        list: transactions of the page
+    """
+    key, cached = _cache_lookup(request, current_user["id"],
+                                "transactions")
+    if cached is not None:
+        return cached
+
+    if fields:
+        requested = [field.strip() for field in fields.split(",")]
+        unknown = set(requested) - set(TRANSACTION_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+
+    filters = _transaction_filters(start_date, end_date, category_id, type_)
+    if cursor:
+        filters["after"] = _decode_cursor(cursor)
+
+    # Projection happens below so every page runs the same statement.
+    async with async_connection() as db:
+        rows = await db.run(repository.list_transactions, current_user["id"],
+                            limit=limit + 1, **filters)
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+
+    if fields:
+        content = jsonable_encoder([
+            {field: txn[field] for field in requested}
+            for txn in map(transaction_from_storage, rows)])
+    else:
+        content = TRANSACTION_LIST.dump_python(
+            TRANSACTION_LIST.validate_python(
+                [transaction_from_storage(txn) for txn in rows]),
+            mode="json")
+    return _cache_store(request, key, content, headers)
 
 
 @app.post("/categories/", response_model=Category)
 async def create_category(
         category: CategoryCreate,
-        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
 ):
     """
     Create a new category for the transaction.
@@ -370,43 +844,27 @@ async def create_category(
     Args:
         category: CategoryCreate
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)
+        db: DbConnection
 
     Returns:
         None
     """
-    conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO categories (name, is_predefined, type, user_id) "
-            "VALUES (?, ?, ?, ?)",
-            (category.name, category.is_predefined,
-             category.type, current_user["id"])
-        )
-        category_id = cursor.lastrowid
-        conn.commit()
-
-        new_category = conn.execute(
-            "SELECT id, name, type, is_predefined,"
-            "user_id FROM categories WHERE id = ?",
-            (category_id,)
-        ).fetchone()
-
-        if not new_category:
-            raise HTTPException(status_code=400,
-                                detail="Category not found after creation")
-
-        category_dict = dict(new_category)
-        return category_dict
+        new_category = await db.run(repository.insert_category,
+                                    current_user["id"], category)
+        await db.commit()
+        category_cache.invalidate(current_user["id"], category.is_predefined)
+        audit_writer.record(current_user["id"], "create", "categories",
+                            new_category["id"])
+        return dict(new_category)
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Category already exists")
-    finally:
-        conn.close()
 
 
 @app.get("/categories/", response_model=list[Category])
 async def get_categories(
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection,
         type_: Optional[str] = None
 ):
     """
@@ -414,33 +872,24 @@ async def get_categories(
 
     Args:
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
         type_: Optional[str] = None
 
     Returns:
         None
     """
-    conn = get_db_connection()
-    try:
-        query = """
-        SELECT id, name, type, is_predefined, user_id FROM categories
-        WHERE user_id = ? OR is_predefined = 1
-        """
-        params = [current_user["id"]]
-
-        if type_:
-            query += " AND type = ?"
-            params.append(type_)
-
-        categories = conn.execute(query, params).fetchall()
-        return [dict(category) for category in categories]
-    finally:
-        conn.close()
+    user_id = current_user["id"]
+    categories = await _categories(db, user_id)
+    return [category for category in categories.values()
+            if type_ is None or category["type"] == type_
+            or category["user_id"] == user_id]
 
 
 @app.post("/budgets/", response_model=Budget)
 async def create_budget(
         budget: BudgetCreate,
-        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
 ):
     """
     Create the budget.
@@ -448,43 +897,26 @@ async def create_budget(
     Args:
         budget: BudgetCreate
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
 
     Returns:
         None
     """
-    conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO budgets
-            (user_id, category_id, target_amount, start_date, end_date, name)
-            VALUES (?, ?, ?, ?, ?, ?)""",
-            (
-                current_user["id"],
-                budget.category_id,
-                budget.target_amount,
-                budget.start_date,
-                budget.end_date,
-                budget.name
-            )
-        )
-        budget_id = cursor.lastrowid
-        conn.commit()
-
-        new_budget = conn.execute(
-            "SELECT * FROM budgets WHERE id = ?", (budget_id,)
-        ).fetchone()
-        if not new_budget:
-            raise HTTPException(status_code=400,
-                                detail="Budget not found after creation")
-        return dict(new_budget)
-    finally:
-        conn.close()
+        new_budget = await db.run(repository.insert_budget,
+                                  current_user["id"], budget)
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=400, detail="Invalid category_id")
+    await db.commit()
+    audit_writer.record(current_user["id"], "create", "budgets",
+                        new_budget["id"])
+    return budget_from_storage(new_budget)
 
 
 @app.get("/budgets/", response_model=list[Budget])
 async def get_budgets(
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection,
         active_only: bool = True
 ):
     """
@@ -492,28 +924,62 @@ async def get_budgets(
 
     Args:
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
         active_only: bool = True
 
     Returns:
         None
     """
-    conn = get_db_connection()
-    try:
-        query = "SELECT * FROM budgets WHERE user_id = ?"
-        params = [current_user["id"]]
+    budgets = await db.run(repository.list_budgets, current_user["id"],
+                           active_only)
+    return [budget_from_storage(budget) for budget in budgets]
+
+
+def _budget_progress(row):
+    """
+    Convert a stored budget row to its progress.
+
+    Args:
+        row: budget row
+
+    Returns:
+        dict: API values with the remaining amount and the spent share
+    """
+    progress = budget_from_storage(row)
+    target, spent = row["target_amount"], row["current_amount"]
+    progress["remaining_amount"] = from_minor_units(target - spent)
+    progress["progress"] = spent / target if target else None
+    return progress
 
-        if active_only:
-            query += (" AND is_active = 1 AND date() BETWEEN "
-                      "start_date AND end_date")
 
-        budgets = conn.execute(query, params).fetchall()
-        return [dict(budget) for budget in budgets]
-    finally:
-        conn.close()
+@app.get("/budgets/progress", response_model=list[BudgetProgress])
+async def get_budget_progress(
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection,
+        active_only: bool = True
+):
+    """
+    Get the spent and remaining amounts of the budgets.
+
+    The spent amounts are kept current by triggers on every transaction
+    write, so this reads the budget rows only.
+
+    Args:
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
+        active_only: bool = True
+
+    Returns:
+        list[dict]: budgets with their progress
+    """
+    budgets = await db.run(repository.list_budgets, current_user["id"],
+                           active_only)
+    return [_budget_progress(budget) for budget in budgets]
 
 
 @app.get("/analytics/summary")
 async def get_summary(
+        request: Request,
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
@@ -521,7 +987,12 @@ async def get_summary(
     """
     Get the summary of the transactions.
 
+    Totals come from the daily and monthly rollups, plus raw scans of the
+    two partial edge days of the period. Results are served from the
+    response cache until the user writes a transaction.
+
     Args:
+        request: Request
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
         start_date: Optional[datetime] = None
         end_date: Optional[datetime] = None
@@ -529,47 +1000,123 @@ async def get_summary(
     Returns:
         None
     """
-    conn = get_db_connection()
+    key, cached = _cache_lookup(request, current_user["id"], "summary")
+    if cached is not None:
+        return cached
+
+    # Default to current month if no dates provided
+    if not start_date or not end_date:
+        today = datetime.now()
+        start_date = today.replace(day=1)
+        end_date = (today.replace(day=1, month=today.month+1)
+                    - timedelta(days=1))
+
+    async with async_connection() as db:
+        summary = await db.run(summarize, current_user["id"], start_date,
+                               end_date)
+    return _cache_store(request, key, jsonable_encoder(
+        {"period": {"start": start_date, "end": end_date}, **summary}))
+
+
+def _batch_selection(batch):
+    """
+    Translate the selection of a batch request for the repository.
+
+    Args:
+        batch: TransactionBatch
+
+    Returns:
+        dict: ids or filters keyword argument of the batch functions
+    """
+    if batch.ids is not None:
+        return {"ids": batch.ids}
+    selected = batch.filter
+    return {"filters": {
+        "start": (to_timestamp(selected.start_date)
+                  if selected.start_date else None),
+        "end": to_timestamp(selected.end_date) if selected.end_date else None,
+        "category_ids": selected.category_ids,
+        "type_": selected.type,
+    }}
+
+
+# Declared before the /{transaction_id} routes, which would match "batch".
+@app.patch("/transactions/batch", response_model=list[Transaction])
+async def update_transactions(
+        batch: TransactionBatchUpdate,
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
+):
+    """
+    Apply the same changes to many transactions in one statement.
+
+    Args:
+        batch: TransactionBatchUpdate
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
+
+    Returns:
+        list[Transaction]: the updated transactions ordered by id
+    """
+    _check_pattern(batch.changes.recurrence_pattern)
+    update_fields = transaction_to_storage(
+        batch.changes.model_dump(exclude_none=True))
+    if not update_fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    if "category_id" in update_fields:
+        categories = await _categories(db, current_user["id"],
+                                       [update_fields["category_id"]])
+        if update_fields["category_id"] not in categories:
+            raise HTTPException(status_code=400,
+                                detail="Invalid category_id")
+
+    try:
+        rows = await db.run(repository.update_transactions,
+                            current_user["id"], update_fields,
+                            **_batch_selection(batch))
+        await db.commit()
+    except sqlite3.IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if rows:
+        response_cache.bump(current_user["id"])
+    audit_writer.record_many(current_user["id"], "update", "transactions",
+                             [row["id"] for row in rows])
+    return [transaction_from_storage(row) for row in rows]
+
+
+@app.delete("/transactions/batch", response_model=BatchDeleteResult)
+async def delete_transactions(
+        batch: TransactionBatch,
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
+):
+    """
+    Delete many transactions in one statement.
+
+    Args:
+        batch: TransactionBatch
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
+
+    Returns:
+        BatchDeleteResult: the number and ids of deleted transactions
+    """
     try:
-        # Default to current month if no dates provided
-        if not start_date or not end_date:
-            today = datetime.now()
-            start_date = today.replace(day=1)
-            end_date = (today.replace(day=1, month=today.month+1)
-                        - timedelta(days=1))
-
-        # Get total income and expenses
-        summary = conn.execute("""
-            SELECT
-                SUM(CASE WHEN type = 'income'
-                THEN amount ELSE 0 END) as total_income,
-                SUM(CASE WHEN type = 'expense'
-                THEN amount ELSE 0 END) as total_expenses
-            FROM transactions
-            WHERE user_id = ? AND date BETWEEN ? AND ?
-        """, (current_user["id"], start_date, end_date)).fetchone()
-
-        # Get expenses by category
-        categories = conn.execute("""
-            SELECT c.name, SUM(t.amount) as total
-            FROM transactions t
-            JOIN categories c ON t.category_id = c.id
-            WHERE t.user_id = ? AND t.type = 'expense'
-            AND t.date BETWEEN ? AND ?
-            GROUP BY c.name
-            ORDER BY total DESC
-        """, (current_user["id"], start_date, end_date)).fetchall()
-
-        return {
-            "period": {"start": start_date, "end": end_date},
-            "total_income": summary["total_income"] or 0,
-            "total_expenses": summary["total_expenses"] or 0,
-            "net_balance": (summary["total_income"] or 0) -
-                           (summary["total_expenses"] or 0),
-            "expenses_by_category": [dict(row) for row in categories]
-        }
-    finally:
-        conn.close()
+        ids = await db.run(repository.delete_transactions,
+                           current_user["id"], **_batch_selection(batch))
+        await db.commit()
+    except sqlite3.Error as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if ids:
+        response_cache.bump(current_user["id"])
+    audit_writer.record_many(current_user["id"], "delete", "transactions",
+                             ids)
+    return {"deleted": len(ids), "ids": ids}
 
 
 @app.patch("/transactions/{transaction_id}",
@@ -577,6 +1124,7 @@ async def get_summary(
 async def update_transaction(
         transaction_id: int,
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection,
         transaction_update: TransactionUpdate
 ):
     """
@@ -585,86 +1133,62 @@ async def update_transaction(
     Args:
         transaction_id: int
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
         transaction_update: TransactionUpdate
 
     Returns:
         None
     """
-    conn = get_db_connection()
-    try:
-        existing = conn.execute(
-            "SELECT * FROM transactions WHERE id = ? AND user_id = ?",
-            (transaction_id, current_user["id"])
-        ).fetchone()
-
+    _check_pattern(transaction_update.recurrence_pattern)
+    update_fields = transaction_to_storage(
+        transaction_update.model_dump(exclude_none=True))
+
+    rejection = None
+    if not update_fields:
+        rejection = "No fields to update"
+    elif "category_id" in update_fields:
+        categories = await _categories(db, current_user["id"],
+                                       [update_fields["category_id"]])
+        if update_fields["category_id"] not in categories:
+            rejection = "Invalid category_id"
+
+    if rejection:
+        # A missing transaction takes precedence over a bad body; only
+        # rejected requests pay for the lookup.
+        existing = await db.run(repository.get_transaction, transaction_id,
+                                current_user["id"])
         if not existing:
             raise HTTPException(status_code=404,
                                 detail="Transaction not found")
+        raise HTTPException(status_code=400, detail=rejection)
 
-        update_fields = {}
-        if transaction_update.amount is not None:
-            update_fields["amount"] = transaction_update.amount
-        if transaction_update.description is not None:
-            update_fields["description"] = transaction_update.description
-        if transaction_update.date is not None:
-            update_fields["date"] = transaction_update.date
-        if transaction_update.category_id is not None:
-            update_fields["category_id"] = transaction_update.category_id
-        if transaction_update.type is not None:
-            update_fields["type"] = transaction_update.type
-        if transaction_update.is_recurring is not None:
-            update_fields["is_recurring"] = transaction_update.is_recurring
-        if transaction_update.recurrence_pattern is not None:
-            update_fields["recurrence_pattern"] = (
-                transaction_update.recurrence_pattern)
-
-        if not update_fields:
-            raise HTTPException(status_code=400, detail="No fields to update")
-
-        if "category_id" in update_fields:
-            category = conn.execute(
-                "SELECT 1 FROM categories WHERE id = ? AND "
-                "(user_id = ? OR is_predefined = 1)",
-                (update_fields["category_id"], current_user["id"])
-            ).fetchone()
-            if not category:
-                raise HTTPException(status_code=400,
-                                    detail="Invalid category_id")
-
-        set_clause = ", ".join(f"{field} = ?" for field
-                               in update_fields.keys())
-        values = list(update_fields.values())
-        values.extend([transaction_id, current_user["id"]])
-
-        cursor = conn.cursor()
-        cursor.execute(
-            f"UPDATE transactions SET {set_clause} WHERE id = ? "  # nosec
-            f"AND user_id = ?",  # nosec
-            values
-        )
-        conn.commit()
+    try:
+        updated_transaction = await db.run(
+            repository.update_transaction, transaction_id,
+            current_user["id"], update_fields)
 
-        updated_transaction = conn.execute(
-            """SELECT id, user_id, category_id, amount, description,
-                  date, type, is_recurring, recurrence_pattern, created_at
-               FROM transactions WHERE id = ?""",
-            (transaction_id,)
-        ).fetchone()
+        if not updated_transaction:
+            await db.rollback()
+            raise HTTPException(status_code=404,
+                                detail="Transaction not found")
 
-        return dict(updated_transaction)
+        await db.commit()
+        response_cache.bump(current_user["id"])
+        audit_writer.record(current_user["id"], "update", "transactions",
+                            transaction_id)
+        return transaction_from_storage(updated_transaction)
 
     except sqlite3.IntegrityError as e:
-        conn.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        conn.close()
 
 
 @app.delete("/transactions/{transaction_id}",
             status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transaction(
         transaction_id: int,
-        current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        current_user: Annotated[sqlite3.Row, Depends(get_current_user)],
+        db: DbConnection
 ):
     """
     Delete the transaction.
@@ -672,16 +1196,14 @@ async def delete_transaction(
     Args:
         transaction_id: int
         current_user: Annotated[sqlite3.Row, Depends(get_current_user)]
+        db: DbConnection
 
     Returns:
         None
     """
-    conn = get_db_connection()
     try:
-        transaction = conn.execute(
-            "SELECT id FROM transactions WHERE id = ? AND user_id = ?",
-            (transaction_id, current_user["id"])
-        ).fetchone()
+        transaction = await db.run(repository.get_transaction,
+                                   transaction_id, current_user["id"])
 
         if not transaction:
             raise HTTPException(
@@ -689,25 +1211,23 @@ async def delete_transaction(
                 detail="Transaction not found or access denied"
             )
 
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM transactions WHERE id = ?",
-            (transaction_id,)
-        )
+        deleted = await db.run(repository.delete_transaction,
+                               transaction_id, current_user["id"])
 
-        if cursor.rowcount == 0:
+        if deleted == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found"
             )
 
-        conn.commit()
+        await db.commit()
+        response_cache.bump(current_user["id"])
+        audit_writer.record(current_user["id"], "delete", "transactions",
+                            transaction_id)
 
     except sqlite3.Error as e:
-        conn.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}"
         )
-    finally:
-        conn.close()
@@ -0,0 +1,106 @@
+"""
+Module metrics.
+
+ASGI middleware exporting per-route HTTP metrics to Prometheus.
+
+Requests are labelled with the route template (``/transactions/{id}``
+rather than the concrete path) so label cardinality stays bounded.
+"""
+
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, Summary
+from starlette.routing import Match
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1,
+                   0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUESTS = Counter(
+    "finance_http_requests_total",
+    "HTTP requests by route, method and status code",
+    ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "finance_http_request_duration_seconds",
+    "Time from receiving a request to sending the last body chunk",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    "finance_http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method", "route"]
+)
+HTTP_RESPONSE_SIZE = Summary(
+    "finance_http_response_size_bytes",
+    "Size of response bodies",
+    ["method", "route"]
+)
+
+
+def route_template(scope):
+    """
+    Return the path template of the route serving a request.
+
+    Args:
+        scope: ASGI HTTP scope.
+
+    Returns:
+        str: route path, or UNMATCHED_ROUTE for unknown paths
+    """
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """Record count, latency, in-flight and size metrics per route."""
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: downstream ASGI application.
+            skip_paths: path prefixes that are not measured.
+        """
+        self.app = app
+        self.skip_paths = tuple(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        """Serve one ASGI connection, measuring HTTP requests."""
+        if (scope["type"] != "http"
+                or scope["path"].startswith(self.skip_paths)):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_LATENCY.labels(method, route).observe(
+                time.perf_counter() - start)
+            in_flight.dec()
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(size)
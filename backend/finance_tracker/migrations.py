@@ -0,0 +1,755 @@
+"""
+Module migrations.
+
+Versioned, forward-only schema migrations for the SQLite database.
+
+Every migration runs once, inside the same write transaction that records
+its number in ``schema_version``. Workers that boot concurrently serialize
+on ``BEGIN IMMEDIATE`` and the losers find nothing left to apply.
+"""
+
+import sqlite3
+from datetime import datetime
+
+from finance_tracker.models import to_minor_units, to_timestamp
+
+
+PREDEFINED_CATEGORIES = [
+    ("Salary", "income"),
+    ("Freelance", "income"),
+    ("Investments", "income"),
+    ("Other Income", "income"),
+    ("Food", "expense"),
+    ("Housing", "expense"),
+    ("Transportation", "expense"),
+    ("Entertainment", "expense"),
+    ("Healthcare", "expense"),
+    ("Other Expenses", "expense"),
+]
+
+
+def _initial_schema(cursor):
+    """
+    Create the base tables and bootstrap the predefined categories.
+
+    Written with IF NOT EXISTS so databases created before versioning
+    are adopted as they are.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            is_locked BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL CHECK(type IN ('income', 'expense')),
+            is_predefined BOOLEAN DEFAULT FALSE,
+            user_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            UNIQUE(name, user_id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            date TIMESTAMP NOT NULL,
+            type TEXT NOT NULL CHECK(type IN ('income', 'expense')),
+            is_recurring BOOLEAN DEFAULT FALSE,
+            recurrence_pattern TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER,
+            target_amount REAL NOT NULL,
+            current_amount REAL DEFAULT 0.0,
+            start_date TIMESTAMP NOT NULL,
+            end_date TIMESTAMP NOT NULL,
+            name TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            record_id INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_date "
+                   "ON transactions(user_id, date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category_type "
+                   "ON transactions(category_id, type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_budgets_user_active "
+                   "ON budgets(user_id, is_active)")
+
+    # UNIQUE(name, user_id) does not cover NULL user ids, so guard the
+    # bootstrap explicitly.
+    cursor.executemany(
+        "INSERT INTO categories (name, type, is_predefined) "
+        "SELECT ?, ?, 1 WHERE NOT EXISTS ("
+        "SELECT 1 FROM categories WHERE name = ? AND is_predefined = 1)",
+        [(name, type_, name) for name, type_ in PREDEFINED_CATEGORIES]
+    )
+
+
+ROLLUP_PERIODS = (
+    # (table, key column)
+    ("daily_rollups", "day"),
+    ("monthly_rollups", "month"),
+)
+
+# SQL computing the rollup key of each period from a transaction date,
+# with {date} standing for the date column. Version 2 stored ISO 8601
+# text; version 4 stores microseconds since the epoch, keyed by day
+# number and by months since year 0.
+_TEXT_ROLLUP_KEYS = {
+    "day": "substr({date}, 1, 10)",
+    "month": "substr({date}, 1, 7)",
+}
+_DAY_KEY = "({date} / 86400000000 - ({date} % 86400000000 < 0))"
+ROLLUP_KEYS = {
+    "day": _DAY_KEY,
+    "month": f"(strftime('%Y', {_DAY_KEY} * 86400, 'unixepoch') * 12 "
+             f"+ strftime('%m', {_DAY_KEY} * 86400, 'unixepoch') - 1)",
+}
+
+
+def _create_rollup_tables(cursor, key_type, total_type, keys):
+    """
+    Create the rollup tables and aggregate the existing transactions.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+        key_type: SQL type of the period key columns.
+        total_type: SQL type of the total columns.
+        keys: rollup key SQL by key column.
+
+    Returns:
+        None
+    """
+    # Table, column and type names below come from this module only.
+    for table, key in ROLLUP_PERIODS:
+        period = keys[key].format(date="date")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                user_id INTEGER NOT NULL,
+                {key} {key_type} NOT NULL,
+                category_id INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                total {total_type} NOT NULL DEFAULT 0,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, {key}, category_id, type)
+            ) WITHOUT ROWID
+        """)
+
+        cursor.execute(f"""
+            INSERT INTO {table} (user_id, {key}, category_id, type,
+                                 total, count)
+            SELECT user_id, {period}, category_id, type,
+                   SUM(amount), COUNT(*)
+            FROM transactions
+            WHERE true
+            GROUP BY user_id, {period}, category_id, type
+            ON CONFLICT DO NOTHING
+        """)  # nosec
+
+
+def _rollups(cursor):
+    """
+    Create per-day and per-month income/expense rollups.
+
+    Existing rows are aggregated once, then triggers keep the rollups in
+    step with every write to transactions.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    _create_rollup_tables(cursor, "TEXT", "REAL", _TEXT_ROLLUP_KEYS)
+    create_rollup_triggers(cursor, _TEXT_ROLLUP_KEYS)
+
+
+def create_rollup_triggers(cursor, keys=None):
+    """
+    Keep the rollups in step with every write to transactions.
+
+    Args:
+        cursor: cursor inside a write transaction.
+        keys: rollup key SQL by key column, ROLLUP_KEYS by default.
+
+    Returns:
+        None
+    """
+    keys = keys or ROLLUP_KEYS
+    # Table and column names below come from this module only.
+    for table, key in ROLLUP_PERIODS:
+        new_key = keys[key].format(date="NEW.date")
+        old_key = keys[key].format(date="OLD.date")
+        add = f"""
+            INSERT INTO {table} (user_id, {key}, category_id, type,
+                                 total, count)
+            VALUES (NEW.user_id, {new_key},
+                    NEW.category_id, NEW.type, NEW.amount, 1)
+            ON CONFLICT (user_id, {key}, category_id, type) DO UPDATE
+            SET total = total + excluded.total, count = count + 1;
+        """  # nosec
+        remove = f"""
+            UPDATE {table} SET total = total - OLD.amount, count = count - 1
+            WHERE user_id = OLD.user_id
+              AND {key} = {old_key}
+              AND category_id = OLD.category_id AND type = OLD.type;
+            DELETE FROM {table}
+            WHERE user_id = OLD.user_id
+              AND {key} = {old_key}
+              AND category_id = OLD.category_id AND type = OLD.type
+              AND count = 0;
+        """  # nosec
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+            AFTER INSERT ON transactions
+            BEGIN {add} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+            AFTER DELETE ON transactions
+            BEGIN {remove} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+            AFTER UPDATE OF user_id, category_id, amount, date, type
+            ON transactions
+            BEGIN {remove} {add} END
+        """)
+
+
+def drop_rollup_triggers(cursor):
+    """
+    Stop maintaining the rollups on writes to transactions.
+
+    Bulk loaders drop the triggers, write the rollup rows of the loaded
+    transactions themselves and call create_rollup_triggers before
+    committing, so other connections never see the triggers missing.
+
+    Args:
+        cursor: cursor inside a write transaction.
+
+    Returns:
+        None
+    """
+    for table, _ in ROLLUP_PERIODS:
+        for event in ("insert", "delete", "update"):
+            cursor.execute(
+                f"DROP TRIGGER IF EXISTS trg_{table}_{event}")  # nosec
+
+
+def _workload_indexes(cursor):
+    """
+    Index the hot queries so none of them scans a whole table.
+
+    The partial-day edges of a summary read amounts straight from a
+    covering index. Category lookups match ``user_id = ? OR
+    is_predefined = 1``, which SQLite answers with one index per side of
+    the OR; the predefined side is partial, as only a handful of rows
+    qualify.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_user_date_totals "
+        "ON transactions(user_id, date, type, category_id, amount)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_categories_user "
+        "ON categories(user_id) WHERE user_id IS NOT NULL")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_categories_predefined "
+        "ON categories(is_predefined, type) WHERE is_predefined = 1")
+
+
+def _iso_to_timestamp(value):
+    return to_timestamp(datetime.fromisoformat(value))
+
+
+def _integer_storage(cursor):
+    """
+    Store transaction amounts in cents and dates as epoch microseconds.
+
+    SQLite cannot change column types in place, so the table is rebuilt
+    and its indexes recreated. The rollups are rebuilt with integer keys
+    and exact integer totals.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    conn = cursor.connection
+    conn.create_function("to_minor_units", 1, to_minor_units,
+                         deterministic=True)
+    conn.create_function("iso_to_timestamp", 1, _iso_to_timestamp,
+                         deterministic=True)
+
+    drop_rollup_triggers(cursor)
+    cursor.execute("""
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            description TEXT,
+            date INTEGER NOT NULL,
+            type TEXT NOT NULL CHECK(type IN ('income', 'expense')),
+            is_recurring BOOLEAN DEFAULT FALSE,
+            recurrence_pattern TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO transactions_new
+        SELECT id, user_id, category_id, to_minor_units(amount),
+               description, iso_to_timestamp(date), type, is_recurring,
+               recurrence_pattern, created_at
+        FROM transactions
+    """)
+    # Keep AUTOINCREMENT from reusing the ids of deleted transactions.
+    sequence = cursor.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'transactions'"
+    ).fetchone()
+    cursor.execute("DROP TABLE transactions")
+    cursor.execute("ALTER TABLE transactions_new RENAME TO transactions")
+    if sequence is not None:
+        cursor.execute(
+            "DELETE FROM sqlite_sequence WHERE name = 'transactions'")
+        cursor.execute(
+            "INSERT INTO sqlite_sequence (name, seq) "
+            "VALUES ('transactions', ?)", sequence)
+    cursor.execute("CREATE INDEX idx_transactions_user_date "
+                   "ON transactions(user_id, date)")
+    cursor.execute("CREATE INDEX idx_transactions_category_type "
+                   "ON transactions(category_id, type)")
+    cursor.execute("CREATE INDEX idx_transactions_user_date_totals "
+                   "ON transactions(user_id, date, type, category_id, "
+                   "amount)")
+
+    for table, _ in ROLLUP_PERIODS:
+        cursor.execute(f"DROP TABLE {table}")  # nosec
+    _create_rollup_tables(cursor, "INTEGER", "INTEGER", ROLLUP_KEYS)
+    create_rollup_triggers(cursor)
+
+
+# Transactions the recurrence engine expands; {row} is "NEW." or empty.
+RECURRENCE_TEMPLATE = ("{row}is_recurring AND {row}recurrence_pattern IS NOT "
+                       "NULL AND {row}recurrence_parent_id IS NULL")
+
+
+def _recurrences(cursor):
+    """
+    Track the materialization of recurring transactions.
+
+    A recurring transaction is a template: the occurrences generated from
+    it point back through recurrence_parent_id, and the unique index makes
+    generating an occurrence twice a no-op. recurrence_schedule holds the
+    high-water mark of each template. Triggers register new templates and
+    restart a template whose date or pattern changes.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    cursor.execute("ALTER TABLE transactions ADD COLUMN "
+                   "recurrence_parent_id INTEGER REFERENCES transactions(id)")
+    cursor.execute(
+        "CREATE UNIQUE INDEX idx_transactions_recurrence "
+        "ON transactions(recurrence_parent_id, date) "
+        "WHERE recurrence_parent_id IS NOT NULL")
+    cursor.execute("""
+        CREATE TABLE recurrence_schedule (
+            transaction_id INTEGER PRIMARY KEY,
+            next_period INTEGER NOT NULL DEFAULT 0,
+            emitted INTEGER NOT NULL DEFAULT 0,
+            next_due INTEGER
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_recurrence_schedule_due "
+                   "ON recurrence_schedule(next_due)")
+
+    create_schedule_trigger(cursor)
+    # A changed template starts over; materialized occurrences are kept.
+    cursor.execute(f"""
+        CREATE TRIGGER trg_recurrence_schedule_update
+        AFTER UPDATE OF date, is_recurring, recurrence_pattern
+        ON transactions
+        BEGIN
+            DELETE FROM recurrence_schedule WHERE transaction_id = OLD.id;
+            INSERT INTO recurrence_schedule (transaction_id, next_due)
+            SELECT NEW.id, NEW.date
+            WHERE {RECURRENCE_TEMPLATE.format(row="NEW.")};
+        END
+    """)  # nosec
+    cursor.execute("""
+        CREATE TRIGGER trg_recurrence_schedule_delete
+        AFTER DELETE ON transactions
+        BEGIN
+            DELETE FROM recurrence_schedule WHERE transaction_id = OLD.id;
+        END
+    """)
+    register_templates(cursor)
+
+
+def create_schedule_trigger(cursor):
+    """
+    Register every new recurring template in recurrence_schedule.
+
+    Args:
+        cursor: cursor inside a write transaction.
+
+    Returns:
+        None
+    """
+    # The WHEN clause spares ordinary inserts from running the body.
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_recurrence_schedule_insert
+        AFTER INSERT ON transactions
+        WHEN {RECURRENCE_TEMPLATE.format(row="NEW.")}
+        BEGIN
+            INSERT INTO recurrence_schedule (transaction_id, next_due)
+            VALUES (NEW.id, NEW.date);
+        END
+    """)  # nosec
+
+
+def drop_schedule_trigger(cursor):
+    """
+    Stop registering new templates on insert.
+
+    Bulk loaders drop the trigger and call register_templates and
+    create_schedule_trigger before committing.
+
+    Args:
+        cursor: cursor inside a write transaction.
+
+    Returns:
+        None
+    """
+    cursor.execute("DROP TRIGGER IF EXISTS trg_recurrence_schedule_insert")
+
+
+def register_templates(cursor, first_id=0):
+    """
+    Schedule the recurring templates that are not scheduled yet.
+
+    Args:
+        cursor: cursor inside a write transaction.
+        first_id: smallest transaction id to look at.
+
+    Returns:
+        None
+    """
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO recurrence_schedule (transaction_id, next_due)
+        SELECT id, date FROM transactions
+        WHERE id >= ? AND {RECURRENCE_TEMPLATE.format(row="")}
+    """, (first_id,))  # nosec
+
+
+# Expense transactions counted by a budget; {row} is "NEW." or "OLD.".
+BUDGET_MATCH = """
+    budgets.user_id = {row}user_id
+    AND {row}date BETWEEN budgets.start_date AND budgets.end_date
+    AND (budgets.category_id IS NULL
+         OR budgets.category_id = {row}category_id)
+    AND {row}type = 'expense'
+"""
+# Spent amount of the budget row being updated.
+BUDGET_AMOUNT = """
+    SELECT COALESCE(SUM(t.amount), 0) FROM transactions t
+    WHERE t.user_id = budgets.user_id AND t.type = 'expense'
+      AND t.date BETWEEN budgets.start_date AND budgets.end_date
+      AND (budgets.category_id IS NULL
+           OR t.category_id = budgets.category_id)
+"""
+
+
+def _budget_progress(cursor):
+    """
+    Maintain the spent amount of every budget on each transaction write.
+
+    Budgets are rebuilt with the storage units of transactions, so the
+    triggers compare integers: amounts in cents and periods in epoch
+    microseconds, both ends inclusive. The (user_id, start_date, end_date)
+    index answers which budgets of a user cover a date.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    conn = cursor.connection
+    conn.create_function("to_minor_units", 1, to_minor_units,
+                         deterministic=True)
+    conn.create_function("iso_to_timestamp", 1, _iso_to_timestamp,
+                         deterministic=True)
+
+    cursor.execute("""
+        CREATE TABLE budgets_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            category_id INTEGER,
+            target_amount INTEGER NOT NULL,
+            current_amount INTEGER NOT NULL DEFAULT 0,
+            start_date INTEGER NOT NULL,
+            end_date INTEGER NOT NULL,
+            name TEXT,
+            is_active BOOLEAN DEFAULT TRUE,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO budgets_new
+        SELECT id, user_id, category_id, to_minor_units(target_amount), 0,
+               iso_to_timestamp(start_date), iso_to_timestamp(end_date),
+               name, is_active
+        FROM budgets
+    """)
+    sequence = cursor.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'budgets'").fetchone()
+    cursor.execute("DROP TABLE budgets")
+    cursor.execute("ALTER TABLE budgets_new RENAME TO budgets")
+    if sequence is not None:
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'budgets'")
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) "
+                       "VALUES ('budgets', ?)", sequence)
+    cursor.execute("CREATE INDEX idx_budgets_user_active "
+                   "ON budgets(user_id, is_active)")
+    cursor.execute("CREATE INDEX idx_budgets_user_period "
+                   "ON budgets(user_id, start_date, end_date, category_id)")
+
+    # New budgets and budgets moved to another period or category are
+    # summed once from the covering transactions index.
+    cursor.execute(f"""
+        CREATE TRIGGER trg_budget_amounts_budget_insert
+        AFTER INSERT ON budgets
+        BEGIN
+            UPDATE budgets SET current_amount = ({BUDGET_AMOUNT})
+            WHERE id = NEW.id;
+        END
+    """)  # nosec
+    cursor.execute(f"""
+        CREATE TRIGGER trg_budget_amounts_budget_update
+        AFTER UPDATE OF user_id, category_id, start_date, end_date
+        ON budgets
+        BEGIN
+            UPDATE budgets SET current_amount = ({BUDGET_AMOUNT})
+            WHERE id = NEW.id;
+        END
+    """)  # nosec
+    create_budget_triggers(cursor)
+    refresh = f"UPDATE budgets SET current_amount = ({BUDGET_AMOUNT})"  # nosec
+    cursor.execute(refresh)
+
+
+def create_budget_triggers(cursor):
+    """
+    Keep budgets.current_amount in step with every write to transactions.
+
+    Args:
+        cursor: cursor inside a write transaction.
+
+    Returns:
+        None
+    """
+    add = f"""
+        UPDATE budgets SET current_amount = current_amount + NEW.amount
+        WHERE {BUDGET_MATCH.format(row="NEW.")};
+    """  # nosec
+    remove = f"""
+        UPDATE budgets SET current_amount = current_amount - OLD.amount
+        WHERE {BUDGET_MATCH.format(row="OLD.")};
+    """  # nosec
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_budget_amounts_insert
+        AFTER INSERT ON transactions WHEN NEW.type = 'expense'
+        BEGIN {add} END
+    """)  # nosec
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_budget_amounts_delete
+        AFTER DELETE ON transactions WHEN OLD.type = 'expense'
+        BEGIN {remove} END
+    """)  # nosec
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_budget_amounts_update
+        AFTER UPDATE OF user_id, category_id, amount, date, type
+        ON transactions
+        WHEN OLD.type = 'expense' OR NEW.type = 'expense'
+        BEGIN {remove} {add} END
+    """)  # nosec
+
+
+def drop_budget_triggers(cursor):
+    """
+    Stop maintaining budgets.current_amount on writes to transactions.
+
+    Bulk loaders that add transactions to existing budgets must refresh
+    those budgets themselves before calling create_budget_triggers.
+
+    Args:
+        cursor: cursor inside a write transaction.
+
+    Returns:
+        None
+    """
+    for event in ("insert", "delete", "update"):
+        cursor.execute(
+            f"DROP TRIGGER IF EXISTS trg_budget_amounts_{event}")  # nosec
+
+
+# Occurrences of a deleted template; {row} is "OLD." or a bound ":".
+DETACH_OCCURRENCES = ("UPDATE transactions SET recurrence_parent_id = NULL "
+                      "WHERE recurrence_parent_id = {row}id")
+
+
+def _detach_occurrences(cursor):
+    """
+    Keep the occurrences of a template when the template is deleted.
+
+    recurrence_parent_id was added without an ON DELETE action, so with
+    foreign keys enforced a template with occurrences could not be
+    deleted. Changing the action would rebuild the table; instead a
+    trigger turns the occurrences into ordinary transactions first.
+
+    Args:
+        cursor: cursor inside the migration transaction.
+
+    Returns:
+        None
+    """
+    # Occurrences have no occurrences of their own.
+    cursor.execute(f"""
+        CREATE TRIGGER trg_recurrence_detach
+        BEFORE DELETE ON transactions
+        WHEN OLD.recurrence_parent_id IS NULL
+        BEGIN
+            {DETACH_OCCURRENCES.format(row="OLD.")};
+        END
+    """)  # nosec
+
+
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "daily and monthly transaction rollups", _rollups),
+    (3, "covering and partial indexes for the query workload",
+     _workload_indexes),
+    (4, "integer cents and epoch microseconds in transactions",
+     _integer_storage),
+    (5, "recurring transaction schedule", _recurrences),
+    (6, "budget amounts maintained by triggers", _budget_progress),
+    (7, "detach occurrences from deleted templates", _detach_occurrences),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    """
+    Return the schema version recorded in the database.
+
+    Args:
+        conn: active connection with database.
+
+    Returns:
+        int: applied version, 0 for an unversioned database
+    """
+    row = conn.execute(
+        "SELECT MAX(version) FROM schema_version"
+    ).fetchone()
+    return row[0] or 0
+
+
+def migrate(conn):
+    """
+    Apply every pending migration.
+
+    Args:
+        conn: active connection with database.
+
+    Returns:
+        list[int]: versions applied by this call
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+
+    if conn.in_transaction:
+        conn.commit()
+    cursor = conn.cursor()
+    applied = []
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        version = current_version(conn)
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description) "
+                "VALUES (?, ?)",
+                (number, description)
+            )
+            applied.append(number)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    return applied
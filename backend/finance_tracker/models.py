@@ -2,10 +2,183 @@
 Module models.
 
 Pydantic models for validating input data and generating API responses.
+
+Transactions are stored compactly: amounts as integer minor units (cents)
+and dates as integer microseconds since the Unix epoch, in UTC. The
+helpers below convert between those columns and the API values, so
+nothing else needs to know the storage format.
 """
-from pydantic import BaseModel, ConfigDict, field_validator
-from typing import Optional, Literal
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, field_validator, \
+    model_validator
+from typing import Annotated, Optional, Literal
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+
+MINOR_UNITS = 100
+MICROSECONDS_PER_DAY = 86_400_000_000
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DAY = EPOCH.date()
+# Largest accepted amount in major units. Its cents stay exact as floats
+# and leave sums far below the 64-bit range of the INTEGER columns.
+MAX_AMOUNT = 10 ** 12
+
+# Finite amounts that convert to storable minor units.
+Amount = Annotated[float, Field(allow_inf_nan=False, ge=-MAX_AMOUNT,
+                                le=MAX_AMOUNT)]
+
+
+def to_minor_units(amount):
+    """
+    Convert an amount to integer minor units.
+
+    Args:
+        amount: amount in major units, as a float, int or string.
+
+    Returns:
+        int: amount in cents, rounded half away from zero
+    """
+    cents = Decimal(str(amount)) * MINOR_UNITS
+    return int(cents.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(units):
+    """
+    Convert integer minor units back to an amount.
+
+    Args:
+        units: amount in cents.
+
+    Returns:
+        float: amount in major units
+    """
+    return units / MINOR_UNITS
+
+
+def to_timestamp(moment):
+    """
+    Convert a datetime to microseconds since the Unix epoch.
+
+    Args:
+        moment: datetime; naive values are taken as UTC.
+
+    Returns:
+        int: timestamp in microseconds
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = moment - EPOCH
+    return ((delta.days * 86400 + delta.seconds) * 1_000_000
+            + delta.microseconds)
+
+
+def from_timestamp(timestamp):
+    """
+    Convert microseconds since the Unix epoch to a datetime.
+
+    Args:
+        timestamp: timestamp in microseconds.
+
+    Returns:
+        datetime: naive datetime in UTC
+    """
+    return EPOCH + timedelta(microseconds=timestamp)
+
+
+def day_number(timestamp):
+    """
+    Return the UTC day of a timestamp as days since the Unix epoch.
+
+    Args:
+        timestamp: timestamp in microseconds.
+
+    Returns:
+        int: day number
+    """
+    return timestamp // MICROSECONDS_PER_DAY
+
+
+@lru_cache(maxsize=4096)
+def month_number(day):
+    """
+    Return the month of a day number as months since year 0.
+
+    Args:
+        day: day number.
+
+    Returns:
+        int: year * 12 + month - 1
+    """
+    moment = EPOCH_DAY + timedelta(days=day)
+    return moment.year * 12 + moment.month - 1
+
+
+def month_first_day(month):
+    """
+    Return the day number of the first day of a month number.
+
+    Args:
+        month: month number.
+
+    Returns:
+        int: day number
+    """
+    return (date(month // 12, month % 12 + 1, 1) - EPOCH_DAY).days
+
+
+def transaction_to_storage(fields):
+    """
+    Convert API values of transaction fields to column values.
+
+    Args:
+        fields: dict of transaction fields, possibly partial.
+
+    Returns:
+        dict: copy with amount and date in storage units
+    """
+    stored = dict(fields)
+    if stored.get("amount") is not None:
+        stored["amount"] = to_minor_units(stored["amount"])
+    if stored.get("date") is not None:
+        stored["date"] = to_timestamp(stored["date"])
+    return stored
+
+
+def transaction_from_storage(row):
+    """
+    Convert a stored transaction row to API values.
+
+    Args:
+        row: sqlite3.Row or dict of transaction columns, possibly partial.
+
+    Returns:
+        dict: fields with amount as a float and date as a datetime
+    """
+    fields = dict(row)
+    if fields.get("amount") is not None:
+        fields["amount"] = from_minor_units(fields["amount"])
+    if fields.get("date") is not None:
+        fields["date"] = from_timestamp(fields["date"])
+    return fields
+
+
+def budget_from_storage(row):
+    """
+    Convert a stored budget row to API values.
+
+    Args:
+        row: sqlite3.Row or dict of budget columns.
+
+    Returns:
+        dict: fields with amounts as floats and dates as datetimes
+    """
+    fields = dict(row)
+    for name in ("target_amount", "current_amount"):
+        fields[name] = from_minor_units(fields[name])
+    for name in ("start_date", "end_date"):
+        fields[name] = from_timestamp(fields[name])
+    return fields
 
 
 class UserBase(BaseModel):
@@ -58,7 +231,7 @@ class Category(CategoryBase):
 class TransactionBase(BaseModel):
     """The model of transaction data."""
 
-    amount: float
+    amount: Amount
     description: Optional[str] = None
     date: datetime
     type: Literal["income", "expense"]
@@ -84,6 +257,7 @@ class Transaction(TransactionBase):
     id: int
     user_id: int
     category_id: int
+    recurrence_parent_id: Optional[int] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -92,7 +266,7 @@ class Transaction(TransactionBase):
 class BudgetBase(BaseModel):
     """The base model of budget."""
 
-    target_amount: float
+    target_amount: Amount
     start_date: datetime
     end_date: datetime
     name: Optional[str] = None
@@ -116,6 +290,13 @@ class Budget(BudgetBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BudgetProgress(Budget):
+    """The model to display the progress of a budget."""
+
+    remaining_amount: float
+    progress: Optional[float] = None
+
+
 class Token(BaseModel):
     """The model of token data."""
 
@@ -132,7 +313,7 @@ class TokenData(BaseModel):
 class TransactionUpdate(BaseModel):
     """The model to update the transaction data."""
 
-    amount: Optional[float] = None
+    amount: Optional[Amount] = None
     description: Optional[str] = None
     date: Optional[datetime] = None
     category_id: Optional[int] = None
@@ -145,3 +326,60 @@ class TransactionUpdate(BaseModel):
     def validate_type(cls, v):
         """Validate type."""
         return v.lower() if v else v
+
+
+class BulkImportError(BaseModel):
+    """The model of one rejected row of a bulk import."""
+
+    row: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    """The model of the bulk import outcome."""
+
+    inserted: int
+    errors: list[BulkImportError] = []
+
+
+class TransactionFilter(BaseModel):
+    """The model of the filters selecting transactions."""
+
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    category_ids: Optional[list[int]] = None
+    type: Optional[Literal["income", "expense"]] = None
+
+    @model_validator(mode="after")
+    def validate_criteria(self):
+        """Refuse a filter that would select every transaction."""
+        if all(value is None for value in self.model_dump().values()):
+            raise ValueError("Provide at least one filter criterion")
+        return self
+
+
+class TransactionBatch(BaseModel):
+    """The model selecting the transactions of a batch operation."""
+
+    ids: Optional[list[int]] = Field(default=None, min_length=1)
+    filter: Optional[TransactionFilter] = None
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        """Require exactly one of ids and filter."""
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        return self
+
+
+class TransactionBatchUpdate(TransactionBatch):
+    """The model to update many transactions at once."""
+
+    changes: TransactionUpdate
+
+
+class BatchDeleteResult(BaseModel):
+    """The model of the batch delete outcome."""
+
+    deleted: int
+    ids: list[int] = []
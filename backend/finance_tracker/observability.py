@@ -0,0 +1,152 @@
+"""
+Module observability.
+
+Environment-driven configuration of Sentry error reporting, tracing and
+profiling.
+
+Tracing is sampled: ``SENTRY_TRACES_SAMPLE_RATE`` applies to every request
+unless ``SENTRY_TRACES_SAMPLE_RATES`` assigns a rate to a path prefix, for
+example ``/analytics/summary=0.5,/metrics=0``. Sentry stays off when no
+DSN is configured or ``SENTRY_ENABLED=0``.
+"""
+
+import os
+
+import sentry_sdk
+from sentry_sdk.integrations.fastapi import FastApiIntegration
+from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+
+
+def _rate(value, name):
+    rate = float(value)
+    if not 0.0 <= rate <= 1.0:
+        raise ValueError(f"{name} must be between 0 and 1")
+    return rate
+
+
+def parse_sample_rates(value):
+    """
+    Parse per-path sample rates.
+
+    Args:
+        value: comma-separated ``path=rate`` pairs.
+
+    Returns:
+        dict[str, float]: rate by path prefix
+
+    Raises:
+        ValueError: if a pair is malformed or a rate is out of range.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        path, sep, rate = item.rpartition("=")
+        if not sep or not path:
+            raise ValueError(f"Invalid sample rate entry: {item!r}")
+        rates[path.strip()] = _rate(rate, path)
+    return rates
+
+
+class ObservabilitySettings:
+    """Sentry settings read from the environment."""
+
+    def __init__(self, dsn=None, enabled=None, environment=None,
+                 traces_sample_rate=None, endpoint_sample_rates=None,
+                 profiles_sample_rate=None):
+        """
+        Build the settings, falling back to ``SENTRY_*`` variables.
+
+        Args:
+            dsn: Sentry DSN, SENTRY_DSN by default.
+            enabled: master switch, SENTRY_ENABLED by default.
+            environment: reported environment name.
+            traces_sample_rate: default share of traced requests.
+            endpoint_sample_rates: dict of rate by path prefix.
+            profiles_sample_rate: share of traced requests profiled.
+
+        Raises:
+            ValueError: if a rate is out of range.
+        """
+        env = os.getenv
+        self.dsn = dsn if dsn is not None else env("SENTRY_DSN", "")
+        self.enabled = (enabled if enabled is not None
+                        else env("SENTRY_ENABLED", "1") == "1")
+        self.environment = (environment
+                            or env("SENTRY_ENVIRONMENT", "development"))
+        self.traces_sample_rate = _rate(
+            traces_sample_rate if traces_sample_rate is not None
+            else env("SENTRY_TRACES_SAMPLE_RATE", "0.1"),
+            "traces_sample_rate")
+        self.endpoint_sample_rates = (
+            endpoint_sample_rates if endpoint_sample_rates is not None
+            else parse_sample_rates(env("SENTRY_TRACES_SAMPLE_RATES", "")))
+        self.profiles_sample_rate = _rate(
+            profiles_sample_rate if profiles_sample_rate is not None
+            else env("SENTRY_PROFILES_SAMPLE_RATE", "0"),
+            "profiles_sample_rate")
+
+    @property
+    def active(self):
+        """Return whether Sentry should be initialised."""
+        return self.enabled and bool(self.dsn)
+
+    def rate_for_path(self, path):
+        """
+        Return the trace sample rate of a request path.
+
+        Args:
+            path: request path.
+
+        Returns:
+            float: rate of the longest matching prefix, or the default
+        """
+        best = None
+        for prefix in self.endpoint_sample_rates:
+            if path.startswith(prefix) and (best is None
+                                            or len(prefix) > len(best)):
+                best = prefix
+        if best is None:
+            return self.traces_sample_rate
+        return self.endpoint_sample_rates[best]
+
+    def traces_sampler(self, sampling_context):
+        """
+        Decide the sample rate of a new transaction.
+
+        Args:
+            sampling_context: context passed by the Sentry SDK.
+
+        Returns:
+            float: probability of tracing the transaction
+        """
+        parent = sampling_context.get("parent_sampled")
+        if parent is not None:
+            return float(parent)
+        scope = sampling_context.get("asgi_scope") or {}
+        return self.rate_for_path(scope.get("path", ""))
+
+
+def init_sentry(settings=None):
+    """
+    Initialise Sentry according to the settings.
+
+    Args:
+        settings: ObservabilitySettings, read from the environment by
+            default.
+
+    Returns:
+        bool: True if Sentry was initialised
+    """
+    settings = settings or ObservabilitySettings()
+    if not settings.active:
+        return False
+    sentry_sdk.init(
+        dsn=settings.dsn,
+        integrations=[
+            FastApiIntegration(),
+            SqlalchemyIntegration(),
+        ],
+        traces_sampler=settings.traces_sampler,
+        profiles_sample_rate=settings.profiles_sample_rate,
+        environment=settings.environment
+    )
+    return True
@@ -0,0 +1,403 @@
+"""
+Module recurrence.
+
+Materialization of recurring transactions.
+
+A transaction with ``is_recurring`` set and a ``recurrence_pattern`` is a
+template and its own first occurrence. The scheduler expands every due
+template into ordinary transactions pointing back at it through
+``recurrence_parent_id``. Each template resumes from the high-water mark
+kept in ``recurrence_schedule``, so a run only touches templates with
+occurrences due since the last one. Occurrences are written with batched
+``INSERT OR IGNORE`` calls against a unique (parent, date) index, which
+makes overlapping runs from several workers harmless.
+
+Patterns are ``daily``, ``weekly``, ``monthly``, ``yearly`` or a subset
+of RFC 5545 RRULE: FREQ, INTERVAL, COUNT, UNTIL, BYDAY without ordinals
+and BYMONTHDAY. Occurrences keep the time of day of the template, in
+UTC. Days past the end of a month fall on its last day.
+"""
+
+import calendar
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+
+from finance_tracker.cache import response_cache
+from finance_tracker.database import connect
+from finance_tracker.models import from_timestamp, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+RECURRENCE_INTERVAL = float(os.getenv("FINANCE_RECURRENCE_INTERVAL", "60"))
+RECURRENCE_BATCH_SIZE = int(
+    os.getenv("FINANCE_RECURRENCE_BATCH_SIZE", "500"))
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+# A rule whose periods stay empty this long, such as a daily rule every
+# seventh day on a weekday it never lands on, is treated as exhausted.
+MAX_EMPTY_PERIODS = 1000
+# Longest interval accepted, in periods. Longer ones would step past the
+# last year datetime supports within a period or two.
+MAX_INTERVAL = 1000
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+SELECT_DUE = """
+    SELECT s.transaction_id, s.next_period, s.emitted,
+           t.user_id, t.category_id, t.amount, t.description, t.date,
+           t.type, t.recurrence_pattern
+    FROM recurrence_schedule s
+    JOIN transactions t ON t.id = s.transaction_id
+    WHERE s.next_due <= ?
+    ORDER BY s.next_due
+    LIMIT ?
+"""
+INSERT_OCCURRENCE = """
+    INSERT OR IGNORE INTO transactions
+    (user_id, category_id, amount, description, date, type, is_recurring,
+     recurrence_pattern, recurrence_parent_id)
+    VALUES (?, ?, ?, ?, ?, ?, 0, NULL, ?)
+"""
+UPDATE_SCHEDULE = """
+    UPDATE recurrence_schedule
+    SET next_period = ?, emitted = ?, next_due = ?
+    WHERE transaction_id = ?
+"""
+
+
+def _add_months(year, month, months):
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _parse_until(value):
+    if "T" in value:
+        return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    return datetime.combine(datetime.strptime(value, "%Y%m%d"), time.max)
+
+
+class RecurrenceRule:
+    """A parsed recurrence pattern."""
+
+    def __init__(self, freq, interval=1, count=None, until=None,
+                 by_day=None, by_month_day=None):
+        """
+        Build a rule.
+
+        Args:
+            freq: one of FREQUENCIES.
+            interval: periods between occurrences.
+            count: total number of occurrences, template included.
+            until: last allowed occurrence as a naive UTC datetime.
+            by_day: weekday numbers, Monday being 0.
+            by_month_day: days of the month, negative from the end.
+        """
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.by_day = sorted(set(by_day)) if by_day else None
+        self.by_month_day = by_month_day
+
+    def candidates(self, start, period):
+        """
+        Return the occurrences of one period, ignoring COUNT and UNTIL.
+
+        Args:
+            start: datetime of the template.
+            period: index of the period, 0 being the template's.
+
+        Returns:
+            list[datetime]: ascending occurrences not before ``start``
+        """
+        step = period * self.interval
+        if self.freq == "DAILY":
+            days = [start.date() + timedelta(days=step)]
+            if self.by_day is not None:
+                days = [day for day in days if day.weekday() in self.by_day]
+        elif self.freq == "WEEKLY":
+            week = start.date() + timedelta(days=7 * step - start.weekday())
+            days = [week + timedelta(days=weekday)
+                    for weekday in self.by_day or [start.weekday()]]
+        elif self.freq == "MONTHLY":
+            year, month = _add_months(start.year, start.month, step)
+            length = calendar.monthrange(year, month)[1]
+            month_days = set()
+            for day in self.by_month_day or [start.day]:
+                day = day if day > 0 else length + 1 + day
+                month_days.add(min(max(day, 1), length))
+            days = [start.date().replace(year=year, month=month, day=day)
+                    for day in sorted(month_days)]
+        else:
+            year = start.year + step
+            length = calendar.monthrange(year, start.month)[1]
+            days = [start.date().replace(year=year,
+                                         day=min(start.day, length))]
+        return [moment for moment in
+                (datetime.combine(day, start.time()) for day in days)
+                if moment >= start]
+
+    def expand(self, start, period, emitted, horizon):
+        """
+        Expand the occurrences due up to a horizon.
+
+        Periods are only passed once all of their occurrences are due, so
+        the returned position can be resumed from on the next run.
+
+        Args:
+            start: datetime of the template.
+            period: first period not fully materialized.
+            emitted: occurrences in the periods before ``period``.
+            horizon: last datetime to materialize.
+
+        Returns:
+            tuple: (due occurrences, next period, emitted, next due
+                datetime or None once the rule is exhausted)
+        """
+        due = []
+        empty = 0
+        while True:
+            if self.count is not None and emitted >= self.count:
+                return due, period, emitted, None
+            occurrences = self.candidates(start, period)
+            empty = 0 if occurrences else empty + 1
+            if empty > MAX_EMPTY_PERIODS:
+                return due, period, emitted, None
+            exhausted = False
+            if self.until is not None and occurrences and \
+                    occurrences[-1] > self.until:
+                occurrences = [moment for moment in occurrences
+                               if moment <= self.until]
+                exhausted = True
+            if self.count is not None:
+                occurrences = occurrences[:self.count - emitted]
+            ready = [moment for moment in occurrences if moment <= horizon]
+            due.extend(ready)
+            if len(ready) < len(occurrences):
+                return due, period, emitted, occurrences[len(ready)]
+            period += 1
+            emitted += len(occurrences)
+            if exhausted:
+                return due, period, emitted, None
+
+
+@lru_cache(maxsize=1024)
+def parse_pattern(pattern):
+    """
+    Parse a recurrence pattern.
+
+    Args:
+        pattern: keyword such as "monthly" or an RRULE subset such as
+            "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH".
+
+    Returns:
+        RecurrenceRule: parsed rule
+
+    Raises:
+        ValueError: if the pattern is not supported.
+    """
+    text = pattern.strip().upper()
+    if text in FREQUENCIES:
+        return RecurrenceRule(text)
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    try:
+        parts = dict(part.split("=", 1) for part in text.split(";") if part)
+    except ValueError:
+        raise ValueError(f"Invalid recurrence pattern: {pattern!r}")
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unsupported recurrence frequency: {freq!r}")
+    try:
+        interval = int(parts.pop("INTERVAL", "1"))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+        until = _parse_until(parts["UNTIL"]) if "UNTIL" in parts else None
+        by_month_day = ([int(day) for day in parts["BYMONTHDAY"].split(",")]
+                        if "BYMONTHDAY" in parts else None)
+        by_day = ([WEEKDAYS.index(day) for day in parts["BYDAY"].split(",")]
+                  if "BYDAY" in parts else None)
+    except ValueError:
+        raise ValueError(f"Invalid recurrence pattern: {pattern!r}")
+    parts.pop("COUNT", None)
+    parts.pop("UNTIL", None)
+    parts.pop("BYMONTHDAY", None)
+    parts.pop("BYDAY", None)
+    if parts.pop("WKST", "MO") != "MO" or parts:
+        raise ValueError(f"Unsupported recurrence rule parts: {pattern!r}")
+    if not 1 <= interval <= MAX_INTERVAL or (count is not None
+                                             and count < 1):
+        raise ValueError(f"Invalid recurrence pattern: {pattern!r}")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot be combined")
+    if by_month_day is not None and (
+            freq != "MONTHLY"
+            or not all(1 <= abs(day) <= 31 for day in by_month_day)):
+        raise ValueError(f"Invalid BYMONTHDAY: {pattern!r}")
+    if by_day is not None and freq not in ("DAILY", "WEEKLY"):
+        raise ValueError(f"BYDAY is only supported with DAILY or WEEKLY: "
+                         f"{pattern!r}")
+    return RecurrenceRule(freq, interval, count, until, by_day, by_month_day)
+
+
+def materialize(conn, now, limit=RECURRENCE_BATCH_SIZE):
+    """
+    Materialize the occurrences of up to ``limit`` due templates.
+
+    Runs inside the caller's transaction; the caller commits.
+
+    Args:
+        conn: connection inside a write transaction.
+        now: timestamp up to which occurrences are due.
+        limit: maximum number of templates to process.
+
+    Returns:
+        tuple: (templates processed, inserted rows, ids of the users
+            whose transactions changed)
+    """
+    horizon = from_timestamp(now)
+    templates = conn.execute(SELECT_DUE, (now, limit)).fetchall()
+    rows = []
+    schedule = []
+    for (template_id, period, emitted, user_id, category_id, amount,
+         description, date, type_, pattern) in templates:
+        start = from_timestamp(date)
+        try:
+            rule = parse_pattern(pattern)
+            due, period, emitted, next_due = rule.expand(
+                start, period, emitted, horizon)
+        except (ValueError, OverflowError) as e:
+            # Unparseable patterns and rules stepping out of the datetime
+            # range alike are unscheduled, leaving the other templates be.
+            logger.warning("Transaction %s is not scheduled: %s",
+                           template_id, e)
+            schedule.append((period, emitted, None, template_id))
+            continue
+        rows.extend((user_id, category_id, amount, description,
+                     to_timestamp(moment), type_, template_id)
+                    for moment in due if moment != start)
+        schedule.append((period, emitted,
+                         None if next_due is None else to_timestamp(next_due),
+                         template_id))
+
+    inserted = conn.executemany(INSERT_OCCURRENCE, rows).rowcount
+    conn.executemany(UPDATE_SCHEDULE, schedule)
+    users = {row[0] for row in rows}
+    return len(templates), inserted, users
+
+
+def run_due(conn, now=None, batch_size=RECURRENCE_BATCH_SIZE):
+    """
+    Materialize every due occurrence, one write transaction per batch.
+
+    Args:
+        conn: active connection with database.
+        now: timestamp up to which occurrences are due, now by default.
+        batch_size: templates per write transaction.
+
+    Returns:
+        dict: processed templates and inserted transactions
+    """
+    if now is None:
+        now = to_timestamp(datetime.now(timezone.utc))
+    if conn.in_transaction:
+        conn.commit()
+    processed = inserted = 0
+    users = set()
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count, rows, touched = materialize(conn, now, batch_size)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        processed += count
+        inserted += rows
+        users |= touched
+        if count < batch_size:
+            break
+    for user_id in users:
+        response_cache.bump(user_id)
+    return {"templates": processed, "inserted": inserted}
+
+
+class RecurrenceScheduler:
+    """Background thread materializing recurring transactions."""
+
+    def __init__(self, database=None, interval=RECURRENCE_INTERVAL,
+                 batch_size=RECURRENCE_BATCH_SIZE):
+        """
+        Configure the scheduler without starting it.
+
+        Args:
+            database: path of the database file.
+            interval: seconds between runs.
+            batch_size: templates per write transaction.
+        """
+        self.database = database
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """
+        Materialize every due occurrence on a dedicated connection.
+
+        Args:
+
+        Returns:
+            dict: processed templates and inserted transactions
+        """
+        conn = connect(self.database)
+        try:
+            return run_due(conn, batch_size=self.batch_size)
+        finally:
+            conn.close()
+
+    def _run(self):
+        while True:
+            try:
+                result = self.run_once()
+                if result["inserted"]:
+                    logger.info("Materialized %d recurring transactions",
+                                result["inserted"])
+            except sqlite3.Error:
+                logger.exception("Recurring transaction run failed")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """
+        Start the scheduler thread.
+
+        Args:
+
+        Returns:
+            None
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="recurrence-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the scheduler thread and wait for it to exit.
+
+        Args:
+
+        Returns:
+            None
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
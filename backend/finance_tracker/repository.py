@@ -0,0 +1,602 @@
+"""
+Module repository.
+
+Data access functions backed by fixed, parameterized statements.
+
+Every access pattern maps to exactly one SQL text. Optional filters are
+expressed with bound values instead of string building, so each statement
+is prepared once per pooled connection and then served from sqlite3's
+statement cache for the lifetime of the connection.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from finance_tracker.migrations import BUDGET_AMOUNT
+from finance_tracker.models import to_minor_units, to_timestamp
+
+
+TRANSACTION_FIELDS = ("id", "user_id", "category_id", "amount",
+                      "description", "date", "type", "is_recurring",
+                      "recurrence_pattern", "recurrence_parent_id",
+                      "created_at")
+UPDATABLE_FIELDS = ("amount", "description", "date", "category_id", "type",
+                    "is_recurring", "recurrence_pattern")
+
+# Open bounds of the date range and keyset filters. Dates are stored as
+# 64-bit epoch microseconds, so these compare below and above all of them.
+MIN_DATE = -2 ** 63
+MAX_DATE = 2 ** 63 - 1
+MAX_ID = 2 ** 63 - 1
+
+# Writes hand the written row back with RETURNING (SQLite 3.35+) instead
+# of reading it again by key; older libraries take the second query.
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_TRANSACTION_COLUMNS = ", ".join(TRANSACTION_FIELDS)
+_USER_COLUMNS = "id, username, email, is_locked, created_at"
+_CATEGORY_COLUMNS = "id, name, type, is_predefined, user_id"
+# RETURNING yields rows as written by the statement itself, before the
+# AFTER INSERT trigger fills current_amount, so that one is computed here.
+_BUDGET_COLUMNS = f"""
+    id, user_id, category_id, target_amount, start_date, end_date, name,
+    is_active, ({BUDGET_AMOUNT}) AS current_amount
+"""  # nosec
+
+SELECT_USER_BY_USERNAME = "SELECT * FROM users WHERE username = ?"
+SELECT_USER = f"SELECT {_USER_COLUMNS} FROM users WHERE id = ?"  # nosec
+INSERT_USER = ("INSERT INTO users (username, password, email) "
+               "VALUES (?, ?, ?)")
+INSERT_USER_RETURNING = f"{INSERT_USER} RETURNING {_USER_COLUMNS}"  # nosec
+
+INSERT_TRANSACTION = """
+    INSERT INTO transactions
+    (user_id, category_id, amount, description, date,
+    type, is_recurring, recurrence_pattern)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_TRANSACTION_RETURNING = \
+    f"{INSERT_TRANSACTION} RETURNING {_TRANSACTION_COLUMNS}"  # nosec
+SELECT_TRANSACTION = f"""
+    SELECT {_TRANSACTION_COLUMNS} FROM transactions
+    WHERE id = ? AND user_id = ?
+"""  # nosec
+# Filters left open by the caller are bound to values matching every row.
+# The end of the period and the keyset position share a single upper
+# bound so the whole range is one index range scan on (user_id, date);
+# category and type are checked on the rows in range.
+SELECT_TRANSACTIONS = f"""
+    SELECT {_TRANSACTION_COLUMNS} FROM transactions
+    WHERE user_id = :user_id
+      AND date >= :start
+      AND (date, id) < (:before_date, :before_id)
+      AND (:category_ids IS NULL
+           OR category_id IN (SELECT value FROM json_each(:category_ids)))
+      AND (:type IS NULL OR type = :type)
+    ORDER BY date DESC, id DESC
+    LIMIT :limit
+"""  # nosec
+DELETE_TRANSACTION = "DELETE FROM transactions WHERE id = ? AND user_id = ?"
+# Batch operations select rows either by id, as primary key lookups, or by
+# the listing filters, as one range on (user_id, date). Keeping the two
+# apart lets each statement use its own access path.
+BATCH_SELECTIONS = {
+    "ids": """
+        WHERE user_id = :user_id
+          AND id IN (SELECT value FROM json_each(:ids))
+    """,
+    "filter": """
+        WHERE user_id = :user_id
+          AND date BETWEEN :start AND :end
+          AND (:category_ids IS NULL
+               OR category_id IN (SELECT value FROM json_each(:category_ids)))
+          AND (:type IS NULL OR type = :type)
+    """,
+}
+DELETE_TRANSACTIONS = {
+    selection: f"DELETE FROM transactions {where} RETURNING id"  # nosec
+    for selection, where in BATCH_SELECTIONS.items()
+}
+# Without RETURNING, batches resolve their ids first and then work by id.
+SELECT_BATCH_IDS = {
+    selection: f"SELECT id FROM transactions {where}"  # nosec
+    for selection, where in BATCH_SELECTIONS.items()
+}
+DELETE_TRANSACTIONS_BY_IDS = \
+    f"DELETE FROM transactions {BATCH_SELECTIONS['ids']}"  # nosec
+SELECT_TRANSACTIONS_BY_IDS = f"""
+    SELECT {_TRANSACTION_COLUMNS} FROM transactions {BATCH_SELECTIONS['ids']}
+"""  # nosec
+
+SELECT_CATEGORY = \
+    f"SELECT {_CATEGORY_COLUMNS} FROM categories WHERE id = ?"  # nosec
+SELECT_PREDEFINED_CATEGORIES = (f"SELECT {_CATEGORY_COLUMNS} "  # nosec
+                                "FROM categories WHERE is_predefined = 1")
+SELECT_USER_CATEGORIES = (f"SELECT {_CATEGORY_COLUMNS} "  # nosec
+                          "FROM categories WHERE user_id = ?")
+INSERT_CATEGORY = ("INSERT INTO categories (name, is_predefined, type, "
+                   "user_id) VALUES (?, ?, ?, ?)")
+INSERT_CATEGORY_RETURNING = \
+    f"{INSERT_CATEGORY} RETURNING {_CATEGORY_COLUMNS}"  # nosec
+SELECT_CATEGORY_NAMES = ("SELECT id, name FROM categories "
+                         "WHERE id IN (SELECT value FROM json_each(?))")
+
+INSERT_BUDGET = """
+    INSERT INTO budgets
+    (user_id, category_id, target_amount, start_date, end_date, name)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+INSERT_BUDGET_RETURNING = \
+    f"{INSERT_BUDGET} RETURNING {_BUDGET_COLUMNS}"  # nosec
+SELECT_BUDGET = "SELECT * FROM budgets WHERE id = ?"
+SELECT_BUDGETS = """
+    SELECT * FROM budgets
+    WHERE user_id = :user_id
+      AND (:active_only = 0
+           OR (is_active = 1 AND :now BETWEEN start_date AND end_date))
+"""
+
+
+def get_user_by_username(conn, username):
+    """
+    Return the full row of a user, password hash included.
+
+    Args:
+        conn: active connection with database.
+        username: login name.
+
+    Returns:
+        sqlite3.Row or None: user row
+    """
+    return conn.execute(SELECT_USER_BY_USERNAME, (username,)).fetchone()
+
+
+def get_user(conn, user_id):
+    """
+    Return the public fields of a user.
+
+    Args:
+        conn: active connection with database.
+        user_id: user primary key.
+
+    Returns:
+        sqlite3.Row or None: user row without the password hash
+    """
+    return conn.execute(SELECT_USER, (user_id,)).fetchone()
+
+
+def insert_user(conn, username, password, email):
+    """
+    Insert a user.
+
+    Args:
+        conn: active connection with database.
+        username: login name.
+        password: bcrypt hash.
+        email: contact address.
+
+    Returns:
+        sqlite3.Row: the new user without the password hash
+    """
+    params = (username, password, email)
+    if SUPPORTS_RETURNING:
+        return conn.execute(INSERT_USER_RETURNING, params).fetchone()
+    return get_user(conn, conn.execute(INSERT_USER, params).lastrowid)
+
+
+def transaction_values(user_id, transaction):
+    """
+    Return the INSERT_TRANSACTION parameters of a transaction.
+
+    Args:
+        user_id: owner of the transaction.
+        transaction: TransactionCreate.
+
+    Returns:
+        tuple: bound values in column order, in storage units
+    """
+    return (user_id, transaction.category_id,
+            to_minor_units(transaction.amount), transaction.description,
+            to_timestamp(transaction.date),
+            transaction.type.lower(), transaction.is_recurring,
+            transaction.recurrence_pattern)
+
+
+def insert_transaction(conn, user_id, transaction):
+    """
+    Insert one transaction.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transaction.
+        transaction: TransactionCreate.
+
+    Returns:
+        sqlite3.Row: the new transaction
+    """
+    params = transaction_values(user_id, transaction)
+    if SUPPORTS_RETURNING:
+        return conn.execute(INSERT_TRANSACTION_RETURNING, params).fetchone()
+    transaction_id = conn.execute(INSERT_TRANSACTION, params).lastrowid
+    return get_transaction(conn, transaction_id, user_id)
+
+
+def insert_transactions(conn, values, chunk_size=1000):
+    """
+    Insert many transactions with batched executemany calls.
+
+    Args:
+        conn: active connection with database.
+        values: sequence of transaction_values tuples.
+        chunk_size: rows per executemany call.
+
+    Returns:
+        int: number of inserted rows
+    """
+    for start in range(0, len(values), chunk_size):
+        conn.executemany(INSERT_TRANSACTION,
+                         values[start:start + chunk_size])
+    return len(values)
+
+
+def get_transaction(conn, transaction_id, user_id):
+    """
+    Return a transaction owned by a user.
+
+    Args:
+        conn: active connection with database.
+        transaction_id: transaction primary key.
+        user_id: expected owner.
+
+    Returns:
+        sqlite3.Row or None: transaction row
+    """
+    return conn.execute(SELECT_TRANSACTION,
+                        (transaction_id, user_id)).fetchone()
+
+
+def query_transactions(conn, user_id, start=None, end=None,
+                       category_ids=None, type_=None, after=None, limit=-1):
+    """
+    Run the transaction listing query, newest first.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transactions.
+        start: inclusive timestamp lower bound, open if None.
+        end: inclusive timestamp upper bound, open if None.
+        category_ids: list of accepted category ids, any if None.
+        type_: "income" or "expense", any if None.
+        after: (date, id) of the last row already returned, or None.
+        limit: maximum number of rows, negative for no limit.
+
+    Returns:
+        sqlite3.Cursor: cursor over the matching rows
+    """
+    # date <= end is (date, id) < (end, MAX_ID); keep the tighter bound.
+    before = (MAX_DATE if end is None else end, MAX_ID)
+    if after is not None and tuple(after) < before:
+        before = tuple(after)
+    return conn.execute(SELECT_TRANSACTIONS, {
+        "user_id": user_id,
+        "start": MIN_DATE if start is None else start,
+        "before_date": before[0],
+        "before_id": before[1],
+        "category_ids": (json.dumps(category_ids)
+                         if category_ids is not None else None),
+        "type": type_,
+        "limit": limit,
+    })
+
+
+def list_transactions(conn, user_id, **filters):
+    """
+    Return the rows of query_transactions.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transactions.
+        filters: keyword arguments of query_transactions.
+
+    Returns:
+        list[sqlite3.Row]: matching rows
+    """
+    return query_transactions(conn, user_id, **filters).fetchall()
+
+
+@lru_cache(maxsize=None)
+def update_statement(fields, returning=False):
+    """
+    Return the UPDATE statement assigning a set of columns.
+
+    Only the assigned columns are named, so indexes and rollup triggers on
+    the others are left alone. Texts are memoized per combination of
+    UPDATABLE_FIELDS, which bounds them to 127 cacheable statements per
+    form.
+
+    Args:
+        fields: tuple of column names in UPDATABLE_FIELDS order.
+        returning: whether the statement returns the updated row.
+
+    Returns:
+        str: parameterized statement using named placeholders
+    """
+    unknown = set(fields) - set(UPDATABLE_FIELDS)
+    if unknown or not fields:
+        raise ValueError(f"Cannot update fields: {sorted(unknown)}")
+    assignments = ", ".join(f"{field} = :{field}" for field in fields)
+    suffix = f" RETURNING {_TRANSACTION_COLUMNS}" if returning else ""
+    return (f"UPDATE transactions SET {assignments} "  # nosec
+            f"WHERE id = :id AND user_id = :user_id{suffix}")
+
+
+@lru_cache(maxsize=None)
+def batch_update_statement(fields, selection, returning=True):
+    """
+    Return the UPDATE statement assigning columns of selected rows.
+
+    Args:
+        fields: tuple of column names in UPDATABLE_FIELDS order.
+        selection: key of BATCH_SELECTIONS.
+        returning: whether the statement returns the updated rows.
+
+    Returns:
+        str: parameterized statement using named placeholders
+    """
+    unknown = set(fields) - set(UPDATABLE_FIELDS)
+    if unknown or not fields:
+        raise ValueError(f"Cannot update fields: {sorted(unknown)}")
+    assignments = ", ".join(f"{field} = :{field}" for field in fields)
+    suffix = f" RETURNING {_TRANSACTION_COLUMNS}" if returning else ""
+    return (f"UPDATE transactions SET {assignments} "  # nosec
+            f"{BATCH_SELECTIONS[selection]}{suffix}")
+
+
+def _batch_params(user_id, ids, filters):
+    if ids is not None:
+        return "ids", {"user_id": user_id, "ids": json.dumps(list(ids))}
+    category_ids = filters.get("category_ids")
+    start, end = filters.get("start"), filters.get("end")
+    return "filter", {
+        "user_id": user_id,
+        "start": MIN_DATE if start is None else start,
+        "end": MAX_DATE if end is None else end,
+        "category_ids": (json.dumps(category_ids)
+                         if category_ids is not None else None),
+        "type": filters.get("type_"),
+    }
+
+
+def _ids_params(conn, user_id, selection, params):
+    rows = conn.execute(SELECT_BATCH_IDS[selection], params).fetchall()
+    ids = [row[0] for row in rows]
+    return {"user_id": user_id, "ids": json.dumps(ids)}
+
+
+def update_transaction(conn, transaction_id, user_id, fields):
+    """
+    Update the given fields of a transaction.
+
+    Args:
+        conn: active connection with database.
+        transaction_id: transaction primary key.
+        user_id: expected owner.
+        fields: dict of column values in storage units; None is kept.
+
+    Returns:
+        sqlite3.Row or None: the updated transaction, None if the user
+        owns no such transaction
+    """
+    params = {field: fields[field] for field in UPDATABLE_FIELDS
+              if fields.get(field) is not None}
+    sql = update_statement(tuple(params), SUPPORTS_RETURNING)
+    params.update(id=transaction_id, user_id=user_id)
+    cursor = conn.execute(sql, params)
+    if SUPPORTS_RETURNING:
+        return cursor.fetchone()
+    if cursor.rowcount:
+        return get_transaction(conn, transaction_id, user_id)
+    return None
+
+
+def delete_transaction(conn, transaction_id, user_id):
+    """
+    Delete a transaction owned by a user.
+
+    Args:
+        conn: active connection with database.
+        transaction_id: transaction primary key.
+        user_id: expected owner.
+
+    Returns:
+        int: number of deleted rows
+    """
+    return conn.execute(DELETE_TRANSACTION,
+                        (transaction_id, user_id)).rowcount
+
+
+def update_transactions(conn, user_id, fields, ids=None, filters=None):
+    """
+    Update the given fields of many transactions in one statement.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transactions.
+        fields: dict of column values in storage units; None is kept.
+        ids: transaction ids to update, or None to use ``filters``.
+        filters: start, end, category_ids and type_ as accepted by
+            query_transactions.
+
+    Returns:
+        list[sqlite3.Row]: updated rows ordered by id
+    """
+    selection, params = _batch_params(user_id, ids, filters or {})
+    values = {field: fields[field] for field in UPDATABLE_FIELDS
+              if fields.get(field) is not None}
+    if SUPPORTS_RETURNING:
+        sql = batch_update_statement(tuple(values), selection)
+        rows = conn.execute(sql, {**params, **values}).fetchall()
+    else:
+        # The ids are resolved before the update may move rows out of the
+        # filter.
+        params = _ids_params(conn, user_id, selection, params)
+        conn.execute(batch_update_statement(tuple(values), "ids", False),
+                     {**params, **values})
+        rows = conn.execute(SELECT_TRANSACTIONS_BY_IDS, params).fetchall()
+    return sorted(rows, key=lambda row: row["id"])
+
+
+def delete_transactions(conn, user_id, ids=None, filters=None):
+    """
+    Delete many transactions of a user in one statement.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the transactions.
+        ids: transaction ids to delete, or None to use ``filters``.
+        filters: start, end, category_ids and type_ as accepted by
+            query_transactions.
+
+    Returns:
+        list[int]: deleted ids in ascending order
+    """
+    selection, params = _batch_params(user_id, ids, filters or {})
+    if SUPPORTS_RETURNING:
+        rows = conn.execute(DELETE_TRANSACTIONS[selection],
+                            params).fetchall()
+        return sorted(row[0] for row in rows)
+    params = _ids_params(conn, user_id, selection, params)
+    conn.execute(DELETE_TRANSACTIONS_BY_IDS, params)
+    return sorted(json.loads(params["ids"]))
+
+
+def predefined_categories(conn):
+    """
+    Return the categories visible to every user.
+
+    Args:
+        conn: active connection with database.
+
+    Returns:
+        list[sqlite3.Row]: category rows
+    """
+    return conn.execute(SELECT_PREDEFINED_CATEGORIES).fetchall()
+
+
+def user_categories(conn, user_id):
+    """
+    Return the categories owned by a user.
+
+    Args:
+        conn: active connection with database.
+        user_id: user primary key.
+
+    Returns:
+        list[sqlite3.Row]: category rows
+    """
+    return conn.execute(SELECT_USER_CATEGORIES, (user_id,)).fetchall()
+
+
+def get_category(conn, category_id):
+    """
+    Return a category.
+
+    Args:
+        conn: active connection with database.
+        category_id: category primary key.
+
+    Returns:
+        sqlite3.Row or None: category row
+    """
+    return conn.execute(SELECT_CATEGORY, (category_id,)).fetchone()
+
+
+def insert_category(conn, user_id, category):
+    """
+    Insert a category.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the category.
+        category: CategoryCreate.
+
+    Returns:
+        sqlite3.Row: the new category
+    """
+    params = (category.name, category.is_predefined, category.type, user_id)
+    if SUPPORTS_RETURNING:
+        return conn.execute(INSERT_CATEGORY_RETURNING, params).fetchone()
+    return get_category(conn, conn.execute(INSERT_CATEGORY, params).lastrowid)
+
+
+def category_names(conn, category_ids):
+    """
+    Return the names of categories.
+
+    Args:
+        conn: active connection with database.
+        category_ids: iterable of category primary keys.
+
+    Returns:
+        dict[int, str]: name by category id
+    """
+    rows = conn.execute(SELECT_CATEGORY_NAMES,
+                        (json.dumps(list(category_ids)),)).fetchall()
+    return {row["id"]: row["name"] for row in rows}
+
+
+def insert_budget(conn, user_id, budget):
+    """
+    Insert a budget.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the budget.
+        budget: BudgetCreate.
+
+    Returns:
+        sqlite3.Row: the new budget, in storage units
+    """
+    params = (user_id, budget.category_id,
+              to_minor_units(budget.target_amount),
+              to_timestamp(budget.start_date),
+              to_timestamp(budget.end_date), budget.name)
+    if SUPPORTS_RETURNING:
+        return conn.execute(INSERT_BUDGET_RETURNING, params).fetchone()
+    return get_budget(conn, conn.execute(INSERT_BUDGET, params).lastrowid)
+
+
+def get_budget(conn, budget_id):
+    """
+    Return a budget.
+
+    Args:
+        conn: active connection with database.
+        budget_id: budget primary key.
+
+    Returns:
+        sqlite3.Row or None: budget row
+    """
+    return conn.execute(SELECT_BUDGET, (budget_id,)).fetchone()
+
+
+def list_budgets(conn, user_id, active_only=True, now=None):
+    """
+    Return the budgets of a user.
+
+    Args:
+        conn: active connection with database.
+        user_id: owner of the budgets.
+        active_only: keep only active budgets covering ``now``.
+        now: timestamp, the current time by default.
+
+    Returns:
+        list[sqlite3.Row]: budget rows
+    """
+    if now is None:
+        now = to_timestamp(datetime.now(timezone.utc))
+    return conn.execute(SELECT_BUDGETS, {
+        "user_id": user_id, "active_only": int(active_only),
+        "now": now}).fetchall()
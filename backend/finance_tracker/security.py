@@ -0,0 +1,176 @@
+"""
+Module security.
+
+Password hashing with bcrypt, executed on a bounded worker pool.
+
+bcrypt is deliberately slow and releases the GIL while it works, so the
+async endpoints hand it to dedicated threads instead of blocking the event
+loop for every login or registration.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from prometheus_client import Counter, Gauge, Histogram
+
+
+BCRYPT_ROUNDS = int(os.getenv("FINANCE_BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("FINANCE_PASSWORD_WORKERS", "2"))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("FINANCE_PASSWORD_QUEUE_LIMIT", "64"))
+
+PASSWORD_QUEUE_DEPTH = Gauge(
+    "finance_password_queue_depth",
+    "Password jobs waiting for or running on the worker pool"
+)
+PASSWORD_JOB_SECONDS = Histogram(
+    "finance_password_job_seconds",
+    "Time spent hashing or verifying a password",
+    ["operation"]
+)
+PASSWORD_REJECTED = Counter(
+    "finance_password_rejected_total",
+    "Password jobs rejected because the queue was full"
+)
+
+
+class PasswordQueueFullError(RuntimeError):
+    """Raised when too many password jobs are already queued."""
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Check whether a simple password matches the specified hash.
+
+    Args:
+        plain_password (str): the password is in clear text.
+        hashed_password (str): hash of the password (BCrypt).
+
+    Returns:
+        bool: True if the password is correct, otherwise False
+    """
+    with PASSWORD_JOB_SECONDS.labels("verify").time():
+        return bcrypt.checkpw(plain_password.encode(),
+                              hashed_password.encode())
+
+
+def get_password_hash(password: str) -> str:
+    """
+    Generate hash with the use of bcrypt library.
+
+    Args:
+        password (str): simple password text.
+
+    Returns:
+        str: encrypted value
+    """
+    with PASSWORD_JOB_SECONDS.labels("hash").time():
+        salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+        return bcrypt.hashpw(password.encode(), salt).decode()
+
+
+class PasswordHasher:
+    """Run password jobs on a bounded thread pool."""
+
+    def __init__(self, workers=PASSWORD_WORKERS,
+                 queue_limit=PASSWORD_QUEUE_LIMIT):
+        """
+        Configure the pool; threads start with the first job.
+
+        Args:
+            workers: threads doing bcrypt work concurrently.
+            queue_limit: jobs allowed to wait or run before rejecting.
+        """
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._lock = threading.Lock()
+        self._depth = 0
+
+    @property
+    def depth(self):
+        """Return the number of queued and running jobs."""
+        return self._depth
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password")
+            return self._executor
+
+    def _enter(self):
+        with self._lock:
+            if self._depth >= self.queue_limit:
+                PASSWORD_REJECTED.inc()
+                raise PasswordQueueFullError(
+                    "Too many password operations in progress")
+            self._depth += 1
+        PASSWORD_QUEUE_DEPTH.inc()
+
+    def _leave(self):
+        with self._lock:
+            self._depth -= 1
+        PASSWORD_QUEUE_DEPTH.dec()
+
+    async def _run(self, func, *args):
+        self._enter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args)
+        finally:
+            self._leave()
+
+    async def verify(self, plain_password: str,
+                     hashed_password: str) -> bool:
+        """
+        Verify a password without blocking the event loop.
+
+        Args:
+            plain_password (str): the password is in clear text.
+            hashed_password (str): hash of the password (BCrypt).
+
+        Returns:
+            bool: True if the password is correct, otherwise False
+
+        Raises:
+            PasswordQueueFullError: if the queue limit is reached.
+        """
+        return await self._run(verify_password, plain_password,
+                               hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password without blocking the event loop.
+
+        Args:
+            password (str): simple password text.
+
+        Returns:
+            str: encrypted value
+
+        Raises:
+            PasswordQueueFullError: if the queue limit is reached.
+        """
+        return await self._run(get_password_hash, password)
+
+    def shutdown(self):
+        """
+        Stop the worker threads after running jobs finish.
+
+        Args:
+
+        Returns:
+            None
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,484 @@
+"""
+Module seed.
+
+Synthetic data generator writing straight into SQLite.
+
+Creates users with their own categories, recurring and one-off
+transactions and budgets. Activity is skewed the way real usage is: a few
+users own most transactions, a few categories take most of the spending
+and amounts follow a log-normal distribution. Rows are generated lazily
+and written with batched executemany calls inside one transaction, with
+the rollup triggers replaced by a single aggregation at the end.
+
+Usage::
+
+    python -m finance_tracker.seed --users 1000 --transactions 1000
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from finance_tracker import database
+from finance_tracker.migrations import ROLLUP_PERIODS, \
+    create_budget_triggers, create_rollup_triggers, create_schedule_trigger, \
+    drop_budget_triggers, drop_rollup_triggers, drop_schedule_trigger, \
+    register_templates
+from finance_tracker.models import MICROSECONDS_PER_DAY, day_number, \
+    month_number, to_timestamp
+from finance_tracker.recurrence import RECURRENCE_BATCH_SIZE, materialize
+from finance_tracker.repository import INSERT_TRANSACTION
+from finance_tracker.security import get_password_hash
+
+
+DEFAULT_PASSWORD = "password"  # nosec
+BATCH_SIZE = 10000
+
+# Typical monthly bills: (category name, pattern, median amount).
+RECURRING_EXPENSES = (
+    ("Housing", "monthly", 1200.0),
+    ("Entertainment", "monthly", 15.0),
+    ("Transportation", "monthly", 60.0),
+    ("Healthcare", "monthly", 40.0),
+    ("Food", "weekly", 90.0),
+)
+INCOME_MEDIAN = 3500.0
+EXPENSE_MEDIAN = 25.0
+INCOME_SHARE = 0.08
+CUSTOM_CATEGORY_NAMES = ("Pets", "Gifts", "Travel", "Education", "Kids",
+                         "Subscriptions", "Charity", "Side Project")
+TIMES_OF_DAY = 4096
+
+
+def _cents(rng, median, sigma=0.9):
+    return round(math.exp(rng.gauss(math.log(median), sigma)) * 100)
+
+
+def activity_weights(rng, users, alpha=1.3):
+    """
+    Draw a Pareto-distributed activity weight per user.
+
+    Args:
+        rng: random.Random.
+        users: number of users.
+        alpha: Pareto shape; lower values concentrate more activity.
+
+    Returns:
+        list[float]: weights summing to 1
+    """
+    weights = [rng.paretovariate(alpha) for _ in range(users)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def recurring_dates(start, end, pattern):
+    """
+    List the occurrences of a simple recurrence between two dates.
+
+    Args:
+        start: first occurrence.
+        end: last day, inclusive.
+        pattern: "weekly" or "monthly".
+
+    Returns:
+        list[date]: occurrence days
+    """
+    days = []
+    current = start
+    while current <= end:
+        days.append(current)
+        if pattern == "weekly":
+            current += timedelta(days=7)
+        else:
+            month = current.month % 12 + 1
+            year = current.year + (current.month == 12)
+            current = current.replace(year=year, month=month,
+                                      day=min(start.day, 28))
+    return days
+
+
+class Generator:
+    """Produce the rows of one synthetic dataset."""
+
+    def __init__(self, rng, start, end, transactions_per_user):
+        """
+        Configure the generator.
+
+        Args:
+            rng: random.Random.
+            start: first day of generated transactions.
+            end: last day of generated transactions.
+            transactions_per_user: mean transactions per user.
+        """
+        self.rng = rng
+        self.start = start
+        self.end = end
+        self.span = (end - start).days + 1
+        self.transactions_per_user = transactions_per_user
+        first = to_timestamp(datetime.combine(start, datetime.min.time()))
+        self.days = [first + n * MICROSECONDS_PER_DAY
+                     for n in range(self.span)]
+        # Spending happens during waking hours; draw from a precomputed
+        # sample of times of day rather than one triangular draw per row.
+        self.times = [
+            int(rng.triangular(7 * 3600, 23 * 3600, 14 * 3600)) * 1_000_000
+            for _ in range(TIMES_OF_DAY)]
+
+    def moment(self, day):
+        """
+        Return a stored timestamp on a day.
+
+        Args:
+            day: date.
+
+        Returns:
+            int: epoch microseconds during waking hours
+        """
+        return (self.days[(day - self.start).days]
+                + self.times[int(self.rng.random() * TIMES_OF_DAY)])
+
+    def categories(self, user_id):
+        """
+        Return custom categories of a user as INSERT parameters.
+
+        Args:
+            user_id: owner of the categories.
+
+        Returns:
+            list[tuple]: (name, is_predefined, type, user_id) rows
+        """
+        count = min(len(CUSTOM_CATEGORY_NAMES),
+                    int(self.rng.expovariate(0.7)))
+        names = self.rng.sample(CUSTOM_CATEGORY_NAMES, count)
+        return [(name, 0, "expense", user_id) for name in names]
+
+    def transactions(self, user_id, weight, users, expense_categories,
+                     income_categories, by_name):
+        """
+        Yield the transactions of one user.
+
+        Args:
+            user_id: owner of the transactions.
+            weight: share of all transactions owned by the user.
+            users: number of generated users.
+            expense_categories: expense category ids, most used first.
+            income_categories: income category ids.
+            by_name: predefined category id by name.
+
+        Returns:
+            Iterator[tuple]: INSERT_TRANSACTION parameters
+        """
+        rng = self.rng
+        last = self.end
+        recurring = 0
+        # Recurring series are inserted as templates only; the recurrence
+        # engine expands them once the load is done.
+        salary_day = self.start + timedelta(days=rng.randrange(28))
+        recurring += len(recurring_dates(salary_day, last, "monthly"))
+        yield (user_id, by_name["Salary"],
+               _cents(rng, INCOME_MEDIAN, 0.1), "Salary",
+               self.moment(salary_day), "income", 1, "monthly")
+        for name, pattern, median in RECURRING_EXPENSES:
+            if rng.random() < 0.5:
+                continue
+            first = self.start + timedelta(days=rng.randrange(28))
+            recurring += len(recurring_dates(first, last, pattern))
+            yield (user_id, by_name[name], _cents(rng, median, 0.5), name,
+                   self.moment(first), "expense", 1, pattern)
+
+        count = max(0, round(self.transactions_per_user * users * weight)
+                    - recurring)
+        # Zipf-like preference: the n-th favourite category gets 1/n.
+        ranked = expense_categories[:]
+        rng.shuffle(ranked)
+        zipf = list(itertools.accumulate(1 / (n + 1)
+                                         for n in range(len(ranked))))
+        random_ = rng.random
+        gauss = rng.gauss
+        days, times, span = self.days, self.times, self.span
+        income_mu = math.log(INCOME_MEDIAN / 10 * 100)
+        expense_mu = math.log(EXPENSE_MEDIAN * 100)
+        for _ in range(count):
+            moment = (days[int(random_() * span)]
+                      + times[int(random_() * TIMES_OF_DAY)])
+            if random_() < INCOME_SHARE:
+                category = income_categories[
+                    int(random_() * len(income_categories))]
+                yield (user_id, category,
+                       round(math.exp(gauss(income_mu, 0.9))), None,
+                       moment, "income", 0, None)
+            else:
+                category = ranked[bisect.bisect(zipf,
+                                                random_() * zipf[-1])]
+                yield (user_id, category,
+                       round(math.exp(gauss(expense_mu, 0.9))), None,
+                       moment, "expense", 0, None)
+
+    def budgets(self, user_id, expense_categories, count):
+        """
+        Return monthly budgets of a user as INSERT parameters.
+
+        Args:
+            user_id: owner of the budgets.
+            expense_categories: expense category ids.
+            count: number of budgets.
+
+        Returns:
+            list[tuple]: budget rows
+        """
+        rows = []
+        month = self.end.replace(day=1)
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        start = to_timestamp(datetime.combine(month, datetime.min.time()))
+        end = to_timestamp(
+            datetime.combine(next_month, datetime.min.time())) - 1
+        for category in self.rng.sample(expense_categories,
+                                        min(count, len(expense_categories))):
+            rows.append((user_id, category, _cents(self.rng, 300.0, 0.6),
+                         start, end, "Monthly budget"))
+        return rows
+
+
+def _batches(rows, size):
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class RollupAccumulator:
+    """Aggregate generated transactions the way the rollup triggers do."""
+
+    def __init__(self):
+        """Start with empty totals for every rollup period."""
+        self.periods = [(table, key, defaultdict(lambda: [0, 0]))
+                        for table, key in ROLLUP_PERIODS]
+
+    def add(self, rows):
+        """
+        Account for transactions.
+
+        Args:
+            rows: INSERT_TRANSACTION parameter tuples.
+
+        Returns:
+            None
+        """
+        days = [day_number(row[4]) for row in rows]
+        for _, key, totals in self.periods:
+            periods = days if key == "day" else map(month_number, days)
+            for row, period in zip(rows, periods):
+                entry = totals[row[0], period, row[1], row[5]]
+                entry[0] += row[2]
+                entry[1] += 1
+
+    def write(self, conn):
+        """
+        Merge the accumulated totals into the rollup tables.
+
+        Args:
+            conn: connection inside the load transaction.
+
+        Returns:
+            None
+        """
+        # Table and column names come from ROLLUP_PERIODS only.
+        for table, key, totals in self.periods:
+            conn.executemany(
+                f"INSERT INTO {table} (user_id, {key}, category_id, type, "
+                f"total, count) VALUES (?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT (user_id, {key}, category_id, type) "
+                f"DO UPDATE SET total = total + excluded.total, "
+                f"count = count + excluded.count",  # nosec
+                (key_ + (total, count)
+                 for key_, (total, count) in totals.items()))
+
+
+def seed(conn, users=100, transactions=1000, budgets=3, months=12,
+         password=DEFAULT_PASSWORD, prefix="user", seed_value=None,
+         batch_size=BATCH_SIZE, end=None):
+    """
+    Generate a dataset into an open database.
+
+    Args:
+        conn: connection to a migrated database.
+        users: number of new users.
+        transactions: mean transactions per user.
+        budgets: budgets per user.
+        months: months of history ending at ``end``.
+        password: password of every new user.
+        prefix: username prefix; names continue after existing users.
+        seed_value: seed of the random generator.
+        batch_size: rows per executemany call.
+        end: last day of history, today by default.
+
+    Returns:
+        dict: number of inserted rows per table
+    """
+    rng = random.Random(seed_value)
+    end = end or date.today()
+    start = end - timedelta(days=round(months * 30.44))
+    generator = Generator(rng, start, end, transactions)
+    # bcrypt is slow on purpose, so all users share one hash.
+    hashed = get_password_hash(password)
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        first_user = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0] + 1
+        first_category = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM categories").fetchone()[0] + 1
+        conn.executemany(
+            "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+            ((f"{prefix}{n}", hashed, f"{prefix}{n}@example.com")
+             for n in range(first_user, first_user + users)))
+        user_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM users WHERE id >= ? ORDER BY id",
+            (first_user,))]
+
+        conn.executemany(
+            "INSERT INTO categories (name, is_predefined, type, user_id) "
+            "VALUES (?, ?, ?, ?)",
+            (row for user_id in user_ids
+             for row in generator.categories(user_id)))
+        predefined = conn.execute(
+            "SELECT id, name, type FROM categories WHERE is_predefined = 1"
+        ).fetchall()
+        by_name = {row[1]: row[0] for row in predefined}
+        income = [row[0] for row in predefined if row[2] == "income"]
+        expense = [row[0] for row in predefined if row[2] == "expense"]
+        custom = {}
+        for category_id, user_id in conn.execute(
+                "SELECT id, user_id FROM categories WHERE id >= ?",
+                (first_category,)):
+            custom.setdefault(user_id, []).append(category_id)
+
+        # Row-by-row trigger maintenance would dominate the load time, so
+        # the rollups of the new rows are aggregated here instead and the
+        # templates are scheduled in one statement. The new users have no
+        # budgets yet; theirs are summed when they are inserted below.
+        first_transaction = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0] + 1
+        drop_rollup_triggers(conn.cursor())
+        drop_schedule_trigger(conn.cursor())
+        drop_budget_triggers(conn.cursor())
+        rollups = RollupAccumulator()
+        weights = activity_weights(rng, len(user_ids))
+        rows = (row for user_id, weight in zip(user_ids, weights)
+                for row in generator.transactions(
+                    user_id, weight, len(user_ids),
+                    expense + custom.get(user_id, []), income, by_name))
+        inserted = 0
+        for batch in _batches(rows, batch_size):
+            conn.executemany(INSERT_TRANSACTION, batch)
+            rollups.add(batch)
+            inserted += len(batch)
+        rollups.write(conn)
+        create_rollup_triggers(conn.cursor())
+        register_templates(conn.cursor(), first_transaction)
+        create_schedule_trigger(conn.cursor())
+        create_budget_triggers(conn.cursor())
+        horizon = to_timestamp(datetime.combine(end, datetime.max.time()))
+        while True:
+            templates, rows, _ = materialize(conn, horizon)
+            inserted += rows
+            if templates < RECURRENCE_BATCH_SIZE:
+                break
+
+        budget_rows = [row for user_id in user_ids
+                       for row in generator.budgets(
+                           user_id, expense + custom.get(user_id, []),
+                           budgets)]
+        conn.executemany(
+            "INSERT INTO budgets (user_id, category_id, target_amount, "
+            "start_date, end_date, name) VALUES (?, ?, ?, ?, ?, ?)",
+            budget_rows)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    return {
+        "users": len(user_ids),
+        "categories": sum(len(ids) for ids in custom.values()),
+        "transactions": inserted,
+        "budgets": len(budget_rows),
+    }
+
+
+def main(argv=None):
+    """
+    Parse command line arguments and seed the configured database.
+
+    Args:
+        argv: arguments, sys.argv[1:] by default.
+
+    Returns:
+        int: exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m finance_tracker.seed",
+        description="Generate synthetic finance data into SQLite.")
+    parser.add_argument("--db", default=None,
+                        help="database file, FINANCE_DB_PATH by default")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=1000,
+                        help="mean transactions per user")
+    parser.add_argument("--budgets", type=int, default=3,
+                        help="budgets per user")
+    parser.add_argument("--months", type=int, default=12,
+                        help="months of history")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--prefix", default="user",
+                        help="username prefix")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for reproducible datasets")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    # A plain connection: per-statement instrumentation is pointless for
+    # a bulk load, and durability of synthetic data is not worth an fsync.
+    conn = sqlite3.connect(args.db or database.DATABASE_NAME)
+    try:
+        database.PROFILE.apply(conn)
+        database.setup_database(conn)
+        conn.execute("PRAGMA synchronous = OFF")
+        # Generated ids are valid by construction; skipping the parent
+        # lookups and giving index updates a large page cache roughly
+        # halves the insert time.
+        conn.execute("PRAGMA foreign_keys = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        started = time.perf_counter()
+        counts = seed(conn, users=args.users,
+                      transactions=args.transactions,
+                      budgets=args.budgets, months=args.months,
+                      password=args.password, prefix=args.prefix,
+                      seed_value=args.seed, batch_size=args.batch_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    total = sum(counts.values())
+    print(json.dumps({
+        "database": args.db or database.DATABASE_NAME,
+        "rows": counts,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed) if elapsed else None,
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
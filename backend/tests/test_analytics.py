@@ -0,0 +1,109 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from finance_tracker.analytics import summarize
+from finance_tracker.database import connect, setup_database
+from finance_tracker.models import from_minor_units, to_minor_units, \
+    to_timestamp
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "analytics.db"))
+    setup_database(conn=conn)
+    conn.execute(
+        "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+        ("analyst", "hash", "analyst@example.com")
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _raw_summary(conn, start, end):
+    totals = conn.execute("""
+        SELECT
+            SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END),
+            SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END)
+        FROM transactions WHERE user_id = 1 AND date BETWEEN ? AND ?
+    """, (to_timestamp(start), to_timestamp(end))).fetchone()
+    categories = conn.execute("""
+        SELECT c.name, SUM(t.amount) FROM transactions t
+        JOIN categories c ON t.category_id = c.id
+        WHERE t.user_id = 1 AND t.type = 'expense'
+        AND t.date BETWEEN ? AND ? GROUP BY c.name
+    """, (to_timestamp(start), to_timestamp(end))).fetchall()
+    return (from_minor_units(totals[0] or 0),
+            from_minor_units(totals[1] or 0),
+            {name: from_minor_units(total) for name, total in categories})
+
+
+def _insert_random(conn, rng, count):
+    categories = [row["id"] for row in conn.execute(
+        "SELECT id FROM categories")]
+    base = datetime(2024, 11, 20)
+    rows = []
+    for _ in range(count):
+        rows.append((
+            1, rng.choice(categories),
+            to_minor_units(round(rng.uniform(1, 500), 2)),
+            to_timestamp(
+                base + timedelta(minutes=rng.randrange(0, 60 * 24 * 120))),
+            rng.choice(["income", "expense"])
+        ))
+    conn.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) "
+        "VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+
+
+def _assert_matches(conn, start, end):
+    result = summarize(conn, 1, start, end)
+    income, expenses, by_name = _raw_summary(conn, start, end)
+    # Totals are summed in integer cents, so they match exactly.
+    assert result["total_income"] == income
+    assert result["total_expenses"] == expenses
+    assert {row["name"]: row["total"]
+            for row in result["expenses_by_category"]} == by_name
+    totals = [row["total"] for row in result["expenses_by_category"]]
+    assert totals == sorted(totals, reverse=True)
+
+
+def test_summary_matches_raw_scan(conn):
+    rng = random.Random(7)
+    _insert_random(conn, rng, 600)
+    base = datetime(2024, 11, 15)
+    for _ in range(40):
+        start = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 130))
+        end = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 100))
+        _assert_matches(conn, start, end)
+    _assert_matches(conn, datetime(2024, 12, 1), datetime(2025, 2, 28))
+    _assert_matches(conn, datetime(2025, 1, 5, 12), datetime(2025, 1, 5, 18))
+
+
+def test_rollups_follow_updates_and_deletes(conn):
+    rng = random.Random(11)
+    _insert_random(conn, rng, 200)
+    ids = [row[0] for row in conn.execute("SELECT id FROM transactions")]
+    food = conn.execute(
+        "SELECT id FROM categories WHERE name = 'Food'").fetchone()[0]
+    for txn_id in ids[:50]:
+        conn.execute(
+            "UPDATE transactions SET amount = amount * 2, category_id = ?, "
+            "date = ? WHERE id = ?",
+            (food, to_timestamp(datetime(2025, 1, 15)), txn_id))
+    conn.execute("DELETE FROM transactions WHERE id IN (%s)"
+                 % ",".join(map(str, ids[50:120])))
+    conn.commit()
+    _assert_matches(conn, datetime(2024, 11, 1), datetime(2025, 4, 1))
+    _assert_matches(conn, datetime(2025, 1, 15), datetime(2025, 1, 15, 1))
+
+    orphans = conn.execute(
+        "SELECT COUNT(*) FROM daily_rollups WHERE count = 0").fetchone()[0]
+    assert orphans == 0
+
+
+def test_summary_of_empty_period(conn):
+    result = summarize(conn, 1, datetime(2025, 3, 1), datetime(2025, 2, 1))
+    assert result == {"total_income": 0, "total_expenses": 0,
+                      "net_balance": 0, "expenses_by_category": []}
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from finance_tracker import database
+from finance_tracker.async_db import AsyncConnection, async_connection, \
+    get_async_db
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_NAME", str(tmp_path / "a.db"))
+    database.close_pool()
+    database.setup_database()
+    yield database.get_pool()
+    database.close_pool()
+
+
+@pytest.mark.asyncio
+async def test_async_connection_runs_off_the_event_loop(pool):
+    loop_thread = threading.get_ident()
+    async with async_connection() as db:
+        thread = await db.run(lambda conn: threading.get_ident())
+        row = await db.fetchone("SELECT COUNT(*) AS n FROM categories")
+    assert thread != loop_thread
+    assert row["n"] > 0
+    assert pool.opened == 1
+
+
+@pytest.mark.asyncio
+async def test_async_connection_writes_and_rolls_back(pool):
+    async with async_connection() as db:
+        cursor = await db.execute(
+            "INSERT INTO users (username, password, email) "
+            "VALUES (?, ?, ?)", ("async", "x", "async@example.com"))
+        assert cursor.lastrowid
+        await db.rollback()
+        await db.executemany(
+            "INSERT INTO users (username, password, email) "
+            "VALUES (?, ?, ?)",
+            [("a1", "x", "a1@example.com"), ("a2", "x", "a2@example.com")])
+        await db.commit()
+        rows = await db.fetchall("SELECT username FROM users "
+                                 "ORDER BY username")
+    assert [row["username"] for row in rows] == ["a1", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_slow_query_does_not_block_other_requests(pool):
+    executor = ThreadPoolExecutor(max_workers=2)
+    conn = database.connect()
+    db = AsyncConnection(conn, executor)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.ensure_future(ticker())
+    await db.run(lambda conn: time.sleep(0.2))
+    task.cancel()
+    conn.close()
+    executor.shutdown()
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_get_async_db_returns_connection(pool):
+    dependency = get_async_db()
+    db = await dependency.__anext__()
+    assert isinstance(db, AsyncConnection)
+    with pytest.raises(StopAsyncIteration):
+        await dependency.__anext__()
+    assert pool.opened == 1
+    async with async_connection() as again:
+        assert again.conn is db.conn
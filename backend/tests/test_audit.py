@@ -0,0 +1,141 @@
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from finance_tracker.audit import AuditWriter
+from finance_tracker.database import connect, setup_database
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "audit.db")
+    conn = connect(path)
+    setup_database(conn=conn)
+    conn.execute("INSERT INTO users (username, password, email) "
+                 "VALUES ('auditor', 'hash', 'auditor@example.com')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _rows(path):
+    conn = connect(path)
+    try:
+        return [tuple(row) for row in conn.execute(
+            "SELECT user_id, action, table_name, record_id FROM audit_log "
+            "ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def _wait_for_rows(path, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        rows = _rows(path)
+        if len(rows) >= count:
+            return rows
+        time.sleep(0.01)
+    return _rows(path)
+
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+def test_flush_writes_queued_events_in_batches(path):
+    writer = AuditWriter(path, batch_size=3, flush_interval=60)
+    written = _sample("finance_audit_events_written_total")
+    for record_id in range(7):
+        assert writer.record(1, "create", "transactions", record_id)
+    assert writer.depth == 7
+    assert writer.flush() == 7
+    assert writer.depth == 0
+    assert _rows(path) == [(1, "create", "transactions", record_id)
+                           for record_id in range(7)]
+    assert _sample("finance_audit_events_written_total") == written + 7
+    writer.stop()
+
+
+def test_full_queue_drops_counts_and_logs(path, caplog):
+    writer = AuditWriter(path, queue_size=2)
+    labels = {"reason": "queue_full"}
+    dropped = _sample("finance_audit_events_dropped_total", labels)
+    assert writer.record(1, "create", "budgets", 1)
+    assert writer.record(1, "create", "budgets", 2)
+    started = time.monotonic()
+    assert not writer.record(1, "create", "budgets", 3)
+    assert time.monotonic() - started < 0.05
+    assert _sample("finance_audit_events_dropped_total", labels) == \
+        dropped + 1
+    assert "dropped event: user_id=1 action=create table=budgets " \
+        "record_id=3" in caplog.text
+    writer.stop()
+    assert [row[3] for row in _rows(path)] == [1, 2]
+
+
+def test_record_many_queues_one_list(path, caplog):
+    writer = AuditWriter(path, queue_size=5, batch_size=2)
+    labels = {"reason": "queue_full"}
+    dropped = _sample("finance_audit_events_dropped_total", labels)
+    assert writer.record_many(1, "delete", "transactions", [1, 2, 3])
+    assert writer.record_many(1, "delete", "transactions", [])
+    assert writer.depth == 3
+    assert not writer.record_many(1, "delete", "transactions", [4, 5, 6])
+    assert _sample("finance_audit_events_dropped_total", labels) == \
+        dropped + 3
+    assert caplog.text.count("dropped event") == 3
+    assert writer.record(1, "delete", "transactions", 7)
+    assert writer.flush() == 4
+    writer.stop()
+    assert [row[3] for row in _rows(path)] == [1, 2, 3, 7]
+
+
+def test_thread_flushes_a_full_batch(path):
+    writer = AuditWriter(path, batch_size=2, flush_interval=60)
+    writer.start()
+    try:
+        writer.record(1, "update", "transactions", 1)
+        writer.record(1, "delete", "transactions", 1)
+        assert len(_wait_for_rows(path, 2)) == 2
+    finally:
+        writer.stop()
+
+
+def test_thread_flushes_after_the_interval(path):
+    writer = AuditWriter(path, batch_size=100, flush_interval=0.05)
+    writer.start()
+    try:
+        writer.record(1, "create", "categories", 11)
+        assert _wait_for_rows(path, 1) == [(1, "create", "categories", 11)]
+    finally:
+        writer.stop()
+
+
+def test_stop_flushes_pending_events(path):
+    writer = AuditWriter(path, batch_size=1000, flush_interval=60)
+    writer.start()
+    for record_id in range(50):
+        writer.record(1, "create", "transactions", record_id)
+    writer.stop()
+    assert len(_rows(path)) == 50
+    assert writer.depth == 0
+
+
+def test_failed_write_is_counted(tmp_path):
+    writer = AuditWriter(str(tmp_path / "empty.db"))
+    labels = {"reason": "write_error"}
+    dropped = _sample("finance_audit_events_dropped_total", labels)
+    writer.record(1, "create", "users", 1)
+    writer.flush()
+    assert _sample("finance_audit_events_dropped_total", labels) == \
+        dropped + 1
+    writer.stop()
+
+
+def test_clear_discards_events(path):
+    writer = AuditWriter(path)
+    writer.record(1, "create", "users", 1)
+    writer.clear()
+    writer.stop()
+    assert _rows(path) == []
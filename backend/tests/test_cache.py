@@ -0,0 +1,110 @@
+from finance_tracker.cache import TTLCache, ResponseCache, CategoryCache
+from finance_tracker.database import connect, setup_database
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_hit_and_miss():
+    cache = TTLCache("test", maxsize=4, ttl=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache("test", maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache("test", maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_invalidate_and_clear():
+    cache = TTLCache("test", maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.misses == 0
+
+
+def test_response_cache_generations():
+    cache = ResponseCache("test", maxsize=8, ttl=10)
+    key = cache.key(1, "summary", [("b", "2"), ("a", "1")])
+    assert key == cache.key(1, "summary", [("a", "1"), ("b", "2")])
+    etag = cache.etag(b'{"total":1}')
+    cache.set(key, {"total": 1}, {}, etag)
+    assert cache.get(key) == ({"total": 1}, {}, etag)
+
+    cache.bump(1)
+    fresh = cache.key(1, "summary", [("a", "1"), ("b", "2")])
+    assert fresh != key
+    assert cache.get(fresh) is None
+    assert cache.etag(b'{"total":2}') != etag
+    assert cache.key(2, "summary", []) == (2, "summary", (), 0)
+
+
+def test_category_cache_reads_predefined_once(tmp_path):
+    conn = connect(str(tmp_path / "categories.db"))
+    setup_database(conn=conn)
+    conn.executemany(
+        "INSERT INTO users (username, password, email) VALUES (?, 'h', ?)",
+        [("a", "a@example.com"), ("b", "b@example.com")])
+    conn.executemany(
+        "INSERT INTO categories (name, type, user_id) VALUES (?, ?, ?)",
+        [("Pets", "expense", 1), ("Tips", "income", 2)])
+    statements = []
+    conn.set_trace_callback(statements.append)
+    cache = CategoryCache("test", maxsize=8, ttl=60)
+
+    assert cache.get(1) is None
+    first = cache.load(conn, 1)
+    second = cache.load(conn, 2)
+    assert sum("is_predefined = 1" in sql for sql in statements) == 1
+    names = [row["name"] for row in first.values()]
+    assert "Pets" in names and "Tips" not in names and "Food" in names
+    assert list(first) == sorted(first)
+    assert "Tips" in [row["name"] for row in second.values()]
+
+    count = len(statements)
+    assert cache.get(1) == first
+    assert len(statements) == count
+    conn.close()
+
+
+def test_category_cache_invalidation(tmp_path):
+    conn = connect(str(tmp_path / "invalidate.db"))
+    setup_database(conn=conn)
+    cache = CategoryCache("test", maxsize=8, ttl=60)
+    cache.load(conn, 1)
+    cache.load(conn, 2)
+    cache.invalidate(1)
+    assert cache.get(1) is None
+    assert cache.get(2) is not None
+    cache.invalidate(1, predefined=True)
+    assert cache.get(2) is None
+    conn.close()
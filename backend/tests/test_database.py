@@ -1,6 +1,10 @@
 import pytest
 import sqlite3
-from finance_tracker.database import setup_database, get_db_connection
+from finance_tracker import database
+from finance_tracker.database import setup_database, get_db_connection, \
+    connect, ConnectionPool, PoolTimeoutError, get_db, get_pool, close_pool, \
+    StorageProfile, WalCheckpointer, statement_template, InstrumentedCursor
+from prometheus_client import REGISTRY
 
 
 @pytest.fixture
@@ -47,8 +51,143 @@ def test_setup_database(in_memory_db):
         sqlite3.connect = original_connect
 
 
-def test_get_db_connection():
+def test_get_db_connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_NAME",
+                        str(tmp_path / "finance.db"))
     conn = get_db_connection()
     assert isinstance(conn, sqlite3.Connection)
     assert conn.row_factory == sqlite3.Row
     conn.close()
+
+
+def test_connect_applies_pragmas(tmp_path):
+    conn = connect(str(tmp_path / "pragmas.db"))
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.row_factory == sqlite3.Row
+    conn.close()
+
+
+def test_pool_reuses_connections(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.opened == 1
+    pool.close()
+
+
+def test_pool_is_bounded(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1, timeout=0.01)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    pool.close()
+
+
+def test_pool_replaces_broken_connection(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert fresh.execute("SELECT 1").fetchone()[0] == 1
+    assert pool.opened == 1
+    pool.release(fresh)
+    pool.close()
+
+
+def test_pool_rolls_back_on_release(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=1)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close()
+
+
+def test_get_db_returns_connection_to_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_NAME", str(tmp_path / "dep.db"))
+    close_pool()
+    dependency = get_db()
+    conn = next(dependency)
+    assert get_pool().opened == 1
+    dependency.close()
+    with get_pool().connection() as again:
+        assert again is conn
+    close_pool()
+
+
+def test_storage_profile_applies_wal(tmp_path):
+    profile = StorageProfile(synchronous="normal", busy_timeout=1234)
+    conn = connect(str(tmp_path / "wal.db"), profile=profile)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    conn.close()
+
+
+def test_storage_profile_rejects_unknown_values():
+    with pytest.raises(ValueError):
+        StorageProfile(journal_mode="bogus")
+    with pytest.raises(ValueError):
+        StorageProfile(synchronous="sometimes")
+
+
+def test_wal_checkpointer(tmp_path):
+    path = str(tmp_path / "wal.db")
+    conn = connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+    conn.commit()
+    checkpointer = WalCheckpointer(path, interval=0.01, mode="truncate")
+    busy, _, _ = checkpointer.checkpoint()
+    assert busy == 0
+    checkpointer.start()
+    checkpointer.stop()
+    conn.close()
+
+
+def test_statement_template():
+    assert statement_template(
+        "SELECT *\n  FROM t WHERE id IN (?, ?,?)  AND x = ?"
+    ) == "SELECT * FROM t WHERE id IN (?+) AND x = ?"
+
+
+def test_instrumented_connection_records_queries(tmp_path):
+    conn = connect(str(tmp_path / "metrics.db"))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(5)])
+    template = "SELECT x FROM t WHERE x < ?"
+    labels = {"statement": template}
+    before_rows = REGISTRY.get_sample_value(
+        "finance_db_rows_returned_total", labels) or 0
+    before_count = REGISTRY.get_sample_value(
+        "finance_db_query_duration_seconds_count", labels) or 0
+
+    cursor = conn.execute("SELECT x FROM t\n WHERE x < ?", (3,))
+    assert isinstance(cursor, InstrumentedCursor)
+    assert len(cursor.fetchall()) == 3
+    assert REGISTRY.get_sample_value(
+        "finance_db_rows_returned_total", labels) == before_rows + 3
+    assert REGISTRY.get_sample_value(
+        "finance_db_query_duration_seconds_count", labels) == before_count + 1
+    conn.close()
+
+
+def test_slow_queries_are_logged_with_plan(tmp_path, monkeypatch, caplog):
+    conn = connect(str(tmp_path / "slow.db"))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    monkeypatch.setattr(database, "SLOW_QUERY_MS", 0)
+    with caplog.at_level("WARNING", logger="finance_tracker.database"):
+        conn.execute("SELECT x FROM t WHERE x = ?", (1,)).fetchall()
+    assert "Slow query" in caplog.text
+    assert "SCAN t" in caplog.text
+    conn.close()
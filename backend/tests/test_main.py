@@ -1,21 +1,34 @@
+import base64
+import json
 import pytest
-import sqlite3
 from fastapi.testclient import TestClient
 from datetime import datetime, timedelta, timezone
 from jose import jwt
-from finance_tracker.main import app, get_db_connection, SECRET_KEY, \
-    ALGORITHM, get_password_hash
-from finance_tracker.database import setup_database
+from prometheus_client import REGISTRY
+from finance_tracker import database
+from finance_tracker.main import app, SECRET_KEY, ALGORITHM, \
+    _stream_transactions
+from finance_tracker.security import get_password_hash
+from finance_tracker.cache import user_cache, response_cache, \
+    category_cache
+from finance_tracker.audit import audit_writer
+from finance_tracker.database import setup_database, get_db_connection
+from finance_tracker.models import to_minor_units, to_timestamp
+from finance_tracker.recurrence import run_due
 
 
 @pytest.fixture(scope="function")
-def client():
-    conn = sqlite3.connect(":memory:")
-    conn.row_factory = sqlite3.Row
-    setup_database(conn=conn)
-    app.dependency_overrides[get_db_connection] = lambda: conn
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_NAME",
+                        str(tmp_path / "finance.db"))
+    database.close_pool()
+    user_cache.clear()
+    response_cache.clear()
+    category_cache.clear()
+    audit_writer.clear()
+    setup_database()
     yield TestClient(app)
-    conn.close()
+    database.close_pool()
 
 
 @pytest.fixture
@@ -227,8 +240,8 @@ async def test_update_transaction(client, test_user):
     cursor.execute(
         "INSERT INTO transactions (user_id, category_id, amount, date, type, "
         "is_recurring) VALUES (?, ?, ?, ?, ?, ?)",
-        (test_user["id"], category_id, 100.0, datetime.now(timezone.utc),
-         "expense", False)
+        (test_user["id"], category_id, to_minor_units(100.0),
+         to_timestamp(datetime.now(timezone.utc)), "expense", False)
     )
     transaction_id = cursor.lastrowid
     conn.commit()
@@ -265,8 +278,8 @@ async def test_delete_transaction(client, test_user):
         "INSERT INTO transactions "
         "(user_id, category_id, amount, date, type, is_recurring) "
         "VALUES (?, ?, ?, ?, ?, ?)",
-        (test_user["id"], category_id, 100.0, datetime.now(timezone.utc),
-         "expense", False)
+        (test_user["id"], category_id, to_minor_units(100.0),
+         to_timestamp(datetime.now(timezone.utc)), "expense", False)
     )
     transaction_id = cursor.lastrowid
     conn.commit()
@@ -282,3 +295,679 @@ async def test_delete_transaction(client, test_user):
         headers={"Authorization": f"Bearer {token}"}
     )
     assert response.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_create_transaction_invalid_category(client, test_user):
+    token = jwt.encode(
+        {"sub": "testuser",
+         "exp": datetime.now(timezone.utc) + timedelta(minutes=30)},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+    response = client.post(
+        "/transactions/",
+        json={
+            "amount": 10.0,
+            "date": datetime.now(timezone.utc).isoformat(),
+            "type": "expense",
+            "category_id": 9999
+        },
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid category_id"
+
+
+@pytest.mark.asyncio
+async def test_requests_share_pooled_connection(client, test_user):
+    token = jwt.encode(
+        {"sub": "testuser",
+         "exp": datetime.now(timezone.utc) + timedelta(minutes=30)},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+    for _ in range(3):
+        response = client.get(
+            "/categories/",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+    assert database.get_pool().opened == 1
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached(client, test_user):
+    token = jwt.encode(
+        {"sub": "testuser",
+         "exp": datetime.now(timezone.utc) + timedelta(minutes=30)},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/budgets/", headers=headers).status_code == 200
+    assert client.get("/budgets/", headers=headers).status_code == 200
+    assert user_cache.misses == 1
+    assert user_cache.hits == 1
+
+
+def _auth_headers():
+    token = jwt.encode(
+        {"sub": "testuser",
+         "exp": datetime.now(timezone.utc) + timedelta(minutes=30)},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _insert_transactions(user_id, count, type_="expense"):
+    conn = get_db_connection()
+    category_id = conn.execute(
+        "SELECT id FROM categories WHERE name = 'Food'"
+    ).fetchone()["id"]
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    conn.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(user_id, category_id, to_minor_units(i + 1),
+          to_timestamp(base + timedelta(days=i // 2)), type_)
+         for i in range(count)]
+    )
+    conn.commit()
+    conn.close()
+    return category_id
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_keyset_pagination(client, test_user):
+    _insert_transactions(test_user["id"], 7)
+    headers = _auth_headers()
+    seen = []
+    params = {"limit": 3}
+    pages = 0
+    while True:
+        response = client.get("/transactions/", params=params,
+                              headers=headers)
+        assert response.status_code == 200
+        seen.extend(txn["id"] for txn in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 7
+
+    dates = [txn["date"] for txn in client.get(
+        "/transactions/", headers=headers).json()]
+    assert dates == sorted(dates, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_field_projection(client, test_user):
+    _insert_transactions(test_user["id"], 2)
+    response = client.get(
+        "/transactions/",
+        params={"fields": "amount,type", "limit": 1},
+        headers=_auth_headers()
+    )
+    assert response.status_code == 200
+    assert response.json() == [{"amount": 2.0, "type": "expense"}]
+    assert "X-Next-Cursor" in response.headers
+
+    response = client.get(
+        "/transactions/",
+        params={"fields": "amount,password"},
+        headers=_auth_headers()
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_transactions_invalid_cursor(client, test_user):
+    crafted = [b"[1.5e999, 1]", b"[1, 1e999]", b"[%d, 1]" % 2 ** 63,
+               b"[1, %d]" % 2 ** 63, b"[1, -1]", b'{"a": 1}', b"[[], 1]"]
+    for cursor in ["not-a-cursor"] + [
+            base64.urlsafe_b64encode(raw).decode() for raw in crafted]:
+        response = client.get(
+            "/transactions/",
+            params={"cursor": cursor},
+            headers=_auth_headers()
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+    response = client.get(
+        "/transactions/",
+        params={"limit": 0},
+        headers=_auth_headers()
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_transactions_csv(client, test_user, monkeypatch):
+    monkeypatch.setattr("finance_tracker.main.EXPORT_BATCH_SIZE", 2)
+    _insert_transactions(test_user["id"], 5)
+    response = client.get("/transactions/export", headers=_auth_headers())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("id,user_id,category_id,amount")
+    assert len(lines) == 6
+
+
+@pytest.mark.asyncio
+async def test_export_releases_the_pool_between_batches(client, test_user,
+                                                        monkeypatch):
+    monkeypatch.setattr("finance_tracker.main.EXPORT_BATCH_SIZE", 2)
+    _insert_transactions(test_user["id"], 5)
+    pool = database.ConnectionPool(database.DATABASE_NAME, size=1,
+                                   timeout=0.1)
+    monkeypatch.setattr(database, "_pool", pool)
+    chunks = _stream_transactions(test_user["id"], {}, "ndjson")
+    try:
+        assert len(next(chunks).splitlines()) == 2
+        # The only connection is free while the client reads a batch.
+        with pool.connection():
+            pass
+        rows = [json.loads(line) for chunk in chunks
+                for line in chunk.splitlines()]
+    finally:
+        pool.close()
+    assert len(rows) == 3
+    assert len({row["id"] for row in rows}) == 3
+
+
+@pytest.mark.asyncio
+async def test_export_transactions_ndjson_filters(client, test_user):
+    category_id = _insert_transactions(test_user["id"], 3)
+    _insert_transactions(test_user["id"], 2, type_="income")
+    response = client.get(
+        "/transactions/export",
+        params={"format": "ndjson", "type_": "income",
+                "category_id": str(category_id)},
+        headers=_auth_headers()
+    )
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 2
+    assert {row["type"] for row in rows} == {"income"}
+
+    response = client.get(
+        "/transactions/export",
+        params={"format": "xml"},
+        headers=_auth_headers()
+    )
+    assert response.status_code == 422
+
+
+def _food_category_id():
+    conn = get_db_connection()
+    category_id = conn.execute(
+        "SELECT id FROM categories WHERE name = 'Food'"
+    ).fetchone()["id"]
+    conn.close()
+    return category_id
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_json(client, test_user, monkeypatch):
+    monkeypatch.setattr("finance_tracker.main.BULK_CHUNK_SIZE", 2)
+    category_id = _food_category_id()
+    rows = [{"amount": float(i), "date": "2025-01-01T00:00:00",
+             "type": "expense", "category_id": category_id}
+            for i in range(5)]
+    rows.append({"amount": 1.0, "date": "2025-01-01T00:00:00",
+                 "type": "expense", "category_id": 9999})
+    rows.append({"amount": "lots", "type": "expense"})
+    response = client.post("/transactions/bulk", json=rows,
+                           headers=_auth_headers())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted"] == 5
+    assert [error["row"] for error in body["errors"]] == [5, 6]
+    assert body["errors"][0]["error"] == "Invalid category_id"
+
+    listed = client.get("/transactions/", headers=_auth_headers()).json()
+    assert len(listed) == 5
+
+
+@pytest.mark.parametrize("amount", ["Infinity", "-Infinity", "NaN",
+                                    "1e17", "1e300"])
+@pytest.mark.asyncio
+async def test_unstorable_amounts_are_rejected(client, test_user, amount):
+    row = ('{"amount": %s, "date": "2025-01-01T00:00:00", '
+           '"type": "expense", "category_id": %d}'
+           % (amount, _food_category_id()))
+    headers = {**_auth_headers(), "Content-Type": "application/json"}
+    response = client.post("/transactions/", content=row, headers=headers)
+    assert response.status_code == 422
+
+    response = client.post("/transactions/bulk",
+                           content=f"[{row}, {row.replace(amount, '1')}]",
+                           headers=headers)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+    assert [error["row"] for error in response.json()["errors"]] == [0]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_csv_and_ndjson(client, test_user):
+    category_id = _food_category_id()
+    csv_body = ("amount,date,type,category_id,description\n"
+                f"10.5,2025-02-01T00:00:00,expense,{category_id},\n"
+                f"3,2025-02-02T00:00:00,income,{category_id},gift\n")
+    response = client.post(
+        "/transactions/bulk", content=csv_body,
+        headers={**_auth_headers(), "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"inserted": 2, "errors": []}
+
+    ndjson_body = json.dumps({"amount": 1.0, "date": "2025-02-03T00:00:00",
+                              "type": "expense",
+                              "category_id": category_id}) + "\n"
+    response = client.post(
+        "/transactions/bulk",
+        files={"file": ("statement.ndjson", ndjson_body)},
+        headers=_auth_headers()
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+
+    response = client.post(
+        "/transactions/bulk", content="<xml/>",
+        headers={**_auth_headers(), "Content-Type": "application/xml"}
+    )
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize("content_type, body", [
+    ("application/json", b"\xff\xfe[]"),
+    ("application/x-ndjson", b"\xff\xfe{}"),
+    ("text/csv", b"amount,date\n\xff,\xfe\n"),
+    ("text/csv", b'amount\n"' + b"1" * 200000 + b'"\n'),
+])
+@pytest.mark.asyncio
+async def test_bulk_import_malformed_payload(client, test_user,
+                                             content_type, body):
+    response = client.post(
+        "/transactions/bulk", content=body,
+        headers={**_auth_headers(), "Content-Type": content_type}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Malformed payload"
+
+
+@pytest.mark.asyncio
+async def test_summary_is_cached_until_write(client, test_user):
+    headers = _auth_headers()
+    params = {"start_date": "2025-01-01T00:00:00",
+              "end_date": "2025-12-31T00:00:00"}
+    first = client.get("/analytics/summary", params=params, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = client.get("/analytics/summary", params=params, headers=headers)
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == etag
+    assert response_cache.hits == 1
+
+    not_modified = client.get("/analytics/summary", params=params,
+                              headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    response = client.post(
+        "/transactions/",
+        json={"amount": 42.0, "date": "2025-06-01T00:00:00",
+              "type": "expense", "category_id": _food_category_id()},
+        headers=headers
+    )
+    assert response.status_code == 200
+
+    fresh = client.get("/analytics/summary", params=params,
+                       headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert fresh.json()["total_expenses"] == 42.0
+
+
+@pytest.mark.asyncio
+async def test_revalidation_sees_other_writers(client, test_user,
+                                               monkeypatch):
+    monkeypatch.setattr(response_cache._entries, "ttl", 0)
+    _insert_transactions(test_user["id"], 1)
+    headers = _auth_headers()
+    first = client.get("/transactions/", headers=headers)
+    etag = first.headers["ETag"]
+    not_modified = client.get("/transactions/",
+                              headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    # Written behind the back of this worker's generation counter.
+    _insert_transactions(test_user["id"], 1)
+    fresh = client.get("/transactions/",
+                       headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert len(fresh.json()) == 2
+
+
+@pytest.mark.asyncio
+async def test_transactions_cache_invalidated_by_delete(client, test_user):
+    _insert_transactions(test_user["id"], 2)
+    headers = _auth_headers()
+    listed = client.get("/transactions/", headers=headers).json()
+    assert len(listed) == 2
+    assert client.get("/transactions/", headers=headers).json() == listed
+
+    response = client.delete(f"/transactions/{listed[0]['id']}",
+                             headers=headers)
+    assert response.status_code == 204
+    assert len(client.get("/transactions/", headers=headers).json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_budget_progress_follows_transactions(client, test_user):
+    headers = _auth_headers()
+    food = _food_category_id()
+    now = datetime.now(timezone.utc)
+    budget = client.post("/budgets/", json={
+        "target_amount": 200.0, "category_id": food, "name": "Food",
+        "start_date": (now - timedelta(days=10)).isoformat(),
+        "end_date": (now + timedelta(days=10)).isoformat()},
+        headers=headers).json()
+    assert budget["current_amount"] == 0.0
+
+    created = client.post("/transactions/", json={
+        "amount": 50.25, "date": now.isoformat(), "type": "expense",
+        "category_id": food}, headers=headers).json()
+    client.post("/transactions/", json={
+        "amount": 99.0, "date": (now - timedelta(days=30)).isoformat(),
+        "type": "expense", "category_id": food}, headers=headers)
+    progress = client.get("/budgets/progress", headers=headers).json()
+    assert [(row["id"], row["current_amount"], row["remaining_amount"],
+             row["progress"]) for row in progress] == \
+        [(budget["id"], 50.25, 149.75, 0.25125)]
+
+    client.patch(f"/transactions/{created['id']}", json={"amount": 20.0},
+                 headers=headers)
+    progress = client.get("/budgets/progress", headers=headers).json()
+    assert progress[0]["current_amount"] == 20.0
+
+    client.delete(f"/transactions/{created['id']}", headers=headers)
+    progress = client.get("/budgets/progress", headers=headers).json()
+    assert progress[0]["current_amount"] == 0.0
+    assert client.get("/budgets/", headers=headers).json()[0][
+        "current_amount"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_writes_are_audited(client, test_user):
+    headers = _auth_headers()
+    registered = client.post("/register", json={
+        "username": "audited", "email": "audited@example.com",
+        "password": "password123"}).json()
+    category = client.post("/categories/", json={
+        "name": "Audited", "type": "expense"}, headers=headers).json()
+    created = client.post("/transactions/", json={
+        "amount": 5.0, "date": "2025-01-01T00:00:00", "type": "expense",
+        "category_id": category["id"]}, headers=headers).json()
+    client.patch(f"/transactions/{created['id']}", json={"amount": 6.0},
+                 headers=headers)
+    client.delete(f"/transactions/{created['id']}", headers=headers)
+    budget = client.post("/budgets/", json={
+        "target_amount": 10.0, "start_date": "2025-01-01T00:00:00",
+        "end_date": "2025-01-31T00:00:00"}, headers=headers).json()
+    audit_writer.stop()
+
+    conn = get_db_connection()
+    rows = [tuple(row) for row in conn.execute(
+        "SELECT user_id, action, table_name, record_id FROM audit_log "
+        "ORDER BY id")]
+    user_id = test_user["id"]
+    assert rows == [
+        (registered["id"], "create", "users", registered["id"]),
+        (user_id, "create", "categories", category["id"]),
+        (user_id, "create", "transactions", created["id"]),
+        (user_id, "update", "transactions", created["id"]),
+        (user_id, "delete", "transactions", created["id"]),
+        (user_id, "create", "budgets", budget["id"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_categories_are_cached(client, test_user):
+    headers = _auth_headers()
+    first = client.get("/categories/", headers=headers).json()
+    hits = category_cache.hits
+    assert client.get("/categories/", headers=headers).json() == first
+    assert category_cache.hits == hits + 1
+    expense = client.get("/categories/", params={"type_": "expense"},
+                         headers=headers).json()
+    assert {row["type"] for row in expense} == {"expense"}
+
+    created = client.post("/categories/", json={
+        "name": "Garden", "type": "income"}, headers=headers).json()
+    listed = client.get("/categories/", params={"type_": "expense"},
+                        headers=headers).json()
+    assert created["id"] in [row["id"] for row in listed]
+
+
+@pytest.mark.asyncio
+async def test_category_ownership_uses_the_cache(client, test_user):
+    headers = _auth_headers()
+    client.get("/categories/", headers=headers)
+    conn = get_db_connection()
+    # Categories created behind the cache, as by another worker.
+    own = conn.execute(
+        "INSERT INTO categories (name, type, user_id) "
+        "VALUES ('Boat', 'expense', ?)", (test_user["id"],)).lastrowid
+    conn.execute("INSERT INTO users (username, password, email) "
+                 "VALUES ('other', 'hash', 'other@example.com')")
+    foreign = conn.execute(
+        "INSERT INTO categories (name, type, user_id) "
+        "VALUES ('Yacht', 'expense', "
+        "(SELECT id FROM users WHERE username = 'other'))").lastrowid
+    conn.commit()
+
+    body = {"amount": 1.0, "date": "2025-01-01T00:00:00",
+            "type": "expense"}
+    response = client.post("/transactions/", json={
+        **body, "category_id": own}, headers=headers)
+    assert response.status_code == 200
+    created = response.json()
+    response = client.post("/transactions/", json={
+        **body, "category_id": foreign}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid category_id"
+    response = client.patch(f"/transactions/{created['id']}", json={
+        "category_id": foreign}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_update_missing_transaction(client, test_user):
+    for body in ({"amount": 1.0}, {}, {"category_id": 10 ** 6}):
+        response = client.patch("/transactions/999", json=body,
+                                headers=_auth_headers())
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Transaction not found"
+
+
+@pytest.mark.asyncio
+async def test_delete_template_with_occurrences(client, test_user):
+    headers = _auth_headers()
+    body = {"amount": 900.0, "date": "2024-01-01T00:00:00",
+            "type": "expense", "category_id": _food_category_id(),
+            "is_recurring": True, "recurrence_pattern": "monthly"}
+    templates = [client.post("/transactions/", json=body,
+                             headers=headers).json()["id"]
+                 for _ in range(2)]
+    conn = get_db_connection()
+    run_due(conn, to_timestamp(datetime(2024, 6, 30)))
+    conn.close()
+
+    response = client.delete(f"/transactions/{templates[0]}",
+                             headers=headers)
+    assert response.status_code == 204
+    response = client.request("DELETE", "/transactions/batch", json={
+        "ids": [templates[1]]}, headers=headers)
+    assert response.json() == {"deleted": 1, "ids": [templates[1]]}
+    listed = client.get("/transactions/", headers=headers).json()
+    assert len(listed) == 10
+    assert {row["recurrence_parent_id"] for row in listed} == {None}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pattern", [
+    "fortnightly", "FREQ=YEARLY;INTERVAL=10000",
+])
+async def test_unexpandable_patterns_are_rejected(client, test_user,
+                                                  pattern):
+    headers = _auth_headers()
+    body = {"amount": 5.0, "date": "2025-01-01T00:00:00", "type": "expense",
+            "category_id": _food_category_id(), "is_recurring": True}
+    response = client.post("/transactions/", json={
+        **body, "recurrence_pattern": pattern}, headers=headers)
+    assert response.status_code == 422
+
+    response = client.post("/transactions/bulk", json=[
+        {**body, "recurrence_pattern": pattern}, body], headers=headers)
+    assert response.json()["inserted"] == 1
+    assert [error["row"] for error in response.json()["errors"]] == [0]
+
+    transaction_id = client.get("/transactions/",
+                                headers=headers).json()[0]["id"]
+    changes = {"recurrence_pattern": pattern}
+    response = client.patch(f"/transactions/{transaction_id}",
+                            json=changes, headers=headers)
+    assert response.status_code == 422
+    response = client.patch("/transactions/batch", json={
+        "ids": [transaction_id], "changes": changes}, headers=headers)
+    assert response.status_code == 422
+    listed = client.get("/transactions/", headers=headers).json()
+    assert [row["recurrence_pattern"] for row in listed] == [None]
+
+
+@pytest.mark.asyncio
+async def test_batch_update_by_ids_and_filter(client, test_user):
+    _insert_transactions(test_user["id"], 6)
+    headers = _auth_headers()
+    listed = client.get("/transactions/", headers=headers).json()
+    ids = sorted(row["id"] for row in listed)[:3]
+    transport = client.get("/categories/", params={"type_": "expense"},
+                           headers=headers).json()
+    transport = next(row["id"] for row in transport
+                     if row["name"] == "Transportation")
+
+    response = client.patch("/transactions/batch", json={
+        "ids": ids + [10 ** 6], "changes": {"category_id": transport}},
+        headers=headers)
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == ids
+    assert {row["category_id"] for row in response.json()} == {transport}
+
+    response = client.patch("/transactions/batch", json={
+        "filter": {"start_date": "2025-01-02T00:00:00",
+                   "category_ids": [transport]},
+        "changes": {"amount": 7.5, "description": "Bus"}}, headers=headers)
+    assert response.status_code == 200
+    assert [(row["id"], row["amount"], row["description"])
+            for row in response.json()] == [(ids[2], 7.5, "Bus")]
+    listed = client.get("/transactions/", headers=headers).json()
+    assert sum(row["amount"] for row in listed) == 1 + 2 + 7.5 + 4 + 5 + 6
+
+
+@pytest.mark.asyncio
+async def test_batch_update_rejects_bad_requests(client, test_user):
+    _insert_transactions(test_user["id"], 2)
+    headers = _auth_headers()
+    ids = [row["id"] for row in
+           client.get("/transactions/", headers=headers).json()]
+    for body in ({"changes": {"amount": 1.0}},
+                 {"ids": ids, "filter": {"type": "expense"},
+                  "changes": {"amount": 1.0}},
+                 {"ids": [], "changes": {"amount": 1.0}},
+                 {"filter": {}, "changes": {"amount": 1.0}},
+                 {"filter": {"end_date": None}, "changes": {"amount": 1.0}}):
+        response = client.patch("/transactions/batch", json=body,
+                                headers=headers)
+        assert response.status_code == 422
+    response = client.patch("/transactions/batch", json={
+        "ids": ids, "changes": {}}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "No fields to update"
+    response = client.patch("/transactions/batch", json={
+        "ids": ids, "changes": {"category_id": 10 ** 6}}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid category_id"
+
+
+@pytest.mark.asyncio
+async def test_batch_delete(client, test_user):
+    _insert_transactions(test_user["id"], 4)
+    _insert_transactions(test_user["id"], 2, type_="income")
+    headers = _auth_headers()
+    listed = client.get("/transactions/", headers=headers).json()
+    expense = sorted(row["id"] for row in listed if row["type"] == "expense")
+
+    response = client.request("DELETE", "/transactions/batch", json={
+        "ids": expense[:2]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 2, "ids": expense[:2]}
+
+    for selection in ({"ids": []}, {"filter": {}},
+                      {"filter": {"category_ids": None}}):
+        response = client.request("DELETE", "/transactions/batch",
+                                  json=selection, headers=headers)
+        assert response.status_code == 422
+    assert len(client.get("/transactions/", headers=headers).json()) == 4
+
+    response = client.request("DELETE", "/transactions/batch", json={
+        "filter": {"type": "expense"}}, headers=headers)
+    assert response.json() == {"deleted": 2, "ids": expense[2:]}
+    remaining = client.get("/transactions/", headers=headers).json()
+    assert {row["type"] for row in remaining} == {"income"}
+
+    audit_writer.stop()
+    conn = get_db_connection()
+    deleted = [row[0] for row in conn.execute(
+        "SELECT record_id FROM audit_log WHERE action = 'delete' "
+        "ORDER BY id")]
+    assert deleted == expense
+
+
+@pytest.mark.asyncio
+async def test_batch_leaves_other_users_alone(client, test_user):
+    _insert_transactions(test_user["id"], 2)
+    conn = get_db_connection()
+    other = conn.execute(
+        "INSERT INTO users (username, password, email) "
+        "VALUES ('other', 'hash', 'other@example.com')").lastrowid
+    conn.commit()
+    conn.close()
+    _insert_transactions(other, 2)
+    headers = _auth_headers()
+    own = {row["id"] for row in
+           client.get("/transactions/", headers=headers).json()}
+
+    response = client.request("DELETE", "/transactions/batch", json={
+        "ids": list(range(1, 5))}, headers=headers)
+    assert set(response.json()["ids"]) == own
+    conn = get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM transactions WHERE user_id = ?",
+                        (other,)).fetchone()[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_endpoints_are_instrumented(client, test_user):
+    labels = {"method": "GET", "route": "/transactions/", "status": "200"}
+    before = REGISTRY.get_sample_value(
+        "finance_http_requests_total", labels) or 0
+    client.get("/transactions/", headers=_auth_headers())
+    assert REGISTRY.get_sample_value(
+        "finance_http_requests_total", labels) == before + 1
+    assert "finance_http_request_duration_seconds_bucket" in \
+        client.get("/metrics/").text
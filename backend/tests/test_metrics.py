@@ -0,0 +1,50 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from finance_tracker.metrics import PrometheusMiddleware, UNMATCHED_ROUTE
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"item_id": item_id}
+
+    return TestClient(app)
+
+
+def test_requests_are_labelled_by_route_template():
+    client = _client()
+    before = _sample("finance_http_requests_total", method="GET",
+                     route="/items/{item_id}", status="200")
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/0")
+    assert _sample("finance_http_requests_total", method="GET",
+                   route="/items/{item_id}", status="200") == before + 2
+    assert _sample("finance_http_requests_total", method="GET",
+                   route="/items/{item_id}", status="404") >= 1
+    assert _sample("finance_http_request_duration_seconds_count",
+                   method="GET", route="/items/{item_id}") >= 3
+    assert _sample("finance_http_response_size_bytes_sum",
+                   method="GET", route="/items/{item_id}") > 0
+    assert _sample("finance_http_requests_in_flight", method="GET",
+                   route="/items/{item_id}") == 0
+
+
+def test_unknown_paths_share_one_label():
+    client = _client()
+    before = _sample("finance_http_requests_total", method="GET",
+                     route=UNMATCHED_ROUTE, status="404")
+    client.get("/nope/1")
+    client.get("/nope/2")
+    assert _sample("finance_http_requests_total", method="GET",
+                   route=UNMATCHED_ROUTE, status="404") == before + 2
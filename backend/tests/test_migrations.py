@@ -0,0 +1,214 @@
+import random
+import sqlite3
+from datetime import datetime
+from finance_tracker import migrations
+from finance_tracker.migrations import migrate, current_version, \
+    LATEST_VERSION, PREDEFINED_CATEGORIES
+from finance_tracker.models import day_number, month_number, to_timestamp
+from finance_tracker.database import setup_database, connect
+
+
+def test_migrate_fresh_database(tmp_path):
+    conn = connect(str(tmp_path / "fresh.db"))
+    applied = migrate(conn)
+    assert applied == list(range(1, LATEST_VERSION + 1))
+    assert current_version(conn) == LATEST_VERSION
+    predefined = conn.execute(
+        "SELECT COUNT(*) FROM categories WHERE is_predefined = 1"
+    ).fetchone()[0]
+    assert predefined == len(PREDEFINED_CATEGORIES)
+    conn.close()
+
+
+def test_migrate_is_idempotent(tmp_path):
+    conn = connect(str(tmp_path / "again.db"))
+    migrate(conn)
+    assert migrate(conn) == []
+    predefined = conn.execute(
+        "SELECT COUNT(*) FROM categories WHERE is_predefined = 1"
+    ).fetchone()[0]
+    assert predefined == len(PREDEFINED_CATEGORIES)
+    conn.close()
+
+
+def test_setup_database_keeps_data(tmp_path):
+    conn = connect(str(tmp_path / "keep.db"))
+    setup_database(conn=conn)
+    conn.execute(
+        "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+        ("keeper", "hash", "keeper@example.com")
+    )
+    conn.commit()
+    setup_database(conn=conn)
+    user = conn.execute(
+        "SELECT username FROM users WHERE username = ?", ("keeper",)
+    ).fetchone()
+    assert user["username"] == "keeper"
+    conn.close()
+
+
+def test_migrate_adopts_unversioned_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.execute("""
+        CREATE TABLE categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            is_predefined BOOLEAN DEFAULT FALSE,
+            user_id INTEGER,
+            UNIQUE(name, user_id)
+        )
+    """)
+    conn.execute("INSERT INTO categories (name, type, is_predefined) "
+                 "VALUES ('Food', 'expense', 1)")
+    conn.commit()
+    migrate(conn)
+    food = conn.execute(
+        "SELECT COUNT(*) FROM categories WHERE name = 'Food'"
+    ).fetchone()[0]
+    assert food == 1
+    assert current_version(conn) == LATEST_VERSION
+    conn.close()
+
+
+def test_integer_storage_migration_converts_rows(tmp_path, monkeypatch):
+    conn = connect(str(tmp_path / "v3.db"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:3])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", 3)
+    migrate(conn)
+    conn.execute(
+        "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+        ("old", "hash", "old@example.com"))
+    conn.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) "
+        "VALUES (1, 5, ?, ?, 'expense')",
+        [(0.1, "2024-01-31T23:30:00+00:00"), (0.2, "2024-01-31T10:00:00"),
+         (19.99, "2024-02-01T00:00:00.000001"), (5.0, "2024-03-01")])
+    conn.execute("DELETE FROM transactions WHERE amount = 5.0")
+    conn.commit()
+    monkeypatch.undo()
+
+    assert migrate(conn) == list(range(4, LATEST_VERSION + 1))
+    rows = conn.execute(
+        "SELECT amount, date FROM transactions ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [
+        (10, to_timestamp(datetime(2024, 1, 31, 23, 30))),
+        (20, to_timestamp(datetime(2024, 1, 31, 10))),
+        (1999, to_timestamp(datetime(2024, 2, 1, 0, 0, 0, 1)))]
+    monthly = conn.execute(
+        "SELECT month, total, count FROM monthly_rollups ORDER BY month"
+    ).fetchall()
+    assert [tuple(row) for row in monthly] == [(2024 * 12, 30, 2),
+                                               (2024 * 12 + 1, 1999, 1)]
+    # AUTOINCREMENT still skips the id of the deleted transaction.
+    cursor = conn.execute(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) "
+        "VALUES (1, 5, 100, 0, 'expense')")
+    assert cursor.lastrowid == 5
+    conn.close()
+
+
+def test_rollup_keys_match_python_calendar(tmp_path):
+    conn = connect(str(tmp_path / "keys.db"))
+    migrate(conn)
+    moments = [datetime(1969, 12, 31, 23, 59, 59, 999999),
+               datetime(1970, 1, 1), datetime(1900, 3, 1, 12),
+               datetime(2024, 2, 29, 23, 59, 59), datetime(2024, 3, 1)]
+    for moment in moments:
+        timestamp = to_timestamp(moment)
+        day, month = conn.execute(
+            "SELECT " + migrations.ROLLUP_KEYS["day"].format(date=":ts")
+            + ", " + migrations.ROLLUP_KEYS["month"].format(date=":ts"),
+            {"ts": timestamp}).fetchone()
+        assert day == day_number(timestamp)
+        assert month == month_number(day_number(timestamp))
+    conn.close()
+
+
+def test_budget_migration_converts_rows(tmp_path, monkeypatch):
+    conn = connect(str(tmp_path / "v5.db"))
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:5])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", 5)
+    migrate(conn)
+    conn.execute(
+        "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+        ("old", "hash", "old@example.com"))
+    conn.executemany(
+        "INSERT INTO transactions (user_id, category_id, amount, date, type) "
+        "VALUES (1, ?, ?, ?, ?)",
+        [(5, 1250, to_timestamp(datetime(2024, 3, 1)), "expense"),
+         (6, 300, to_timestamp(datetime(2024, 3, 31, 23)), "expense"),
+         (5, 999, to_timestamp(datetime(2024, 3, 15)), "income"),
+         (5, 700, to_timestamp(datetime(2024, 4, 1, 0, 0, 1)), "expense")])
+    conn.executemany(
+        "INSERT INTO budgets (user_id, category_id, target_amount, "
+        "start_date, end_date) VALUES (1, ?, 100.1, ?, ?)",
+        [(5, "2024-03-01 00:00:00", "2024-04-01 00:00:00"),
+         (None, "2024-03-01T00:00:00", "2024-03-31T23:59:59")])
+    conn.commit()
+    monkeypatch.undo()
+
+    assert migrate(conn) == list(range(6, LATEST_VERSION + 1))
+    rows = conn.execute(
+        "SELECT target_amount, current_amount, start_date, end_date "
+        "FROM budgets ORDER BY id").fetchall()
+    assert [tuple(row) for row in rows] == [
+        (10010, 1250, to_timestamp(datetime(2024, 3, 1)),
+         to_timestamp(datetime(2024, 4, 1))),
+        (10010, 1550, to_timestamp(datetime(2024, 3, 1)),
+         to_timestamp(datetime(2024, 3, 31, 23, 59, 59)))]
+    conn.close()
+
+
+def test_budget_amounts_follow_transaction_writes(tmp_path):
+    conn = connect(str(tmp_path / "budgets.db"))
+    migrate(conn)
+    rng = random.Random(5)
+    conn.executemany(
+        "INSERT INTO users (username, password, email) VALUES (?, 'h', ?)",
+        [("a", "a@example.com"), ("b", "b@example.com")])
+    day = to_timestamp(datetime(2024, 1, 1)) // 86400000000 * 86400000000
+
+    def moment():
+        return day + rng.randrange(90) * 86400000000 + rng.randrange(10)
+
+    def category():
+        return rng.choice([5, 6, 7, None])
+
+    for user_id in (1, 2):
+        for _ in range(6):
+            start = moment()
+            conn.execute(
+                "INSERT INTO budgets (user_id, category_id, target_amount, "
+                "start_date, end_date) VALUES (?, ?, 10000, ?, ?)",
+                (user_id, category(), start,
+                 start + rng.randrange(40) * 86400000000))
+    for _ in range(300):
+        conn.execute(
+            "INSERT INTO transactions (user_id, category_id, amount, date, "
+            "type) VALUES (?, ?, ?, ?, ?)",
+            (rng.choice((1, 2)), category() or 8, rng.randrange(1, 5000),
+             moment(), rng.choice(("income", "expense"))))
+    ids = [row[0] for row in conn.execute("SELECT id FROM transactions")]
+    for txn_id in rng.sample(ids, 120):
+        column, value = rng.choice([
+            ("amount", rng.randrange(1, 5000)), ("date", moment()),
+            ("category_id", category() or 8), ("user_id", rng.choice((1, 2))),
+            ("type", rng.choice(("income", "expense")))])
+        conn.execute(f"UPDATE transactions SET {column} = ? "  # nosec
+                     "WHERE id = ?", (value, txn_id))
+    conn.execute("DELETE FROM transactions WHERE id IN (%s)"
+                 % ",".join(map(str, rng.sample(ids, 80))))
+    conn.execute("UPDATE budgets SET end_date = end_date + 86400000000 * 7 "
+                 "WHERE id % 3 = 0")
+    conn.commit()
+
+    maintained = conn.execute(
+        "SELECT id, current_amount FROM budgets ORDER BY id").fetchall()
+    expected = conn.execute(
+        "SELECT id, (" + migrations.BUDGET_AMOUNT + ") FROM budgets "
+        "ORDER BY id").fetchall()
+    assert [tuple(row) for row in maintained] == \
+        [tuple(row) for row in expected]
+    assert any(row[1] for row in maintained)
+    conn.close()
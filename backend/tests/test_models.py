@@ -1,12 +1,16 @@
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pydantic import ValidationError
 from finance_tracker.models import (
     UserBase, UserCreate, User,
     CategoryBase, CategoryCreate, Category,
     TransactionBase, TransactionCreate, Transaction,
     BudgetBase, BudgetCreate, Budget,
-    Token, TokenData, TransactionUpdate
+    Token, TokenData, TransactionUpdate,
+    TransactionBatch, TransactionBatchUpdate,
+    to_minor_units, from_minor_units, to_timestamp, from_timestamp,
+    day_number, month_number, month_first_day,
+    transaction_to_storage, transaction_from_storage
 )
 
 
@@ -164,3 +168,72 @@ def test_transaction_update():
 
     with pytest.raises(ValidationError):
         TransactionUpdate(type="invalid")
+
+
+def test_transaction_batch_selects_by_ids_or_filter():
+    assert TransactionBatch(ids=[1, 2]).filter is None
+    batch = TransactionBatchUpdate(filter={"type": "income"},
+                                   changes={"amount": 5.0})
+    assert batch.filter.type == "income"
+    assert batch.changes.amount == 5.0
+
+    with pytest.raises(ValidationError):
+        TransactionBatch()
+    with pytest.raises(ValidationError):
+        TransactionBatch(ids=[1], filter={"type": "income"})
+    with pytest.raises(ValidationError):
+        TransactionBatch(filter={"type": "transfer"})
+    with pytest.raises(ValidationError):
+        TransactionBatch(ids=[])
+    for criteria in ({}, {"start_date": None, "category_ids": None}):
+        with pytest.raises(ValidationError):
+            TransactionBatch(filter=criteria)
+
+
+def test_minor_units_round_trip():
+    assert to_minor_units(0.285) == 29
+    assert to_minor_units(-0.285) == -29
+    assert to_minor_units(19.99) == 1999
+    assert to_minor_units(5) == 500
+    assert from_minor_units(1999) == 19.99
+
+
+@pytest.mark.parametrize("amount", [float("inf"), float("nan"), 1e17,
+                                    -1e300])
+def test_amounts_must_be_storable(amount):
+    fields = {"date": datetime(2025, 1, 1), "type": "expense",
+              "category_id": 1}
+    with pytest.raises(ValidationError):
+        TransactionCreate(amount=amount, **fields)
+    with pytest.raises(ValidationError):
+        TransactionUpdate(amount=amount)
+    with pytest.raises(ValidationError):
+        BudgetCreate(target_amount=amount, start_date=datetime(2025, 1, 1),
+                     end_date=datetime(2025, 1, 31))
+    assert TransactionCreate(amount=1e12, **fields).amount == 1e12
+
+
+def test_timestamps_are_utc_microseconds():
+    moment = datetime(2024, 2, 29, 23, 59, 59, 999999)
+    assert from_timestamp(to_timestamp(moment)) == moment
+    aware = datetime(2024, 3, 1, 1, 0, tzinfo=timezone(timedelta(hours=2)))
+    assert to_timestamp(aware) == to_timestamp(datetime(2024, 2, 29, 23))
+    assert to_timestamp(datetime(1970, 1, 2)) == 86_400_000_000
+
+
+def test_day_and_month_numbers():
+    assert day_number(to_timestamp(datetime(1970, 1, 2, 12))) == 1
+    assert day_number(to_timestamp(datetime(1969, 12, 31, 23))) == -1
+    day = day_number(to_timestamp(datetime(2024, 2, 29)))
+    assert month_number(day) == 2024 * 12 + 1
+    assert month_first_day(month_number(day)) == day - 28
+
+
+def test_transaction_storage_conversion():
+    stored = transaction_to_storage({"amount": 12.5, "description": "x",
+                                     "date": datetime(2024, 1, 1)})
+    assert stored == {"amount": 1250, "description": "x",
+                      "date": to_timestamp(datetime(2024, 1, 1))}
+    assert transaction_to_storage({"type": "income"}) == {"type": "income"}
+    assert transaction_from_storage(stored) == {
+        "amount": 12.5, "description": "x", "date": datetime(2024, 1, 1)}
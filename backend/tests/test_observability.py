@@ -0,0 +1,56 @@
+import pytest
+from finance_tracker import observability
+from finance_tracker.observability import ObservabilitySettings, \
+    parse_sample_rates, init_sentry
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("") == {}
+    assert parse_sample_rates("/a=0.5, /b/c=0") == {"/a": 0.5, "/b/c": 0.0}
+    with pytest.raises(ValueError):
+        parse_sample_rates("/a")
+    with pytest.raises(ValueError):
+        parse_sample_rates("/a=2")
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("SENTRY_DSN", "https://key@example.com/1")
+    monkeypatch.setenv("SENTRY_TRACES_SAMPLE_RATE", "0.25")
+    monkeypatch.setenv("SENTRY_TRACES_SAMPLE_RATES", "/metrics=0")
+    monkeypatch.setenv("SENTRY_PROFILES_SAMPLE_RATE", "0.1")
+    settings = ObservabilitySettings()
+    assert settings.active
+    assert settings.traces_sample_rate == 0.25
+    assert settings.profiles_sample_rate == 0.1
+    assert settings.rate_for_path("/metrics") == 0.0
+
+    monkeypatch.setenv("SENTRY_ENABLED", "0")
+    assert not ObservabilitySettings().active
+
+
+def test_traces_sampler_uses_longest_prefix():
+    settings = ObservabilitySettings(
+        dsn="", traces_sample_rate=0.1,
+        endpoint_sample_rates={"/transactions": 0.01,
+                               "/transactions/export": 1.0})
+    sample = settings.traces_sampler
+    assert sample({"asgi_scope": {"path": "/transactions/"}}) == 0.01
+    assert sample({"asgi_scope": {"path": "/transactions/export"}}) == 1.0
+    assert sample({"asgi_scope": {"path": "/budgets/"}}) == 0.1
+    assert sample({"parent_sampled": True,
+                   "asgi_scope": {"path": "/budgets/"}}) == 1.0
+
+
+def test_init_sentry(monkeypatch):
+    calls = []
+    monkeypatch.setattr(observability.sentry_sdk, "init",
+                        lambda **kwargs: calls.append(kwargs))
+    assert not init_sentry(ObservabilitySettings(dsn=""))
+    assert calls == []
+
+    settings = ObservabilitySettings(dsn="https://key@example.com/1",
+                                     profiles_sample_rate=0.5)
+    assert init_sentry(settings)
+    assert calls[0]["traces_sampler"] == settings.traces_sampler
+    assert calls[0]["profiles_sample_rate"] == 0.5
+    assert "traces_sample_rate" not in calls[0]
@@ -0,0 +1,108 @@
+import re
+import sqlite3
+from datetime import date
+
+import pytest
+
+from finance_tracker import analytics, migrations, recurrence, \
+    repository
+from finance_tracker.database import setup_database
+from finance_tracker.seed import seed
+
+
+LIST_PARAMS = {"user_id": 2, "start": repository.MIN_DATE,
+               "before_date": repository.MAX_DATE,
+               "before_id": repository.MAX_ID, "category_ids": None,
+               "type": None, "limit": 50}
+PERIOD = (2, "2024-03-01", "2024-03-02")
+
+HOT_QUERIES = {
+    "user by username": (repository.SELECT_USER_BY_USERNAME, ("user2",)),
+    "user": (repository.SELECT_USER, (2,)),
+    "transaction": (repository.SELECT_TRANSACTION, (10, 2)),
+    "transactions": (repository.SELECT_TRANSACTIONS, LIST_PARAMS),
+    "transactions by category": (
+        repository.SELECT_TRANSACTIONS,
+        dict(LIST_PARAMS, category_ids="[5, 6]", type="expense")),
+    "update transaction": (
+        repository.update_statement(("amount", "category_id")),
+        {"id": 10, "user_id": 2, "amount": 1.0, "category_id": 5}),
+    "delete transaction": (repository.DELETE_TRANSACTION, (10, 2)),
+    "batch update by ids": (
+        repository.batch_update_statement(("category_id",), "ids"),
+        {"user_id": 2, "ids": "[10, 11]", "category_id": 5}),
+    "batch delete by ids": (repository.DELETE_TRANSACTIONS["ids"],
+                            {"user_id": 2, "ids": "[10, 11]"}),
+    "batch delete by filter": (
+        repository.DELETE_TRANSACTIONS["filter"],
+        {"user_id": 2, "start": repository.MIN_DATE,
+         "end": 1719792000000000, "category_ids": "[5]", "type": None}),
+    "predefined categories": (repository.SELECT_PREDEFINED_CATEGORIES, ()),
+    "user categories": (repository.SELECT_USER_CATEGORIES, (2,)),
+    "category names": (repository.SELECT_CATEGORY_NAMES, ("[5, 6]",)),
+    "budgets": (repository.SELECT_BUDGETS,
+                {"user_id": 2, "active_only": 1, "now": 1719792000000000}),
+    "budgets covering a transaction": (
+        "SELECT id FROM budgets WHERE "
+        + migrations.BUDGET_MATCH.format(row=":"),
+        {"user_id": 2, "date": 1719792000000000, "category_id": 5,
+         "type": "expense"}),
+    "raw totals": (analytics.RAW_TOTALS_EXCLUSIVE, PERIOD),
+    "raw totals inclusive": (analytics.RAW_TOTALS_INCLUSIVE, PERIOD),
+    "daily totals": (analytics.DAILY_TOTALS, PERIOD),
+    "monthly totals": (analytics.MONTHLY_TOTALS,
+                       (2, "2024-01", "2024-03")),
+    "due recurrences": (recurrence.SELECT_DUE, (1719792000000000, 500)),
+    "occurrences of a deleted template": (
+        migrations.DETACH_OCCURRENCES.format(row=":"), {"id": 10}),
+}
+
+# json_each is the table-valued function expanding bound id lists.
+FULL_SCAN = re.compile(r"^SCAN (?!json_each\b)")
+
+
+@pytest.fixture(scope="module", params=[False, True],
+                ids=["no-stats", "analyzed"])
+def seeded(tmp_path_factory, request):
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    conn = sqlite3.connect(str(path))
+    setup_database(conn)
+    # Enough users that, with statistics, scanning categories is no
+    # longer cheaper than searching the indexes.
+    seed(conn, users=200, transactions=20, seed_value=3,
+         end=date(2024, 6, 30))
+    if request.param:
+        conn.execute("ANALYZE")
+    yield conn
+    conn.close()
+
+
+def _plan(conn, sql, params):
+    return [row[3] for row in
+            conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_an_index(seeded, name):
+    sql, params = HOT_QUERIES[name]
+    plan = _plan(seeded, sql, params)
+    scans = [step for step in plan if FULL_SCAN.match(step)]
+    assert not scans, plan
+
+
+@pytest.mark.parametrize("sql", [analytics.RAW_TOTALS_EXCLUSIVE,
+                                 analytics.RAW_TOTALS_INCLUSIVE])
+def test_raw_totals_read_only_the_index(seeded, sql):
+    plan = _plan(seeded, sql, PERIOD)
+    assert any("COVERING INDEX idx_transactions_user_date_totals" in step
+               for step in plan), plan
+
+
+@pytest.mark.parametrize("sql, params, index", [
+    (repository.SELECT_USER_CATEGORIES, (2,), "idx_categories_user"),
+    (repository.SELECT_PREDEFINED_CATEGORIES, (),
+     "idx_categories_predefined"),
+])
+def test_category_loads_use_the_partial_indexes(seeded, sql, params, index):
+    plan = _plan(seeded, sql, params)
+    assert any(index in step for step in plan), plan
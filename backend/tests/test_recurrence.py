@@ -0,0 +1,224 @@
+from datetime import datetime
+
+import pytest
+
+from finance_tracker import recurrence, repository
+from finance_tracker.database import connect, setup_database
+from finance_tracker.models import from_timestamp, to_timestamp
+from finance_tracker.recurrence import RecurrenceScheduler, parse_pattern, \
+    run_due
+from finance_tracker.repository import INSERT_TRANSACTION
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "recurrence.db"))
+    setup_database(conn=conn)
+    conn.execute(
+        "INSERT INTO users (username, password, email) VALUES (?, ?, ?)",
+        ("planner", "hash", "planner@example.com")
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _template(conn, moment, pattern, amount=1500):
+    cursor = conn.execute(INSERT_TRANSACTION, (
+        1, 6, amount, "Rent", to_timestamp(moment), "expense", 1, pattern))
+    conn.commit()
+    return cursor.lastrowid
+
+
+def _occurrences(conn, template_id):
+    return [from_timestamp(row[0]) for row in conn.execute(
+        "SELECT date FROM transactions WHERE recurrence_parent_id = ? "
+        "ORDER BY date", (template_id,))]
+
+
+def _run(conn, moment, **kwargs):
+    return run_due(conn, to_timestamp(moment), **kwargs)
+
+
+@pytest.mark.parametrize("pattern", [
+    "monthly", " Weekly ", "FREQ=DAILY;INTERVAL=3",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,TH;COUNT=4",
+    "FREQ=MONTHLY;BYMONTHDAY=1,-1;UNTIL=20241231",
+    "FREQ=YEARLY;UNTIL=20300101T000000Z",
+])
+def test_parse_supported_patterns(pattern):
+    assert parse_pattern(pattern).freq in recurrence.FREQUENCIES
+
+
+@pytest.mark.parametrize("pattern", [
+    "fortnightly", "FREQ=HOURLY", "FREQ=WEEKLY;BYDAY=1MO",
+    "FREQ=DAILY;INTERVAL=0", "FREQ=DAILY;COUNT=2;UNTIL=20250101",
+    "FREQ=WEEKLY;BYMONTHDAY=3", "FREQ=MONTHLY;BYDAY=MO",
+    "FREQ=DAILY;BYSETPOS=1", "FREQ=DAILY;UNTIL=soon", "FREQ",
+    "FREQ=YEARLY;INTERVAL=10000", "FREQ=DAILY;INTERVAL=1001",
+])
+def test_parse_rejects_unsupported_patterns(pattern):
+    with pytest.raises(ValueError):
+        parse_pattern(pattern)
+
+
+def test_monthly_clamps_to_the_end_of_the_month(conn):
+    template = _template(conn, datetime(2024, 1, 31, 9), "monthly")
+    result = _run(conn, datetime(2024, 5, 31))
+    assert result == {"templates": 1, "inserted": 3}
+    assert _occurrences(conn, template) == [
+        datetime(2024, 2, 29, 9), datetime(2024, 3, 31, 9),
+        datetime(2024, 4, 30, 9)]
+
+
+def test_weekly_by_day_with_count(conn):
+    # 2024-07-01 is a Monday; the template is the first of four.
+    template = _template(conn, datetime(2024, 7, 1, 8),
+                         "FREQ=WEEKLY;BYDAY=MO,TH;COUNT=4")
+    _run(conn, datetime(2024, 12, 31))
+    assert _occurrences(conn, template) == [
+        datetime(2024, 7, 4, 8), datetime(2024, 7, 8, 8),
+        datetime(2024, 7, 11, 8)]
+    next_due = conn.execute(
+        "SELECT next_due FROM recurrence_schedule WHERE transaction_id = ?",
+        (template,)).fetchone()[0]
+    assert next_due is None
+
+
+def test_until_is_inclusive(conn):
+    template = _template(conn, datetime(2024, 3, 1, 12),
+                         "FREQ=DAILY;INTERVAL=2;UNTIL=20240305")
+    _run(conn, datetime(2024, 12, 31))
+    assert _occurrences(conn, template) == [
+        datetime(2024, 3, 3, 12), datetime(2024, 3, 5, 12)]
+
+
+def test_runs_resume_from_the_high_water_mark(conn):
+    template = _template(conn, datetime(2024, 1, 10), "weekly")
+    assert _run(conn, datetime(2024, 1, 31))["inserted"] == 3
+    assert _run(conn, datetime(2024, 1, 31)) == \
+        {"templates": 0, "inserted": 0}
+    assert _run(conn, datetime(2024, 2, 14))["inserted"] == 2
+    dates = _occurrences(conn, template)
+    assert dates == sorted(set(dates))
+    assert dates[-1] == datetime(2024, 2, 14)
+
+
+def test_overlapping_runs_insert_nothing_twice(conn):
+    template = _template(conn, datetime(2024, 1, 1), "daily")
+    _run(conn, datetime(2024, 1, 10))
+    # Another worker that read the old schedule repeats the same batch.
+    conn.execute("UPDATE recurrence_schedule SET next_period = 0, "
+                 "emitted = 0, next_due = 0")
+    conn.commit()
+    assert _run(conn, datetime(2024, 1, 10))["inserted"] == 0
+    assert len(_occurrences(conn, template)) == 9
+
+
+def test_occurrences_feed_the_rollups(conn):
+    template = _template(conn, datetime(2024, 1, 5), "monthly", amount=2500)
+    _run(conn, datetime(2024, 6, 30))
+    totals = conn.execute(
+        "SELECT month, total FROM monthly_rollups ORDER BY month").fetchall()
+    assert [total for _, total in totals] == [2500] * 6
+    assert len(_occurrences(conn, template)) == 5
+
+
+def test_changed_template_restarts_its_schedule(conn):
+    template = _template(conn, datetime(2024, 1, 1), "monthly")
+    _run(conn, datetime(2024, 3, 15))
+    conn.execute("UPDATE transactions SET recurrence_pattern = 'weekly' "
+                 "WHERE id = ?", (template,))
+    conn.commit()
+    schedule = conn.execute(
+        "SELECT next_period, next_due FROM recurrence_schedule "
+        "WHERE transaction_id = ?", (template,)).fetchone()
+    assert tuple(schedule) == (0, to_timestamp(datetime(2024, 1, 1)))
+    _run(conn, datetime(2024, 1, 22))
+    assert datetime(2024, 1, 15) in _occurrences(conn, template)
+
+    conn.execute("UPDATE transactions SET is_recurring = 0 WHERE id = ?",
+                 (template,))
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM recurrence_schedule"
+                        ).fetchone()[0] == 0
+
+
+def test_deleted_template_leaves_the_schedule(conn):
+    template = _template(conn, datetime(2024, 1, 1), "daily")
+    conn.execute("DELETE FROM transactions WHERE id = ?", (template,))
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM recurrence_schedule"
+                        ).fetchone()[0] == 0
+
+
+def test_deleted_template_keeps_its_occurrences(conn):
+    template = _template(conn, datetime(2024, 1, 1), "monthly")
+    other = _template(conn, datetime(2024, 1, 2), "weekly")
+    _run(conn, datetime(2024, 9, 30))
+    count = "SELECT COUNT(*) FROM transactions"
+    total = conn.execute(count).fetchone()[0]
+    assert len(_occurrences(conn, template)) == 8
+    assert repository.delete_transaction(conn, template, 1) == 1
+    assert repository.delete_transactions(conn, 1, ids=[other]) == [other]
+    conn.commit()
+    assert conn.execute(count).fetchone()[0] == total - 2
+    assert conn.execute(f"{count} WHERE recurrence_parent_id IS NOT NULL"
+                        ).fetchone()[0] == 0
+
+
+def test_invalid_pattern_is_parked(conn, caplog):
+    template = _template(conn, datetime(2024, 1, 1), "fortnightly")
+    assert _run(conn, datetime(2024, 2, 1)) == \
+        {"templates": 1, "inserted": 0}
+    assert "not scheduled" in caplog.text
+    assert conn.execute(
+        "SELECT next_due FROM recurrence_schedule WHERE transaction_id = ?",
+        (template,)).fetchone()[0] is None
+    assert _run(conn, datetime(2024, 3, 1))["templates"] == 0
+
+
+@pytest.mark.parametrize("pattern", [
+    "FREQ=YEARLY;INTERVAL=10000", "FREQ=DAILY;INTERVAL=999999999",
+])
+def test_rule_leaving_the_datetime_range_is_parked(conn, caplog,
+                                                   monkeypatch, pattern):
+    monkeypatch.setattr(recurrence, "MAX_INTERVAL", 10 ** 9)
+    parse_pattern.cache_clear()
+    template = _template(conn, datetime(2024, 1, 1), pattern)
+    daily = _template(conn, datetime(2024, 1, 1), "daily")
+    assert _run(conn, datetime(2024, 1, 5)) == \
+        {"templates": 2, "inserted": 4}
+    assert "not scheduled" in caplog.text
+    assert _occurrences(conn, template) == []
+    assert len(_occurrences(conn, daily)) == 4
+    assert conn.execute(
+        "SELECT next_due FROM recurrence_schedule WHERE transaction_id = ?",
+        (template,)).fetchone()[0] is None
+    parse_pattern.cache_clear()
+
+
+def test_run_due_works_in_batches(conn):
+    for day in range(1, 8):
+        _template(conn, datetime(2024, 1, day), "weekly")
+    result = _run(conn, datetime(2024, 1, 31), batch_size=3)
+    assert result["templates"] == 7
+    assert conn.execute(
+        "SELECT COUNT(*) FROM transactions "
+        "WHERE recurrence_parent_id IS NOT NULL").fetchone()[0] == \
+        result["inserted"] > 0
+
+
+def test_scheduler_runs_on_its_own_connection(tmp_path):
+    path = str(tmp_path / "scheduler.db")
+    conn = connect(path)
+    setup_database(conn=conn)
+    conn.execute("INSERT INTO users (username, password, email) "
+                 "VALUES ('a', 'b', 'c')")
+    conn.commit()
+    _template(conn, datetime(2020, 1, 1), "FREQ=YEARLY;COUNT=3")
+    scheduler = RecurrenceScheduler(path, interval=3600)
+    scheduler.start()
+    scheduler.stop()
+    assert len(_occurrences(conn, 1)) == 2
+    conn.close()
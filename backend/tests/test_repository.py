@@ -0,0 +1,202 @@
+import pytest
+from datetime import datetime
+from prometheus_client import REGISTRY
+from finance_tracker import repository
+from finance_tracker.database import connect, setup_database, \
+    statement_template
+from finance_tracker.models import BudgetCreate, CategoryCreate, \
+    TransactionCreate, from_timestamp, to_timestamp
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "repo.db"))
+    setup_database(conn)
+    user = repository.insert_user(conn, "alice", "hash", "a@example.com")
+    assert user["id"] == 1
+    yield conn
+    conn.close()
+
+
+def _transaction(category_id, day, type_="expense", amount=10.0):
+    return TransactionCreate(category_id=category_id, amount=amount,
+                             date=datetime(2024, 1, day), type=type_)
+
+
+def test_user_lookup(conn):
+    assert repository.get_user_by_username(conn, "alice")["password"] == \
+        "hash"
+    assert "password" not in repository.get_user(conn, 1).keys()
+    assert repository.get_user_by_username(conn, "bob") is None
+
+
+def test_query_transactions_filters_and_keyset(conn):
+    values = [repository.transaction_values(1, _transaction(1 + day % 2,
+                                                            day))
+              for day in range(1, 11)]
+    assert repository.insert_transactions(conn, values, chunk_size=3) == 10
+
+    rows = repository.list_transactions(conn, 1)
+    assert [from_timestamp(row["date"]).day for row in rows][:2] == [10, 9]
+    assert rows[0]["amount"] == 1000
+
+    page = repository.list_transactions(conn, 1, limit=4)
+    after = (page[-1]["date"], page[-1]["id"])
+    rest = repository.list_transactions(conn, 1, after=after)
+    assert len(page) + len(rest) == 10
+    assert page[-1]["id"] not in {row["id"] for row in rest}
+
+    ranged = repository.list_transactions(
+        conn, 1, start=to_timestamp(datetime(2024, 1, 3)),
+        end=to_timestamp(datetime(2024, 1, 5, 23, 59, 59)),
+        category_ids=[2])
+    assert [from_timestamp(row["date"]).day for row in ranged] == [5, 3]
+    assert repository.list_transactions(conn, 1, type_="income") == []
+    assert repository.list_transactions(conn, 2) == []
+
+
+def test_update_keeps_omitted_fields(conn):
+    transaction_id = repository.insert_transaction(conn, 1,
+                                                   _transaction(1, 1))["id"]
+    row = repository.update_transaction(conn, transaction_id, 1,
+                                        {"amount": 2500})
+    assert tuple(row) == \
+        tuple(repository.get_transaction(conn, transaction_id, 1))
+    assert row["amount"] == 2500
+    assert row["category_id"] == 1
+    assert repository.update_transaction(conn, transaction_id, 2,
+                                         {"amount": 100}) is None
+    assert repository.delete_transaction(conn, transaction_id, 2) == 0
+    assert repository.delete_transaction(conn, transaction_id, 1) == 1
+
+
+def test_batch_update_and_delete(conn):
+    repository.insert_user(conn, "bob", "hash", "b@example.com")
+    values = [repository.transaction_values(1 + day % 2,
+                                            _transaction(1, day))
+              for day in range(1, 9)]
+    repository.insert_transactions(conn, values)
+    own = [row["id"] for row in repository.list_transactions(conn, 1)]
+
+    rows = repository.update_transactions(conn, 1, {"amount": 5, "type": None},
+                                          ids=own + [2])
+    assert [row["id"] for row in rows] == sorted(own)
+    assert {row["amount"] for row in rows} == {5}
+    assert {row["type"] for row in rows} == {"expense"}
+
+    rows = repository.update_transactions(
+        conn, 1, {"category_id": 2},
+        filters={"start": to_timestamp(datetime(2024, 1, 5))})
+    assert [from_timestamp(row["date"]).day for row in rows] == [6, 8]
+
+    assert repository.delete_transactions(conn, 1, filters={
+        "category_ids": [2], "type_": "expense"}) == sorted(own)[-2:]
+    assert repository.delete_transactions(conn, 1, ids=[]) == []
+    assert repository.delete_transactions(conn, 2, filters={}) == \
+        list(range(1, 9, 2))
+
+
+@pytest.mark.parametrize("returning", [True, False],
+                         ids=["returning", "reselect"])
+def test_writes_return_the_stored_rows(conn, monkeypatch, returning):
+    monkeypatch.setattr(repository, "SUPPORTS_RETURNING", returning)
+    user = repository.insert_user(conn, "carol", "hash", "c@example.com")
+    assert tuple(user) == tuple(repository.get_user(conn, user["id"]))
+
+    category = repository.insert_category(
+        conn, user["id"], CategoryCreate(name="Toys", type="expense"))
+    assert dict(category) == dict(repository.get_category(conn,
+                                                          category["id"]))
+
+    created = repository.insert_transaction(
+        conn, user["id"], _transaction(category["id"], 3, amount=12.5))
+    assert tuple(created) == tuple(repository.get_transaction(
+        conn, created["id"], user["id"]))
+    updated = repository.update_transaction(
+        conn, created["id"], user["id"], {"description": "Kite"})
+    assert updated["description"] == "Kite"
+    assert updated["amount"] == 1250
+
+    # current_amount is set by a trigger after the insert itself.
+    budget = repository.insert_budget(conn, user["id"], BudgetCreate(
+        category_id=category["id"], target_amount=50,
+        start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 31)))
+    assert dict(budget) == dict(repository.get_budget(conn, budget["id"]))
+    assert budget["current_amount"] == 1250
+
+    second = repository.insert_transaction(
+        conn, user["id"], _transaction(category["id"], 20))
+    rows = repository.update_transactions(
+        conn, user["id"], {"date": to_timestamp(datetime(2024, 2, 1))},
+        filters={"end": to_timestamp(datetime(2024, 1, 10))})
+    assert [row["id"] for row in rows] == [created["id"]]
+    assert repository.delete_transactions(
+        conn, user["id"], filters={"category_ids": [category["id"]]}) == \
+        [created["id"], second["id"]]
+
+
+def test_returned_rows_are_counted(conn):
+    values = [repository.transaction_values(1, _transaction(1, day))
+              for day in range(1, 4)]
+    repository.insert_transactions(conn, values)
+    labels = {"statement": statement_template(
+        repository.DELETE_TRANSACTIONS["filter"])}
+    before = REGISTRY.get_sample_value(
+        "finance_db_rows_returned_total", labels) or 0
+    assert len(repository.delete_transactions(
+        conn, 1, filters={"type_": "expense"})) == 3
+    assert REGISTRY.get_sample_value(
+        "finance_db_rows_returned_total", labels) == before + 3
+
+
+def test_categories_and_budgets(conn):
+    category_id = repository.insert_category(
+        conn, 1, CategoryCreate(name="Pets", type="expense"))["id"]
+    assert repository.get_category(conn, category_id)["name"] == "Pets"
+    assert [row["id"] for row in repository.user_categories(conn, 1)] == \
+        [category_id]
+    assert repository.user_categories(conn, 2) == []
+    predefined = repository.predefined_categories(conn)
+    assert predefined and all(row["is_predefined"] for row in predefined)
+    assert category_id not in [row["id"] for row in predefined]
+    names = repository.category_names(conn, [category_id])
+    assert names == {category_id: "Pets"}
+
+    budget_id = repository.insert_budget(conn, 1, BudgetCreate(
+        category_id=category_id, target_amount=100,
+        start_date=datetime(2000, 1, 1), end_date=datetime(2000, 2, 1)))["id"]
+    assert repository.get_budget(conn, budget_id)["user_id"] == 1
+    assert repository.list_budgets(conn, 1) == []
+    assert len(repository.list_budgets(conn, 1, active_only=False)) == 1
+
+
+class _Recorder:
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = set()
+
+    def execute(self, sql, parameters=()):
+        self.statements.add(sql)
+        return self.conn.execute(sql, parameters)
+
+
+def test_statements_are_fixed(conn):
+    recorder = _Recorder(conn)
+    for filters in ({}, {"type_": "expense"}, {"category_ids": [1, 2, 3]},
+                    {"start": 0, "after": (86400000000, 9)}):
+        repository.list_transactions(recorder, 1, **filters)
+    for fields in ({"amount": 100, "type": "income"},
+                   {"type": "expense", "amount": 200, "description": None}):
+        repository.update_transaction(recorder, 1, 1, fields)
+    assert len(recorder.statements) == 2
+    for ids in ([1], [1, 2, 3]):
+        repository.update_transactions(recorder, 1, {"amount": 1}, ids=ids)
+        repository.delete_transactions(recorder, 1, ids=ids)
+    assert len(recorder.statements) == 4
+
+
+def test_update_statement_rejects_unknown_fields():
+    with pytest.raises(ValueError):
+        repository.update_statement(("user_id",))
+    with pytest.raises(ValueError):
+        repository.update_statement(())
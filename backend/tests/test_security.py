@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from finance_tracker.security import PasswordHasher, \
+    PasswordQueueFullError, get_password_hash, verify_password
+
+
+def test_hash_and_verify():
+    hashed = get_password_hash("secret")
+    assert hashed != "secret"
+    assert verify_password("secret", hashed)
+    assert not verify_password("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_round_trip():
+    hasher = PasswordHasher(workers=2, queue_limit=4)
+    hashed = await hasher.hash("secret")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+    assert hasher.depth == 0
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_overflow():
+    hasher = PasswordHasher(workers=1, queue_limit=1)
+    results = await asyncio.gather(
+        hasher.hash("one"), hasher.hash("two"), return_exceptions=True
+    )
+    assert any(isinstance(r, PasswordQueueFullError) for r in results)
+    assert any(isinstance(r, str) for r in results)
+    assert hasher.depth == 0
+    hasher.shutdown()
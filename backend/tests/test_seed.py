@@ -0,0 +1,107 @@
+import json
+import sqlite3
+from collections import Counter
+from datetime import date, datetime
+
+from finance_tracker.database import setup_database
+from finance_tracker.models import day_number, month_number, to_timestamp
+from finance_tracker.seed import seed, main
+from finance_tracker.security import verify_password
+
+
+END = date(2024, 6, 30)
+
+
+def _seeded(tmp_path, name="seed.db", **kwargs):
+    conn = sqlite3.connect(str(tmp_path / name))
+    setup_database(conn)
+    kwargs.setdefault("users", 5)
+    kwargs.setdefault("transactions", 50)
+    counts = seed(conn, seed_value=7, end=END, **kwargs)
+    return conn, counts
+
+
+def _count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]  # nosec
+
+
+def test_seed_inserts_reported_rows(tmp_path):
+    conn, counts = _seeded(tmp_path, budgets=2)
+    assert counts["users"] == _count(conn, "users") == 5
+    assert counts["transactions"] == _count(conn, "transactions")
+    assert counts["transactions"] > 0
+    assert counts["budgets"] == _count(conn, "budgets") == 10
+    dates = conn.execute(
+        "SELECT MIN(date), MAX(date) FROM transactions").fetchone()
+    assert dates[1] < to_timestamp(datetime(2024, 7, 1))
+    assert dates[0] >= to_timestamp(datetime(2023, 6, 1))
+    orphans = conn.execute(
+        "SELECT COUNT(*) FROM transactions t "
+        "LEFT JOIN categories c ON c.id = t.category_id "
+        "WHERE c.id IS NULL OR c.type != t.type "
+        "OR (c.user_id IS NOT NULL AND c.user_id != t.user_id)"
+    ).fetchone()[0]
+    assert orphans == 0
+    conn.close()
+
+
+def test_seed_users_can_log_in(tmp_path):
+    conn, _ = _seeded(tmp_path, users=2, password="s3cret")
+    hashed = conn.execute(
+        "SELECT password FROM users WHERE username = 'user1'").fetchone()[0]
+    assert verify_password("s3cret", hashed)
+    conn.close()
+
+
+def test_seed_rollups_match_transactions(tmp_path):
+    conn, _ = _seeded(tmp_path)
+    totals, counts = Counter(), Counter()
+    for user_id, category_id, amount, moment, type_ in conn.execute(
+            "SELECT user_id, category_id, amount, date, type "
+            "FROM transactions"):
+        key = (user_id, month_number(day_number(moment)), category_id,
+               type_)
+        totals[key] += amount
+        counts[key] += 1
+    rolled = conn.execute(
+        "SELECT user_id, month, category_id, type, total, count "
+        "FROM monthly_rollups").fetchall()
+    assert {row[:4]: row[4:] for row in rolled} == \
+        {key: (totals[key], counts[key]) for key in totals}
+    triggers = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+        "AND name LIKE 'trg_%_rollups_%'").fetchone()[0]
+    assert triggers == 6
+    conn.close()
+
+
+def test_seed_is_reproducible(tmp_path):
+    first, _ = _seeded(tmp_path, "first.db")
+    second, _ = _seeded(tmp_path, "second.db")
+    query = ("SELECT user_id, category_id, amount, date, type "
+             "FROM transactions ORDER BY id")
+    assert first.execute(query).fetchall() == \
+        second.execute(query).fetchall()
+    first.close()
+    second.close()
+
+
+def test_seed_appends_after_existing_users(tmp_path):
+    conn, _ = _seeded(tmp_path, users=2)
+    counts = seed(conn, users=2, transactions=10, seed_value=8, end=END)
+    assert counts["users"] == 2
+    names = [row[0] for row in conn.execute(
+        "SELECT username FROM users ORDER BY id")]
+    assert names == ["user1", "user2", "user3", "user4"]
+    conn.close()
+
+
+def test_main_prints_report(tmp_path, capsys):
+    path = str(tmp_path / "cli.db")
+    assert main(["--db", path, "--users", "3", "--transactions", "20",
+                 "--seed", "1"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["rows"]["users"] == 3
+    conn = sqlite3.connect(path)
+    assert _count(conn, "transactions") == report["rows"]["transactions"]
+    conn.close()
@@ -5,11 +5,13 @@ Defines functions for communicating with the Finance Tracker backend service.
 Each function wraps an HTTP request to the corresponding REST endpoint.
 """
 
+import tempfile
 import requests
 import streamlit as st
-from typing import Optional, List, Dict
+from typing import BinaryIO, Optional, List, Dict
 API_URL = st.secrets["api_url"]
 TIMEOUT = 10
+PAGE_SIZE = 1000
 
 
 def login(username: str, password: str) -> str:
@@ -92,19 +94,58 @@ def get_transactions(
     end: str,
     category_ids: Optional[List[int]] = None
 ) -> List[Dict]:
-    """Fetch transactions list."""
-    params = {"start_date": start, "end_date": end}
+    """Fetch transactions list, following the pagination cursor."""
+    params = {"start_date": start, "end_date": end, "limit": PAGE_SIZE}
     if category_ids:
         params["category_id"] = ",".join(map(str, category_ids))
 
-    resp = requests.get(
-        f"{API_URL}/transactions/",
+    transactions = []
+    while True:
+        resp = requests.get(
+            f"{API_URL}/transactions/",
+            headers=get_headers(),
+            params=params,
+            timeout=TIMEOUT
+        )
+        resp.raise_for_status()
+        transactions.extend(resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return transactions
+        params["cursor"] = cursor
+
+
+def export_transactions(
+    start: str,
+    end: str,
+    category_ids: Optional[List[int]] = None,
+    format_: str = "csv"
+) -> BinaryIO:
+    """Stream the server-side transactions export into a temporary file.
+
+    The file is returned rewound; closing it deletes it.
+    """
+    params = {"start_date": start, "end_date": end, "format": format_}
+    if category_ids:
+        params["category_id"] = ",".join(map(str, category_ids))
+
+    with requests.get(
+        f"{API_URL}/transactions/export",
         headers=get_headers(),
         params=params,
+        stream=True,
         timeout=TIMEOUT
-    )
-    resp.raise_for_status()
-    return resp.json()
+    ) as resp:
+        resp.raise_for_status()
+        export = tempfile.TemporaryFile()
+        try:
+            for chunk in resp.iter_content(chunk_size=65536):
+                export.write(chunk)
+        except BaseException:
+            export.close()
+            raise
+    export.seek(0)
+    return export
 
 
 def create_transaction(txn: Dict) -> Dict:
@@ -72,14 +72,17 @@ def main_app():
         txns = api.get_transactions(start_date.isoformat(),
                                     end_date.isoformat(), sel_ids)
         df = pd.DataFrame(txns)
-        if not df.empty:
-            csv_data = df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Export Transactions to CSV",
-                data=csv_data,
-                file_name=f"transactions_{start_date}_{end_date}.csv",
-                mime="text/csv"
-            )
+        # The export is only downloaded when asked for, not on every rerun.
+        if not df.empty and st.button("Export Transactions to CSV"):
+            with api.export_transactions(start_date.isoformat(),
+                                         end_date.isoformat(),
+                                         sel_ids) as csv_file:
+                st.download_button(
+                    label="Download CSV",
+                    data=csv_file,
+                    file_name=f"transactions_{start_date}_{end_date}.csv",
+                    mime="text/csv"
+                )
         if not df.empty:
             df["Date"] = pd.to_datetime(df["date"])
             df["Amount"] = df["amount"]
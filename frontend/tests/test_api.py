@@ -10,6 +10,7 @@ from personal_finance_tracker_front.api import (
     create_category,
     get_summary,
     get_transactions,
+    export_transactions,
     create_transaction,
     update_transaction,
     delete_transaction,
@@ -174,6 +175,49 @@ def test_get_transactions_success(mock_requests, mock_streamlit_session):
     assert transactions[0]["amount"] == 100.0
 
 
+def test_get_transactions_follows_cursor(mock_requests,
+                                         mock_streamlit_session):
+    mock_requests.get(
+        "http://localhost:8000/transactions/",
+        [
+            {"json": [{"id": 2, "amount": 20.0}],
+             "headers": {"X-Next-Cursor": "next"},
+             "status_code": 200},
+            {"json": [{"id": 1, "amount": 10.0}], "status_code": 200},
+        ],
+    )
+    with patch("personal_finance_tracker_front.api.st.secrets",
+               {"api_url": "http://localhost:8000"}):
+        transactions = get_transactions("2025-01-01", "2025-01-31")
+    assert [txn["id"] for txn in transactions] == [2, 1]
+    assert mock_requests.request_history[1].qs["cursor"] == ["next"]
+
+
+def test_export_transactions_success(mock_requests,
+                                     mock_streamlit_session):
+    mock_requests.get(
+        "http://localhost:8000/transactions/export",
+        content=b"id,amount\n1,100.0\n",
+        status_code=200,
+    )
+    with patch("personal_finance_tracker_front.api.st.secrets",
+               {"api_url": "http://localhost:8000"}):
+        with export_transactions("2025-01-01", "2025-01-31", [1]) as export:
+            assert export.read() == b"id,amount\n1,100.0\n"
+    assert mock_requests.last_request.qs["category_id"] == ["1"]
+
+
+def test_export_transactions_failure(mock_requests, mock_streamlit_session):
+    mock_requests.get(
+        "http://localhost:8000/transactions/export",
+        status_code=401,
+    )
+    with patch("personal_finance_tracker_front.api.st.secrets",
+               {"api_url": "http://localhost:8000"}):
+        with pytest.raises(requests.HTTPError):
+            export_transactions("2025-01-01", "2025-01-31")
+
+
 def test_create_transaction_success(mock_requests, mock_streamlit_session):
     mock_requests.post(
         "http://localhost:8000/transactions/",